@@ -1,18 +1,43 @@
+import json
+import textwrap
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Iterator
 from dataclasses import dataclass, field
-from typing import Annotated
+from typing import Annotated, ClassVar
 
 from langchain_core.language_models.chat_models import BaseChatModel
-from langchain_core.messages import AIMessage, AnyMessage, HumanMessage, ToolMessage
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    AnyMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
+)
+from langchain_core.runnables import RunnableLambda
 from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.constants import TAG_NOSTREAM
 from langgraph.graph import StateGraph
 from langgraph.graph.message import add_messages
 from typing_extensions import TypedDict
 
+from chatbot.agent.history import Compaction, HistoryManager
+from chatbot.utils.metrics import AGENT_RUN_SECONDS, LLM_SECONDS, record_llm_tokens
+from chatbot.utils.token_count import count_tokens
+from chatbot.utils.tracing import event, llm_usage, span
+from chatbot.utils.user_profile import format_profile, update_profile_from_messages
+
+# Providers only cache prompt prefixes from this length on (OpenAI: 1024 tokens)
+PROMPT_CACHE_MIN_TOKENS = 1024
+
 
 class GenericAgentState(TypedDict):
     messages: Annotated[list[AnyMessage], add_messages]
     user_info: dict
+    summary: str  # rolling summary of the turns compacted out of ``messages``
+    profile_cursor: str  # id of the last message ``extract_user_info`` has scanned
 
 
 @dataclass
@@ -21,8 +46,13 @@ class AgentFactory(ABC):
     tools: list[BaseTool] = field(default_factory=list)
     agent_state: GenericAgentState = field(default_factory=dict)
     graph: StateGraph | None = None
-    current_state: dict = field(default_factory=lambda: {"messages": [], "user_info": {}})
-    last_ai_message: str | None = None
+    history: HistoryManager = field(default_factory=HistoryManager)
+    _system_prefix: SystemMessage | None = field(default=None, init=False, repr=False)
+
+    # Static part of the system prompt, compiled once per agent. ``{tool_descriptions}``
+    # is filled in at compile time, per-turn data goes to ``get_user_context`` instead so
+    # the prefix stays byte-identical and provider-side prompt caching can reuse it.
+    SYSTEM_PROMPT: ClassVar[str] = ""
 
     @abstractmethod
     def create_agent_graph(self):
@@ -36,6 +66,141 @@ class AgentFactory(ABC):
     def get_llm(self):
         pass
 
+    def compile_system_prompt(self) -> str:
+        tool_descriptions = self.tool_manager.get_tool_descriptions()
+        return (
+            textwrap.dedent(self.SYSTEM_PROMPT)
+            .strip()
+            .replace("{tool_descriptions}", tool_descriptions)
+        )
+
+    def get_system_prefix(self) -> SystemMessage:
+        if self._system_prefix is None:
+            self._system_prefix = SystemMessage(content=self.compile_system_prompt())
+        return self._system_prefix
+
+    def get_user_context(self, state: GenericAgentState) -> str:
+        """Small per-turn suffix of the system prompt"""
+        return format_profile(state.get("user_info"))
+
+    def get_system_messages(self, state: GenericAgentState) -> list[SystemMessage]:
+        user_context = self.get_user_context(state)
+        suffix = [SystemMessage(content=user_context)] if user_context else []
+        return [self.get_system_prefix(), *suffix]
+
+    def prompt_token_report(self, state: GenericAgentState | None = None) -> dict[str, float]:
+        """Input tokens of the fixed and per-turn parts of this agent's prompt.
+
+        ``turn_tokens`` is what one call sends now (compiled prefix, user context, tool
+        schemas and the compacted history), ``replayed_turn_tokens`` what the same call
+        sent before: the prompt rendered again with the user context and the whole
+        checkpointed history replayed.
+        """
+        state = state or {}
+        tool_schemas = [
+            convert_to_openai_tool(tool) for tool in self.tool_manager.get_langchain_tools()
+        ]
+        prefix_tokens = count_tokens(self.get_system_prefix().content)
+        tool_tokens = count_tokens(json.dumps(tool_schemas, ensure_ascii=False))
+        user_context = self.get_user_context(state)
+        user_context_tokens = count_tokens(user_context)
+
+        messages = state.get("messages") or []
+        kept, evicted, _ = self.history._plan(messages)
+        summary = state.get("summary", "")
+        if evicted:
+            # The summary model is not called here, its fallback stands in for the new summary
+            summary = self.history._fallback_summary(summary, evicted)
+        history_tokens = self.history.count(kept) + count_tokens(summary)
+        raw_prompt = self.SYSTEM_PROMPT.replace(
+            "{tool_descriptions}", self.tool_manager.get_tool_descriptions()
+        )
+        replayed_history_tokens = self.history.count(messages)
+
+        cacheable = prefix_tokens + tool_tokens
+        turn_tokens = cacheable + user_context_tokens + history_tokens
+        replayed_turn_tokens = (
+            count_tokens(raw_prompt) + user_context_tokens + tool_tokens + replayed_history_tokens
+        )
+        return {
+            "static_prefix_tokens": prefix_tokens,
+            "tool_schema_tokens": tool_tokens,
+            "user_context_tokens": user_context_tokens,
+            "history_tokens": history_tokens,
+            "replayed_history_tokens": replayed_history_tokens,
+            "turn_tokens": turn_tokens,
+            "replayed_turn_tokens": replayed_turn_tokens,
+            "turn_token_savings": (
+                1 - turn_tokens / replayed_turn_tokens if replayed_turn_tokens else 0.0
+            ),
+            "cacheable_tokens": cacheable,
+            "cacheable_share": cacheable / turn_tokens if turn_tokens else 0.0,
+            "cache_eligible": cacheable >= PROMPT_CACHE_MIN_TOKENS,
+        }
+
+    def extract_user_info(self, state: GenericAgentState) -> dict:
+        """Update the user profile from the messages added since the last run"""
+        with span("extract_user_info", agent=type(self).__name__) as current:
+            user_info, cursor = update_profile_from_messages(
+                state.get("user_info") or {}, state["messages"], state.get("profile_cursor")
+            )
+            current.set(fields=sorted(user_info))
+        return {"user_info": user_info, "profile_cursor": cursor}
+
+    def _agent_output(
+        self, state: GenericAgentState, response: AIMessage, compaction: Compaction
+    ) -> dict:
+        event(
+            "agent_response",
+            agent=type(self).__name__,
+            tool_calls=[tc["name"] for tc in response.tool_calls],
+        )
+
+        # Compacted turns are removed from the checkpoint, the summary replaces them
+        update = compaction.state_update
+        return {
+            **update,
+            "messages": update.get("messages", []) + [response],
+            "user_info": state.get("user_info", {}),
+        }
+
+    def agent_node(self, state: GenericAgentState) -> dict:
+        """Main agent reasoning node"""
+        agent = type(self).__name__
+        with span("agent_node", agent=agent):
+            with span("history", agent=agent):
+                compaction = self.history.compact(state["messages"], state.get("summary", ""))
+            messages = self.get_system_messages(state) + compaction.messages
+            with (
+                span("llm", agent=agent, messages=len(messages)) as current,
+                LLM_SECONDS.time(caller=agent),
+            ):
+                response = self.model.invoke(messages)
+                current.set(**llm_usage(response))
+            record_llm_tokens(agent, response)
+            return self._agent_output(state, response, compaction)
+
+    async def aagent_node(self, state: GenericAgentState) -> dict:
+        """Async agent reasoning node, used when the graph runs through astream"""
+        agent = type(self).__name__
+        with span("agent_node", agent=agent):
+            with span("history", agent=agent):
+                compaction = await self.history.acompact(
+                    state["messages"], state.get("summary", "")
+                )
+            messages = self.get_system_messages(state) + compaction.messages
+            with (
+                span("llm", agent=agent, messages=len(messages)) as current,
+                LLM_SECONDS.time(caller=agent),
+            ):
+                response = await self.model.ainvoke(messages)
+                current.set(**llm_usage(response))
+            record_llm_tokens(agent, response)
+            return self._agent_output(state, response, compaction)
+
+    def get_agent_node(self) -> RunnableLambda:
+        return RunnableLambda(self.agent_node, afunc=self.aagent_node, name="agent")
+
     def init_conversation_layout(self, round: int, user_input: str):
         print(f"\n{'=' * 70}")
         print(f"CONVERSATION ROUND {round}")
@@ -47,7 +212,6 @@ class AgentFactory(ABC):
         if "messages" in node_output:
             for msg in node_output["messages"]:
                 if isinstance(msg, AIMessage):
-                    self.last_ai_message = msg.content
                     print(f"    🤖 AI: {msg.content}")
                     if hasattr(msg, "tool_calls") and msg.tool_calls:
                         for tc in msg.tool_calls:
@@ -57,39 +221,170 @@ class AgentFactory(ABC):
         if "user_info" in node_output:
             print(f"    📝 USER INFO: {node_output['user_info']}")
 
-    def last_conversation_layout(self) -> None:
+    def last_conversation_layout(self, config: dict) -> None:
+        current_state = self.get_current_state(config)
         print("\n💾 FINAL STATE:")
-        print(f"   Messages: {len(self.current_state['messages'])}")
-        print(f"   User Info: {self.current_state['user_info']}")
+        print(f"   Messages: {len(current_state.get('messages', []))}")
+        print(f"   User Info: {current_state.get('user_info', {})}")
         print(f"\n{'=' * 70}")
 
-    def run_conversation(self, user_inputs: list[str], is_display: bool = False):
+    def get_graph_config(self, thread_id: str | None = None) -> dict:
+        """Graph config for one conversation thread, defaults to the agent's own thread"""
+        if thread_id is None:
+            return self.config.graph_invoke_config
+        configurable = {**self.config.graph_invoke_config.get("configurable", {})}
+        configurable["thread_id"] = thread_id
+        return {**self.config.graph_invoke_config, "configurable": configurable}
+
+    def get_current_state(self, config: dict) -> dict:
+        if not self.graph:
+            return {}
+        return self.graph.get_state(config).values
+
+    def last_reply(self, thread_id: str | None = None) -> str | None:
+        for message in reversed(
+            self.get_current_state(self.get_graph_config(thread_id)).get("messages", [])
+        ):
+            if isinstance(message, AIMessage):
+                return message.content
+        return None
+
+    def record_turn(self, user_input: str, ai_reply: str, thread_id: str | None = None) -> None:
+        """Append a turn answered outside the graph (e.g. from cache) to a thread"""
         if not self.graph:
             self.graph = self.create_agent_graph()
+        self.graph.update_state(
+            self.get_graph_config(thread_id),
+            {"messages": [HumanMessage(content=user_input), AIMessage(content=ai_reply)]},
+            as_node="agent",
+        )
+
+    def release_thread(self, thread_id: str) -> None:
+        """Drop a thread from process memory, durable checkpointers keep it for later"""
+        if isinstance(self.checkpointer, InMemorySaver):
+            self.checkpointer.delete_thread(thread_id)
+
+    def _handle_step(self, step: dict, step_count: int, is_display: bool) -> str | None:
+        if is_display:
+            print(f"\n📋 STEP {step_count}:")
 
-        for round, user_input in enumerate(user_inputs):
+        last_ai_message = None
+        for node_name, node_output in step.items():
+            if is_display:
+                print(f"  🔹 NODE: {node_name}")
+            for msg in node_output.get("messages", []):
+                if isinstance(msg, AIMessage):
+                    last_ai_message = msg.content
             if is_display:
-                self.init_conversation_layout(round=round, user_input=user_input)
-            # Add user messages into chat history
-            self.current_state["messages"].append(HumanMessage(content=user_input))
+                self.step_conversation_layout(node_output=node_output)
+        return last_ai_message
 
-            step_count = 0
-            for step in self.graph.stream(
-                self.current_state, config=self.config.graph_invoke_config, stream_mode="updates"
-            ):
-                step_count += 1
-                if is_display:
-                    print(f"\n📋 STEP {step_count}:")
-
-                for node_name, node_output in step.items():
-                    if is_display:
-                        print(f"  🔹 NODE: {node_name}")
-                    # Add LLM generated messages into chat history
-                    for key, val in node_output.items():
-                        if key == "messages" and isinstance(val, list):
-                            self.current_state["messages"].extend(val)
-                    if is_display:
-                        self.step_conversation_layout(node_output=node_output)
+    def _start_round(self, round: int, user_input: str, is_display: bool) -> HumanMessage:
+        if not self.graph:
+            self.graph = self.create_agent_graph()
+        if is_display:
+            self.init_conversation_layout(round=round, user_input=user_input)
+        return HumanMessage(content=user_input)
+
+    @staticmethod
+    def _graph_input(user_message: HumanMessage, user_info: dict | None) -> dict:
+        # A caller-provided profile (the orchestrator's session profile) replaces the
+        # thread's copy, so every agent works from the same profile
+        if user_info is None:
+            return {"messages": [user_message]}
+        return {"messages": [user_message], "user_info": dict(user_info)}
+
+    def run_conversation(
+        self,
+        user_inputs: list[str],
+        is_display: bool = False,
+        thread_id: str | None = None,
+        user_info: dict | None = None,
+    ):
+        """Run the graph once per *new* user input and return the last AI reply."""
+        config = self.get_graph_config(thread_id)
+        last_ai_message = None
+        with AGENT_RUN_SECONDS.time(agent=type(self).__name__):
+            for round, user_input in enumerate(user_inputs):
+                user_message = self._start_round(round, user_input, is_display)
+
+                # Only the new message is fed in, prior turns come from the checkpointer
+                step_count = 0
+                for step in self.graph.stream(
+                    self._graph_input(user_message, user_info), config=config, stream_mode="updates"
+                ):
+                    step_count += 1
+                    ai_message = self._handle_step(step, step_count, is_display)
+                    if ai_message is not None:
+                        last_ai_message = ai_message
+        if is_display:
+            self.last_conversation_layout(config)
+        return last_ai_message
+
+    async def arun_conversation(
+        self,
+        user_inputs: list[str],
+        is_display: bool = False,
+        thread_id: str | None = None,
+        user_info: dict | None = None,
+    ):
+        """Async version of run_conversation built on graph.astream"""
+        config = self.get_graph_config(thread_id)
+        last_ai_message = None
+        with AGENT_RUN_SECONDS.time(agent=type(self).__name__):
+            for round, user_input in enumerate(user_inputs):
+                user_message = self._start_round(round, user_input, is_display)
+
+                step_count = 0
+                async for step in self.graph.astream(
+                    self._graph_input(user_message, user_info), config=config, stream_mode="updates"
+                ):
+                    step_count += 1
+                    ai_message = self._handle_step(step, step_count, is_display)
+                    if ai_message is not None:
+                        last_ai_message = ai_message
         if is_display:
-            self.last_conversation_layout()
-        return self.last_ai_message
+            self.last_conversation_layout(config)
+        return last_ai_message
+
+    @staticmethod
+    def _reply_token(chunk: AIMessageChunk | AnyMessage, metadata: dict) -> str | None:
+        # Tool messages, tool call arguments and internal calls such as the history summary
+        # are not part of the reply the user sees
+        if metadata.get("langgraph_node") != "agent" or not isinstance(chunk, AIMessage):
+            return None
+        if TAG_NOSTREAM in metadata.get("tags", []):
+            return None
+        return chunk.content if isinstance(chunk.content, str) and chunk.content else None
+
+    def stream_conversation(
+        self, user_input: str, thread_id: str | None = None, user_info: dict | None = None
+    ) -> Iterator[str]:
+        """Run the graph for one user input and yield the reply tokens as they are generated.
+
+        Models that cannot stream yield their whole reply as one token. The final reply is
+        available afterwards through ``last_reply``.
+        """
+        config = self.get_graph_config(thread_id)
+        user_message = self._start_round(0, user_input, is_display=False)
+        with AGENT_RUN_SECONDS.time(agent=type(self).__name__):
+            for chunk, metadata in self.graph.stream(
+                self._graph_input(user_message, user_info), config=config, stream_mode="messages"
+            ):
+                token = self._reply_token(chunk, metadata)
+                if token:
+                    yield token
+
+    async def astream_conversation(
+        self, user_input: str, thread_id: str | None = None, user_info: dict | None = None
+    ) -> AsyncIterator[str]:
+        """Async version of stream_conversation built on graph.astream"""
+        config = self.get_graph_config(thread_id)
+        user_message = self._start_round(0, user_input, is_display=False)
+        with AGENT_RUN_SECONDS.time(agent=type(self).__name__):
+            async for chunk, metadata in self.graph.astream(
+                self._graph_input(user_message, user_info), config=config, stream_mode="messages"
+            ):
+                token = self._reply_token(chunk, metadata)
+                if token:
+                    yield token
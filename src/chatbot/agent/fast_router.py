@@ -0,0 +1,286 @@
+import re
+import unicodedata
+from collections import defaultdict, deque
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+# Structured identifiers only the order agent can serve
+ORDER_PATTERNS = [
+    re.compile(r"user_id|order_id", re.IGNORECASE),
+    re.compile(r"(?<![a-z0-9])u_[a-z0-9]+", re.IGNORECASE),
+    re.compile(r"(?<![a-z0-9])JTCG-\d{6}-\d{4,5}(?!\d)", re.IGNORECASE),
+]
+PATTERN_WEIGHT = 5.0
+
+# agent type -> keyword -> weight, keywords are matched lowercased after NFKC normalization
+ROUTE_KEYWORDS: dict[str, dict[str, float]] = {
+    "handover_agent": {
+        "真人": 4,
+        "轉接": 2,
+        "客訴": 4,
+        "投訴": 4,
+        "人工客服": 4,
+        "人工": 2,
+        "human": 3,
+        "live agent": 3,
+        "real person": 3,
+        "connect to agent": 4,
+        "转人工": 4,
+    },
+    "order_agent": {
+        "訂單": 2,
+        "订单": 2,
+        "配送進度": 3,
+        "出貨進度": 3,
+        "物流進度": 3,
+        "包裹": 2,
+        "追蹤碼": 2,
+        "tracking": 1,
+        "order status": 3,
+        "my order": 3,
+        "my orders": 3,
+        "訂單列表": 3,
+    },
+    "faq_agent": {
+        "退貨": 2,
+        "退货": 2,
+        "退換貨": 3,
+        "退款": 2,
+        "保固": 2,
+        "保修": 2,
+        "發票": 3,
+        "发票": 3,
+        "運費": 3,
+        "运费": 3,
+        "免運": 3,
+        "付款": 3,
+        "分期": 2,
+        # A bare "pay" is too generic to route on its own, it only adds to other evidence
+        "pay": 1,
+        "payment": 2,
+        "客服時間": 3,
+        "客服時段": 3,
+        "客服电话": 3,
+        "客服電話": 3,
+        "營業": 2,
+        "優惠": 2,
+        "會員": 2,
+        "點數": 2,
+        "rma": 2,
+        "隱私": 2,
+        "面交": 2,
+        "政策": 2,
+        "ship internationally": 3,
+        "return policy": 3,
+        "warranty": 3,
+        "invoice": 3,
+        "invoices": 3,
+    },
+    "product_agent": {
+        "推薦": 3,
+        "推荐": 3,
+        "recommend": 3,
+        "recommended": 3,
+        "recommendation": 3,
+        "recommendations": 3,
+        "吋": 2,
+        "英寸": 2,
+        "inch": 2,
+        "inches": 2,
+        "規格": 2,
+        "單臂": 2,
+        "雙臂": 2,
+        "雙螢幕": 1,
+        "重載臂": 3,
+        "壁掛": 1,
+        "托盤": 1,
+        "支架": 1,
+        "臂架": 1,
+        "氣壓臂": 1,
+        "比較": 2,
+        "哪款": 2,
+        "哪支": 2,
+        "哪個": 1,
+        "mount": 2,
+        "mounts": 2,
+        "mounting": 2,
+        "jtcg-arm": 3,
+    },
+    "redirect_agent": {
+        "其他品牌": 4,
+        "別家": 3,
+        "其他家": 3,
+        "天氣": 4,
+        "股票": 4,
+        "電影": 4,
+        "iphone": 3,
+        "weather": 4,
+    },
+}
+KNOWLEDGE_TAG_WEIGHT = 1.0
+PRODUCT_SKU_WEIGHT = 3.0
+
+
+def normalize(text: str) -> str:
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isascii() and char.isalnum()
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton, finds every keyword occurring in a text in one pass.
+
+    Matching cost is linear in the text length no matter how many keywords are compiled,
+    so growing the keyword lists (e.g. with knowledge tags) does not slow routing down.
+    Latin keywords only match whole words ("rma" is not found in "normal"), CJK keywords
+    have no word boundaries and match anywhere.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[list[str]] = [[]]
+        for keyword in keywords:
+            self._add(keyword)
+        self._build_failure_links()
+
+    def _add(self, keyword: str) -> None:
+        state = 0
+        for char in keyword:
+            if char not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][char] = len(self._goto) - 1
+            state = self._goto[state][char]
+        if keyword and keyword not in self._output[state]:
+            self._output[state].append(keyword)
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    @staticmethod
+    def _is_whole_word(text: str, keyword: str, end: int) -> bool:
+        start = end - len(keyword) + 1
+        if _is_word_char(keyword[0]) and start > 0 and _is_word_char(text[start - 1]):
+            return False
+        if _is_word_char(keyword[-1]) and end + 1 < len(text) and _is_word_char(text[end + 1]):
+            return False
+        return True
+
+    def find(self, text: str) -> set[str]:
+        found = set()
+        state = 0
+        for end, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for keyword in self._output[state]:
+                if self._is_whole_word(text, keyword, end):
+                    found.add(keyword)
+        return found
+
+
+@dataclass
+class FastRoute:
+    agent_type: str
+    confidence: float
+    reason: str
+    tier: str  # "pattern" | "keyword"
+    scores: dict[str, float] = field(default_factory=dict)
+
+
+class FastRouter:
+    """Deterministic first routing tier in front of the routing LLM.
+
+    Order identifiers are caught by regex, everything else by weighted keywords (route
+    keywords, knowledge base tags and product SKUs) matched with one automaton pass. A
+    route is only returned when one agent clearly dominates, i.e. it scores at least
+    ``min_score`` and holds ``min_share`` of the total score. Mixed intents such as
+    "退貨流程 + 推薦一支單臂" fall through to the LLM.
+    """
+
+    def __init__(
+        self,
+        knowledge_path: str | None = "data/raw/ai-eng-test-sample-knowledges.csv",
+        products_path: str | None = "data/raw/ai-eng-test-sample-products.csv",
+        min_score: float = 2.0,
+        min_share: float = 0.8,
+    ):
+        self.min_score = min_score
+        self.min_share = min_share
+
+        self.weights: dict[str, dict[str, float]] = defaultdict(dict)
+        if knowledge_path:
+            for tag in self._load_column_values(knowledge_path, prefix="tags/"):
+                self.weights[normalize(tag)]["faq_agent"] = KNOWLEDGE_TAG_WEIGHT
+        if products_path:
+            for sku in self._load_column_values(products_path, prefix="sku"):
+                self.weights[normalize(sku)]["product_agent"] = PRODUCT_SKU_WEIGHT
+        # Curated keywords replace generated entries for the same word
+        curated: dict[str, dict[str, float]] = defaultdict(dict)
+        for agent_type, keywords in ROUTE_KEYWORDS.items():
+            for keyword, weight in keywords.items():
+                curated[normalize(keyword)][agent_type] = float(weight)
+        self.weights.update(curated)
+
+        self.automaton = KeywordAutomaton(self.weights)
+
+    @staticmethod
+    def _load_column_values(path: str, prefix: str) -> set[str]:
+        try:
+            df = pd.read_csv(path)
+        except OSError as e:
+            print(f"Fast router could not read {path}: {e}")
+            return set()
+        columns = [col for col in df.columns if col.startswith(prefix)]
+        return {str(v).strip() for v in df[columns].stack().tolist() if str(v).strip()}
+
+    def score(self, message: str) -> tuple[dict[str, float], list[str], bool]:
+        text = normalize(message)
+        scores: dict[str, float] = defaultdict(float)
+
+        matched_pattern = any(pattern.search(text) for pattern in ORDER_PATTERNS)
+        if matched_pattern:
+            scores["order_agent"] += PATTERN_WEIGHT
+
+        keywords = sorted(self.automaton.find(text))
+        # A keyword nested in a longer match (e.g. 退貨 in 退換貨) is only counted once
+        keywords = [k for k in keywords if not any(k != o and k in o for o in keywords)]
+        for keyword in keywords:
+            for agent_type, weight in self.weights[keyword].items():
+                scores[agent_type] += weight
+        return dict(scores), keywords, matched_pattern
+
+    def route(self, message: str) -> FastRoute | None:
+        scores, keywords, matched_pattern = self.score(message)
+        if not scores:
+            return None
+
+        agent_type, top = max(scores.items(), key=lambda item: item[1])
+        share = top / sum(scores.values())
+        if top < self.min_score or share < self.min_share:
+            return None
+
+        tier = "pattern" if matched_pattern and agent_type == "order_agent" else "keyword"
+        evidence = ", ".join(keywords) or "order id"
+        return FastRoute(
+            agent_type=agent_type,
+            confidence=round(0.5 + 0.45 * share, 2),
+            reason=f"規則路由 ({tier}): {evidence}",
+            tier=tier,
+            scores=scores,
+        )
@@ -0,0 +1,195 @@
+"""Bounded conversation history for the agents.
+
+The checkpointed ``messages`` list grows with every turn and tool result, and all of it used
+to be sent to the model. ``HistoryManager`` keeps the prompt within a token budget: the last
+``keep_turns`` turns stay verbatim, older turns are folded into a rolling summary, and
+bulky tool outputs (e.g. full order JSON) of past turns are truncated.
+"""
+
+from dataclasses import dataclass, field
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import (
+    AnyMessage,
+    HumanMessage,
+    RemoveMessage,
+    SystemMessage,
+    ToolMessage,
+)
+from langchain_core.runnables import Runnable
+from langgraph.constants import TAG_NOSTREAM
+
+from chatbot.utils.model_pool import model_pool
+from chatbot.utils.token_count import count_tokens
+
+SUMMARY_PROMPT = """你負責維護一段客服對話的摘要。
+請將「新的對話」併入「目前摘要」，輸出更新後的摘要：
+- 保留使用者的需求、已提供的資訊（如 user_id、order_id、螢幕尺寸、Email）與尚未解決的問題
+- 保留已給出的結論與連結，省略寒暄與重複內容
+- 使用繁體中文條列，不超過 {max_words} 字
+
+目前摘要:
+{summary}
+
+新的對話:
+{transcript}
+"""
+
+
+@dataclass
+class Compaction:
+    """Messages to send this call, plus the state update that persists the compaction"""
+
+    messages: list[AnyMessage]
+    summary: str
+    removals: list[RemoveMessage] = field(default_factory=list)
+    replacements: list[AnyMessage] = field(default_factory=list)
+
+    @property
+    def state_update(self) -> dict:
+        update: dict = {}
+        if self.removals or self.replacements:
+            update["messages"] = [*self.removals, *self.replacements]
+        if self.removals:
+            update["summary"] = self.summary
+        return update
+
+
+class HistoryManager:
+    def __init__(
+        self,
+        max_tokens: int = 3000,
+        keep_turns: int = 4,
+        max_tool_chars: int = 1500,
+        summary_model: str = "gpt-4o-mini",
+        summary_max_words: int = 300,
+    ):
+        self.max_tokens = max_tokens
+        self.keep_turns = keep_turns
+        self.max_tool_chars = max_tool_chars
+        self.summary_model = summary_model
+        self.summary_max_words = summary_max_words
+
+    def _get_model(self) -> BaseChatModel:
+        return model_pool.get_chat_model(model=self.summary_model, temperature=0, max_tokens=500)
+
+    def _summarizer(self) -> Runnable:
+        # The summary runs inside the agent node, tagged so its tokens are never streamed
+        # to the user as part of the reply
+        return self._get_model().with_config(tags=[TAG_NOSTREAM])
+
+    @staticmethod
+    def _turn_starts(messages: list[AnyMessage]) -> list[int]:
+        return [i for i, message in enumerate(messages) if isinstance(message, HumanMessage)]
+
+    @staticmethod
+    def count(messages: list[AnyMessage]) -> int:
+        return sum(count_tokens(str(message.content)) for message in messages)
+
+    def _truncate_tool_outputs(
+        self, messages: list[AnyMessage], current_turn: int
+    ) -> tuple[list[AnyMessage], list[AnyMessage]]:
+        """Shorten tool results of past turns, the current turn still needs them in full"""
+        compacted, replacements = [], []
+        for i, message in enumerate(messages):
+            content = str(message.content)
+            # Flagged once truncated, so later calls don't cut the "…(省略 N 字)" suffix again
+            if (
+                i < current_turn
+                and isinstance(message, ToolMessage)
+                and not message.additional_kwargs.get("truncated")
+                and len(content) > self.max_tool_chars
+            ):
+                omitted = len(content) - self.max_tool_chars
+                message = message.model_copy(
+                    update={
+                        "content": f"{content[: self.max_tool_chars]}…(省略 {omitted} 字)",
+                        "additional_kwargs": {**message.additional_kwargs, "truncated": True},
+                    }
+                )
+                replacements.append(message)
+            compacted.append(message)
+        return compacted, replacements
+
+    def _split(self, messages: list[AnyMessage]) -> tuple[list[AnyMessage], list[AnyMessage]]:
+        """Turns to fold into the summary and turns to keep, whole turns only"""
+        starts = self._turn_starts(messages)
+        if len(starts) <= self.keep_turns:
+            return [], messages
+        keep_from = starts[-self.keep_turns]
+        return messages[:keep_from], messages[keep_from:]
+
+    @staticmethod
+    def _transcript(messages: list[AnyMessage]) -> str:
+        lines = []
+        for message in messages:
+            content = str(message.content).strip()
+            if not content:
+                continue
+            role = {"human": "使用者", "ai": "助理", "tool": "工具"}.get(message.type, message.type)
+            lines.append(f"{role}: {content[:500]}")
+        return "\n".join(lines)
+
+    def _summary_prompt(self, summary: str, evicted: list[AnyMessage]) -> list[AnyMessage]:
+        prompt = SUMMARY_PROMPT.format(
+            max_words=self.summary_max_words,
+            summary=summary or "(無)",
+            transcript=self._transcript(evicted),
+        )
+        return [HumanMessage(content=prompt)]
+
+    def _fallback_summary(self, summary: str, evicted: list[AnyMessage]) -> str:
+        asked = [str(m.content)[:80] for m in evicted if isinstance(m, HumanMessage)]
+        lines = [summary] if summary else []
+        lines += [f"- 使用者曾詢問: {question}" for question in asked]
+        return "\n".join(lines)[-self.summary_max_words * 2 :]
+
+    def _plan(self, messages: list[AnyMessage]) -> tuple[list[AnyMessage], list, list]:
+        starts = self._turn_starts(messages)
+        current_turn = starts[-1] if starts else len(messages)
+        compacted, replacements = self._truncate_tool_outputs(messages, current_turn)
+        evicted: list[AnyMessage] = []
+        if self.count(compacted) > self.max_tokens:
+            evicted, compacted = self._split(compacted)
+        return compacted, evicted, replacements
+
+    def _compaction(
+        self,
+        kept: list[AnyMessage],
+        evicted: list[AnyMessage],
+        replacements: list[AnyMessage],
+        summary: str,
+    ) -> Compaction:
+        removals = [RemoveMessage(id=message.id) for message in evicted if message.id]
+        evicted_ids = {message.id for message in evicted}
+        replacements = [message for message in replacements if message.id not in evicted_ids]
+        summary_messages = [SystemMessage(content=f"先前對話摘要:\n{summary}")] if summary else []
+        return Compaction(
+            messages=summary_messages + kept,
+            summary=summary,
+            removals=removals,
+            replacements=replacements,
+        )
+
+    def compact(self, messages: list[AnyMessage], summary: str = "") -> Compaction:
+        kept, evicted, replacements = self._plan(messages)
+        if evicted:
+            # Only the newly evicted turns are summarized, on top of the previous summary
+            try:
+                response = self._summarizer().invoke(self._summary_prompt(summary, evicted))
+                summary = str(response.content).strip()
+            except Exception as e:
+                print(f"History summary failed ({e}), keeping the user questions only")
+                summary = self._fallback_summary(summary, evicted)
+        return self._compaction(kept, evicted, replacements, summary)
+
+    async def acompact(self, messages: list[AnyMessage], summary: str = "") -> Compaction:
+        kept, evicted, replacements = self._plan(messages)
+        if evicted:
+            try:
+                response = await self._summarizer().ainvoke(self._summary_prompt(summary, evicted))
+                summary = str(response.content).strip()
+            except Exception as e:
+                print(f"History summary failed ({e}), keeping the user questions only")
+                summary = self._fallback_summary(summary, evicted)
+        return self._compaction(kept, evicted, replacements, summary)
@@ -0,0 +1,277 @@
+"""Embedding based intent classifier for routing, trained on labelled messages.
+
+Labels come from JSONL files of ``{"message": ..., "agent_type": ...}`` records, i.e.
+routing decisions logged by ``LLMRouter`` (see ``RoutingDecisionLog``) and labels saved by
+``chatbot.benchmark.routing``, plus the corpus turns the rule tier routes confidently.
+
+The orchestrator appends every decision of the routing LLM to ``DEFAULT_ROUTING_LOG``
+unless it is given another ``routing_log_path`` (``None`` turns logging off). These are
+the messages the rules could not route, so retraining on them is what lets the classifier
+take over turns from the LLM instead of re-learning the keyword tier:
+
+    python -m chatbot.agent.intent_classifier  # reads data/logs/routing_decisions.jsonl
+"""
+
+import argparse
+import json
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from chatbot.agent.fast_router import FastRouter
+from chatbot.utils.embedding_cache import embeddings_namespace
+from chatbot.utils.model_pool import model_pool
+
+DEFAULT_MODEL_PATH = "data/cache/intent_classifier.npz"
+DEFAULT_ROUTING_LOG = "data/logs/routing_decisions.jsonl"
+DEFAULT_CORPUS = "data/raw/ai-eng-test-sample-conversations.json"
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return shifted / shifted.sum(axis=-1, keepdims=True)
+
+
+@dataclass
+class IntentPrediction:
+    agent_type: str
+    confidence: float
+
+
+class IntentClassifier:
+    """Nearest-centroid classifier over normalized message embeddings.
+
+    Cosine similarities to the class centroids go through a softmax whose temperature is
+    fitted on leave-one-out similarities, so ``confidence`` is a calibrated probability and
+    ``1 - min_confidence`` roughly bounds the error rate of the predictions it accepts.
+    """
+
+    def __init__(
+        self,
+        classes: list[str],
+        centroids: np.ndarray,
+        temperature: float,
+        namespace: str,
+        embedding_model: str = "text-embedding-ada-002",
+        min_confidence: float = 0.7,
+    ):
+        self.classes = classes
+        self.centroids = centroids
+        self.temperature = temperature
+        self.namespace = namespace
+        self.embedding_model = embedding_model
+        self.min_confidence = min_confidence
+
+    @staticmethod
+    def _embed(texts: list[str], embedding_model: str) -> np.ndarray:
+        embeddings = model_pool.get_embeddings(embedding_model)
+        return _normalize_rows(np.asarray(embeddings.embed_documents(texts), dtype=np.float32))
+
+    @staticmethod
+    def _leave_one_out_similarities(
+        vectors: np.ndarray, labels: np.ndarray, n_classes: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        sums = np.zeros((n_classes, vectors.shape[1]), dtype=np.float64)
+        np.add.at(sums, labels, vectors)
+        counts = np.bincount(labels, minlength=n_classes)
+
+        similarities = vectors @ _normalize_rows(sums).T
+        # Each message is scored against its own class centroid computed without it
+        own = sums[labels] - vectors
+        own_norm = np.linalg.norm(own, axis=1)
+        valid = (counts[labels] > 1) & (own_norm > 0)
+        rows = np.flatnonzero(valid)
+        similarities[rows, labels[rows]] = (vectors[rows] * own[rows]).sum(1) / own_norm[rows]
+        return similarities[valid], labels[valid]
+
+    @classmethod
+    def fit(
+        cls,
+        messages: list[str],
+        agent_types: list[str],
+        embedding_model: str = "text-embedding-ada-002",
+        min_confidence: float = 0.7,
+    ) -> tuple["IntentClassifier", dict]:
+        classes = sorted(set(agent_types))
+        labels = np.asarray([classes.index(agent_type) for agent_type in agent_types])
+        vectors = cls._embed(messages, embedding_model)
+
+        sums = np.zeros((len(classes), vectors.shape[1]), dtype=np.float64)
+        np.add.at(sums, labels, vectors)
+        centroids = _normalize_rows(sums).astype(np.float32)
+
+        # Temperature scaling on leave-one-out similarities, minimizing the log loss
+        similarities, loo_labels = cls._leave_one_out_similarities(vectors, labels, len(classes))
+        temperature, loo_accuracy = 0.05, None
+        if len(loo_labels):
+            candidates = np.logspace(-3, 0, 61)
+            rows = np.arange(len(loo_labels))
+            losses = [
+                -np.log(_softmax(similarities / t)[rows, loo_labels] + 1e-12).mean()
+                for t in candidates
+            ]
+            temperature = float(candidates[int(np.argmin(losses))])
+            loo_accuracy = float((similarities.argmax(1) == loo_labels).mean())
+
+        embeddings = model_pool.get_embeddings(embedding_model)
+        classifier = cls(
+            classes,
+            centroids,
+            temperature,
+            embeddings_namespace(embeddings, embedding_model),
+            embedding_model,
+            min_confidence,
+        )
+
+        coverage, accuracy = None, None
+        if len(loo_labels):
+            probs = _softmax(similarities / temperature)
+            accepted = probs.max(1) >= min_confidence
+            coverage = float(accepted.mean())
+            if accepted.any():
+                accuracy = float((probs.argmax(1) == loo_labels)[accepted].mean())
+
+        report = {
+            "samples": len(messages),
+            "class_counts": dict(Counter(agent_types)),
+            "temperature": temperature,
+            "leave_one_out_accuracy": loo_accuracy,
+            "coverage_at_threshold": coverage,
+            "accuracy_at_threshold": accuracy,
+        }
+        return classifier, report
+
+    def predict(self, message: str) -> IntentPrediction:
+        embeddings = model_pool.get_embeddings(self.embedding_model)
+        vector = _normalize_rows(np.asarray(embeddings.embed_query(message), dtype=np.float32))
+        probs = _softmax((self.centroids @ vector) / self.temperature)
+        best = int(np.argmax(probs))
+        return IntentPrediction(agent_type=self.classes[best], confidence=float(probs[best]))
+
+    def classify(self, message: str) -> IntentPrediction | None:
+        """The prediction when it is confident enough, None to defer to the LLM"""
+        prediction = self.predict(message)
+        return prediction if prediction.confidence >= self.min_confidence else None
+
+    def save(self, path: str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        np.savez(
+            path,
+            classes=np.asarray(self.classes),
+            centroids=self.centroids,
+            temperature=self.temperature,
+            namespace=self.namespace,
+            embedding_model=self.embedding_model,
+        )
+
+    @classmethod
+    def load(cls, path: str, min_confidence: float = 0.7) -> "IntentClassifier | None":
+        """Load a trained classifier, None if it is missing or built with other embeddings"""
+        if not Path(path).exists():
+            return None
+        data = np.load(path)
+        embedding_model = str(data["embedding_model"])
+        namespace = embeddings_namespace(
+            model_pool.get_embeddings(embedding_model), embedding_model
+        )
+        if str(data["namespace"]) != namespace:
+            print(f"Intent classifier {path} was trained with other embeddings, skipped")
+            return None
+        return cls(
+            classes=[str(c) for c in data["classes"]],
+            centroids=data["centroids"],
+            temperature=float(data["temperature"]),
+            namespace=namespace,
+            embedding_model=embedding_model,
+            min_confidence=min_confidence,
+        )
+
+
+class RoutingDecisionLog:
+    """Append-only JSONL log of routing decisions, the training labels of the classifier"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def record(self, message: str, agent_type: str, confidence: float, tier: str) -> None:
+        record = {
+            "message": message,
+            "agent_type": agent_type,
+            "confidence": confidence,
+            "tier": tier,
+        }
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+def load_labelled_messages(paths: list[str]) -> dict[str, str]:
+    labels = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    labels[record["message"]] = record["agent_type"]
+    return labels
+
+
+def weak_labels_from_corpus(corpus_path: str, fast_router: FastRouter) -> dict[str, str]:
+    """Corpus turns the rule tier routes with high confidence"""
+    with open(corpus_path, encoding="utf-8") as f:
+        conversations = json.load(f)
+
+    labels = {}
+    for conversation in conversations:
+        for message in conversation:
+            if message["role"] != "user":
+                continue
+            for part in message["content"]:
+                fast_route = fast_router.route(part.get("text", ""))
+                if fast_route:
+                    labels[part["text"]] = fast_route.agent_type
+    return labels
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description="Train the routing intent classifier")
+    arg_parser.add_argument(
+        "--labels",
+        nargs="*",
+        default=[DEFAULT_ROUTING_LOG] if Path(DEFAULT_ROUTING_LOG).exists() else [],
+        help=f"JSONL label files, by default the routing log {DEFAULT_ROUTING_LOG}",
+    )
+    arg_parser.add_argument("--corpus", type=str, default=DEFAULT_CORPUS)
+    arg_parser.add_argument(
+        "--no-weak-labels", action="store_true", help="Do not label corpus turns with the rules"
+    )
+    arg_parser.add_argument("--min-confidence", type=float, default=0.7)
+    arg_parser.add_argument("--output", "-o", type=str, default=DEFAULT_MODEL_PATH)
+    args = arg_parser.parse_args()
+
+    labels = {} if args.no_weak_labels else weak_labels_from_corpus(args.corpus, FastRouter())
+    # Explicit labels override the rule based ones
+    labels.update(load_labelled_messages(args.labels))
+    if len(set(labels.values())) < 2:
+        raise SystemExit("Need labelled messages of at least two agent types")
+
+    classifier, report = IntentClassifier.fit(
+        list(labels), list(labels.values()), min_confidence=args.min_confidence
+    )
+    classifier.save(args.output)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    print(f"Saved intent classifier to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
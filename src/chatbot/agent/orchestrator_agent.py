@@ -1,19 +1,48 @@
+import asyncio
+import contextvars
 import json
 import re
+import threading
+import time
+from collections import Counter
+from collections.abc import AsyncIterator, Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from enum import Enum
 from typing import Any
 
-from langchain.chat_models import init_chat_model
 from langchain_core.messages import HumanMessage
 
+from chatbot.agent.agent_factory import AgentFactory
 from chatbot.agent.faq_agent import FAQAgent
+from chatbot.agent.fast_router import FastRoute, FastRouter
 from chatbot.agent.handover_agent import HandoverAgent
+from chatbot.agent.intent_classifier import (
+    DEFAULT_MODEL_PATH,
+    DEFAULT_ROUTING_LOG,
+    IntentClassifier,
+    RoutingDecisionLog,
+)
 from chatbot.agent.order_agent import OrderAgent
 from chatbot.agent.product_agent import ProductAgent
 from chatbot.agent.redirect_agent import RedirectAgent
 from chatbot.tool.handover_tool import SentimentCheckerTool
-from chatbot.utils.load_env import get_openai_api_key
+from chatbot.utils.metrics import (
+    HANDOVERS,
+    LLM_SECONDS,
+    REQUEST_SECONDS,
+    REQUESTS,
+    ROUTING_DECISIONS,
+    ROUTING_FALLBACKS,
+    record_llm_tokens,
+)
+from chatbot.utils.model_pool import model_pool
+from chatbot.utils.response_cache import CacheLookup, ResponseCache
+from chatbot.utils.session_manager import Session, SessionManager
+from chatbot.utils.tracing import event, llm_usage, span
+from chatbot.utils.user_profile import format_profile, update_profile
+
+AGENT_ERROR_PREFIX = "Agent Excuting Error"
 
 
 class AgentType(Enum):
@@ -31,34 +60,45 @@ class RoutingResult:
     reason: str
     sentiment_score: float | None = None
     should_handover: bool = False
+    tier: str = "llm"  # "pattern" | "keyword" | "classifier" | "llm" | "sentiment" | "fallback"
 
 
 class LLMRouter:
-    def __init__(self):
-        self.api_key = get_openai_api_key()
-        self.router_model = init_chat_model(
+    FAST_TIERS = ("pattern", "keyword", "classifier")
+
+    def __init__(
+        self,
+        concurrent: bool = True,
+        max_workers: int = 8,
+        fast_router: FastRouter | None = None,
+        intent_classifier: IntentClassifier | None = None,
+        decision_log: RoutingDecisionLog | None = None,
+    ):
+        self.concurrent = concurrent
+        # Obvious intents are answered by rules, then by the embedding classifier when it
+        # is confident, the routing LLM only sees what is left
+        self.fast_router = fast_router
+        self.intent_classifier = intent_classifier
+        # LLM decisions are logged as training labels for the classifier
+        self.decision_log = decision_log
+        self.tier_counts: Counter[str] = Counter()
+        self._stats_lock = threading.Lock()
+        # Sentiment checks run here while routing runs on the caller's thread
+        self._executor = (
+            ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sentiment")
+            if concurrent
+            else None
+        )
+        self.router_model = model_pool.get_chat_model(
             model="gpt-4o-mini",
             model_provider="openai",
-            api_key=self.api_key,
             temperature=0.1,
             max_tokens=300,
         )
         self.sentiment_tool = SentimentCheckerTool()
 
     def _create_routing_prompt(self, message: str, user_info: dict[str, Any]) -> str:
-        user_context = ""
-        if user_info:
-            context_parts = []
-            if user_info.get("name"):
-                context_parts.append(f"姓名: {user_info['name']}")
-            if user_info.get("email"):
-                context_parts.append(f"信箱: {user_info['email']}")
-            if user_info.get("location"):
-                context_parts.append(f"地點: {user_info['location']}")
-
-            if context_parts:
-                user_context = f"\n用戶資訊: {', '.join(context_parts)}"
-
+        user_context = format_profile(user_info)
         return f"""你是 JTCG shop 的智能客服路由系統。請分析用戶訊息並決定應該路由到哪個專門代理。
 
         {user_context}
@@ -87,51 +127,243 @@ class LLMRouter:
             "keywords": ["關鍵字1", "關鍵字2"]
         }}"""
 
+    def _fast_route(self, message: str) -> FastRoute | None:
+        if not self.fast_router:
+            return None
+        with span("fast_routing"):
+            return self.fast_router.route(message)
+
+    def _classify(self, message: str) -> FastRoute | None:
+        if not self.intent_classifier:
+            return None
+        try:
+            with span("intent_classifier"):
+                prediction = self.intent_classifier.classify(message)
+        except Exception as e:
+            print(f"Intent classifier Error: {e}")
+            return None
+        if prediction is None:
+            return None
+        return FastRoute(
+            agent_type=prediction.agent_type,
+            confidence=prediction.confidence,
+            reason=f"意圖分類器 (機率 {prediction.confidence:.2f})",
+            tier="classifier",
+        )
+
+    def _pre_route(self, message: str) -> FastRoute | None:
+        return self._fast_route(message) or self._classify(message)
+
+    async def _apre_route(self, message: str) -> FastRoute | None:
+        fast_route = self._fast_route(message)
+        if fast_route or not self.intent_classifier:
+            return fast_route
+        return await asyncio.to_thread(self._classify, message)
+
+    async def _aroute_or_invoke(self, message: str, user_info: dict[str, Any]):
+        """The pre-routing tiers first, the routing LLM only when they abstain"""
+        fast_route = await self._apre_route(message)
+        if fast_route:
+            return fast_route, None
+        return None, await self._ainvoke_router(message, user_info)
+
+    def _record_tier(self, routing_result: RoutingResult) -> RoutingResult:
+        with self._stats_lock:
+            self.tier_counts[routing_result.tier] += 1
+        ROUTING_DECISIONS.inc(tier=routing_result.tier, agent_type=routing_result.agent_type.value)
+        return routing_result
+
+    def routing_stats(self) -> dict[str, float]:
+        with self._stats_lock:
+            counts = dict(self.tier_counts)
+        total = sum(counts.values())
+        fast = sum(counts.get(tier, 0) for tier in self.FAST_TIERS)
+        return {**counts, "total": total, "fast_hit_rate": fast / total if total else 0.0}
+
+    def _invoke_router(self, message: str, user_info: dict[str, Any]):
+        prompt = self._create_routing_prompt(message, user_info)
+        with span("routing") as current, LLM_SECONDS.time(caller="router"):
+            response = self.router_model.invoke([HumanMessage(content=prompt)])
+            current.set(**llm_usage(response))
+        record_llm_tokens("router", response)
+        return response
+
+    async def _ainvoke_router(self, message: str, user_info: dict[str, Any]):
+        prompt = self._create_routing_prompt(message, user_info)
+        with span("routing") as current, LLM_SECONDS.time(caller="router"):
+            response = await self.router_model.ainvoke([HumanMessage(content=prompt)])
+            current.set(**llm_usage(response))
+        record_llm_tokens("router", response)
+        return response
+
+    def _sentiment_handover(self, sentiment_score: float | None) -> RoutingResult | None:
+        if sentiment_score is not None and sentiment_score <= 0.4:
+            return RoutingResult(
+                agent_type=AgentType.HANDOVER,
+                confidence=0.95,
+                reason="檢測到負面情緒，需要人工客服介入",
+                sentiment_score=sentiment_score,
+                should_handover=True,
+                tier="sentiment",
+            )
+        return None
+
+    @staticmethod
+    def _log_routing(routing_result: RoutingResult) -> None:
+        event(
+            "routing_decision",
+            agent_type=routing_result.agent_type.value,
+            confidence=routing_result.confidence,
+            reason=routing_result.reason,
+            sentiment_score=routing_result.sentiment_score,
+        )
+
+    def _finish_fast_routing(
+        self, fast_route: FastRoute, sentiment_score: float | None
+    ) -> RoutingResult:
+        routing_result = self._make_routing_result(
+            fast_route.agent_type,
+            fast_route.confidence,
+            fast_route.reason,
+            sentiment_score,
+            tier=fast_route.tier,
+        )
+        self._log_routing(routing_result)
+        return routing_result
+
+    def _finish_routing(
+        self, message: str, response, sentiment_score: float | None
+    ) -> RoutingResult:
+        # parse the response of the LLM output
+        routing_result = self._parse_routing_response(response.content, sentiment_score)
+        self._log_routing(routing_result)
+        if self.decision_log and routing_result.tier == "llm":
+            try:
+                self.decision_log.record(
+                    message,
+                    routing_result.agent_type.value,
+                    routing_result.confidence,
+                    routing_result.tier,
+                )
+            except OSError as e:
+                print(f"Routing decision log Error: {e}")
+        return routing_result
+
+    def _routing_error_result(self, e: Exception, sentiment_score: float | None) -> RoutingResult:
+        print(f"route_message Error: {e}")
+        ROUTING_FALLBACKS.inc(reason="router_error")
+        return RoutingResult(
+            agent_type=AgentType.FAQ,
+            confidence=0.5,
+            reason=f"路由失敗, 降級到FAQ代理: {str(e)}",
+            sentiment_score=sentiment_score,
+            tier="fallback",
+        )
+
     def route_message(self, message: str, user_info: dict[str, Any] = None) -> RoutingResult:
+        with span("route_message") as current:
+            routing_result = self._record_tier(self._route_message(message, user_info))
+            current.set(agent_type=routing_result.agent_type.value, tier=routing_result.tier)
+            return routing_result
+
+    def _route_message(self, message: str, user_info: dict[str, Any] = None) -> RoutingResult:
         user_info = user_info or {}
+        sentiment_score = None
+        response, routing_error = None, None
+        fast_route = None
 
         try:
-            # 1. Check semantic first
-            sentiment_result = self.sentiment_tool.execute(message)
+            # 1. Check semantic first, in concurrent mode routing is done at the same time
+            # and its result is discarded if we hand over
+            if self.concurrent:
+                # The copied context keeps the sentiment span under the current turn
+                sentiment_future = self._executor.submit(
+                    contextvars.copy_context().run, self.sentiment_tool.execute, message
+                )
+                try:
+                    fast_route = self._pre_route(message)
+                    if fast_route is None:
+                        response = self._invoke_router(message, user_info)
+                except Exception as e:
+                    routing_error = e
+                sentiment_result = sentiment_future.result()
+            else:
+                sentiment_result = self.sentiment_tool.execute(message)
+
             sentiment_score = self._extract_sentiment_score(sentiment_result)
+            handover_result = self._sentiment_handover(sentiment_score)
+            if handover_result:
+                return handover_result
 
-            if sentiment_score is not None and sentiment_score <= 0.4:
-                return RoutingResult(
-                    agent_type=AgentType.HANDOVER,
-                    confidence=0.95,
-                    reason="檢測到負面情緒，需要人工客服介入",
-                    sentiment_score=sentiment_score,
-                    should_handover=True,
-                )
+            if routing_error:
+                raise routing_error
 
-            # 2. Use the LLM to route the msg
-            prompt = self._create_routing_prompt(message, user_info)
-            response = self.router_model.invoke([HumanMessage(content=prompt)])
+            # 2. Obvious intents are settled by the rule and classifier tiers
+            if fast_route is None and response is None:
+                fast_route = self._pre_route(message)
+            if fast_route:
+                return self._finish_fast_routing(fast_route, sentiment_score)
 
-            # 3. parse the response of the LLM output
-            routing_result = self._parse_routing_response(response.content, sentiment_score)
+            # 3. Use the LLM to route the msg
+            if response is None:
+                response = self._invoke_router(message, user_info)
 
-            print(
-                f"🎯 路由決策: {routing_result.agent_type.value} (信心度: {routing_result.confidence:.2f})"
-            )
-            print(f"   理由: {routing_result.reason}")
-            if sentiment_score:
-                print(f"   情緒分數: {sentiment_score:.2f}")
+            return self._finish_routing(message, response, sentiment_score)
 
+        except Exception as e:
+            return self._routing_error_result(e, sentiment_score)
+
+    async def aroute_message(self, message: str, user_info: dict[str, Any] = None) -> RoutingResult:
+        with span("route_message") as current:
+            routing_result = self._record_tier(await self._aroute_message(message, user_info))
+            current.set(agent_type=routing_result.agent_type.value, tier=routing_result.tier)
             return routing_result
 
+    async def _aroute_message(
+        self, message: str, user_info: dict[str, Any] = None
+    ) -> RoutingResult:
+        user_info = user_info or {}
+        sentiment_score = None
+        fast_route, response, routing_error = None, None, None
+
+        try:
+            # 1. Sentiment and routing are awaited together in concurrent mode
+            if self.concurrent:
+                sentiment_result, decision = await asyncio.gather(
+                    self.sentiment_tool.aexecute(message=message),
+                    self._aroute_or_invoke(message, user_info),
+                    return_exceptions=True,
+                )
+                if isinstance(sentiment_result, Exception):
+                    raise sentiment_result
+                if isinstance(decision, Exception):
+                    routing_error = decision
+                else:
+                    fast_route, response = decision
+            else:
+                sentiment_result = await self.sentiment_tool.aexecute(message=message)
+
+            sentiment_score = self._extract_sentiment_score(sentiment_result)
+            handover_result = self._sentiment_handover(sentiment_score)
+            if handover_result:
+                return handover_result
+
+            # 2. Rule and classifier tiers, then the LLM
+            if routing_error:
+                raise routing_error
+            if fast_route is None and response is None:
+                fast_route, response = await self._aroute_or_invoke(message, user_info)
+            if fast_route:
+                return self._finish_fast_routing(fast_route, sentiment_score)
+
+            return self._finish_routing(message, response, sentiment_score)
+
         except Exception as e:
-            print(f"route_message Error: {e}")
-            return RoutingResult(
-                agent_type=AgentType.FAQ,
-                confidence=0.5,
-                reason=f"路由失敗, 降級到FAQ代理: {str(e)}",
-                sentiment_score=sentiment_score,
-            )
+            return self._routing_error_result(e, sentiment_score)
 
     def _extract_sentiment_score(self, sentiment_result: str) -> float | None:
         try:
-            # Findinf (分數: X.XX) format
+            # Finding (分數: X.XX) format
             match = re.search(r"分數:\s*([0-9.]+)", sentiment_result)
             if match:
                 return float(match.group(1))
@@ -147,29 +379,17 @@ class LLMRouter:
             if match:
                 result = json.loads(match.group())
 
-                agent_type_str = result.get("agent_type", "faq_agent")
-                confidence = float(result.get("confidence", 0.7))
-                reason = result.get("reason", "LLM路由決策")
-
-                try:
-                    agent_type = AgentType(agent_type_str)
-                except ValueError:
-                    agent_type = AgentType.FAQ  # default: FAQ
-
-                should_handover = agent_type == AgentType.HANDOVER or (
-                    sentiment_score is not None and sentiment_score <= 0.3
-                )
-
-                return RoutingResult(
-                    agent_type=agent_type,
-                    confidence=confidence,
-                    reason=reason,
-                    sentiment_score=sentiment_score,
-                    should_handover=should_handover,
+                return self._make_routing_result(
+                    result.get("agent_type", "faq_agent"),
+                    float(result.get("confidence", 0.7)),
+                    result.get("reason", "LLM路由決策"),
+                    sentiment_score,
                 )
 
+            ROUTING_FALLBACKS.inc(reason="no_json")
         except Exception as e:
             print(f"解析路由回應錯誤: {e}")
+            ROUTING_FALLBACKS.inc(reason="parse_error")
 
         # Go back to the FAQ
         return RoutingResult(
@@ -177,115 +397,603 @@ class LLMRouter:
             confidence=0.5,
             reason="解析失敗，使用預設路由",
             sentiment_score=sentiment_score,
+            tier="fallback",
+        )
+
+    @staticmethod
+    def _make_routing_result(
+        agent_type_str: str,
+        confidence: float,
+        reason: str,
+        sentiment_score: float | None,
+        tier: str = "llm",
+    ) -> RoutingResult:
+        try:
+            agent_type = AgentType(agent_type_str)
+        except ValueError:
+            agent_type = AgentType.FAQ  # default: FAQ
+            ROUTING_FALLBACKS.inc(reason="unknown_agent")
+
+        should_handover = agent_type == AgentType.HANDOVER or (
+            sentiment_score is not None and sentiment_score <= 0.3
+        )
+
+        return RoutingResult(
+            agent_type=agent_type,
+            confidence=confidence,
+            reason=reason,
+            sentiment_score=sentiment_score,
+            should_handover=should_handover,
+            tier=tier,
         )
 
 
+class AgentRegistry:
+    """Builds each agent (and its indexes) on first use and records the startup cost."""
+
+    def __init__(self, factories: dict[AgentType, Callable[[], AgentFactory]]):
+        self._factories = factories
+        self._agents: dict[AgentType, AgentFactory] = {}
+        self._lock = threading.Lock()
+        self.startup_times: dict[str, float] = {}
+
+    def __getitem__(self, agent_type: AgentType) -> AgentFactory:
+        agent = self._agents.get(agent_type)
+        if agent is not None:
+            return agent
+
+        with self._lock:
+            if agent_type not in self._agents:
+                start = time.perf_counter()
+                self._agents[agent_type] = self._factories[agent_type]()
+                self.startup_times[agent_type.value] = time.perf_counter() - start
+                print(
+                    f"🧩 {agent_type.value} 初始化完成 "
+                    f"({self.startup_times[agent_type.value]:.2f}s)"
+                )
+            return self._agents[agent_type]
+
+    def __iter__(self):
+        return iter(self._factories)
+
+    def __len__(self) -> int:
+        return len(self._factories)
+
+    def __contains__(self, agent_type: AgentType) -> bool:
+        return agent_type in self._factories
+
+    async def aget(self, agent_type: AgentType) -> AgentFactory:
+        # Building an agent is blocking work, keep it off the event loop
+        if agent_type in self._agents:
+            return self._agents[agent_type]
+        return await asyncio.to_thread(self.__getitem__, agent_type)
+
+    def loaded(self) -> dict[AgentType, AgentFactory]:
+        return dict(self._agents)
+
+    def preload(self) -> None:
+        for agent_type in self._factories:
+            self[agent_type]
+
+
 class OrchestratorAgent:
-    def __init__(self):
-        self.agents = {
-            AgentType.HANDOVER: HandoverAgent(),
-            AgentType.ORDER: OrderAgent(),
-            AgentType.FAQ: FAQAgent(),
-            AgentType.PRODUCT: ProductAgent(),
-            AgentType.REDIRECT: RedirectAgent(),
-        }
-        self.router = LLMRouter()
-        self.conversation_state = {agent_type: [] for agent_type in self.agents}
+    # Routes whose answers carry no personal data and may be served from the response cache
+    CACHEABLE_AGENTS = {AgentType.FAQ, AgentType.PRODUCT, AgentType.REDIRECT}
+    CACHE_SOURCE_PATHS = [
+        "data/raw/ai-eng-test-sample-knowledges.csv",
+        "data/raw/ai-eng-test-sample-products.csv",
+    ]
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        session_ttl: float | None = 3600,
+        lazy: bool = True,
+        use_response_cache: bool = True,
+        cache_similarity_threshold: float | None = 0.95,
+        fast_routing: bool = True,
+        intent_classifier_path: str | None = DEFAULT_MODEL_PATH,
+        routing_log_path: str | None = DEFAULT_ROUTING_LOG,
+    ):
+        self.startup_times: dict[str, float] = {}
+
+        start = time.perf_counter()
+        self.router = LLMRouter(
+            fast_router=FastRouter() if fast_routing else None,
+            # Only used once trained, see chatbot.agent.intent_classifier
+            intent_classifier=(
+                IntentClassifier.load(intent_classifier_path) if intent_classifier_path else None
+            ),
+            decision_log=RoutingDecisionLog(routing_log_path) if routing_log_path else None,
+        )
+        self.startup_times["router"] = time.perf_counter() - start
+
+        self.agents = AgentRegistry(
+            {
+                AgentType.HANDOVER: lambda: HandoverAgent(
+                    sentiment_tool=self.router.sentiment_tool
+                ),
+                AgentType.ORDER: OrderAgent,
+                AgentType.FAQ: FAQAgent,
+                AgentType.PRODUCT: ProductAgent,
+                AgentType.REDIRECT: RedirectAgent,
+            }
+        )
+        if not lazy:
+            self.agents.preload()
+
+        self.sessions = SessionManager(
+            max_sessions=max_sessions, ttl_seconds=session_ttl, on_evict=self._offload_session
+        )
+
+        self.response_cache = (
+            ResponseCache(
+                embeddings=model_pool.get_embeddings(),
+                similarity_threshold=cache_similarity_threshold,
+                source_paths=self.CACHE_SOURCE_PATHS,
+            )
+            if use_response_cache
+            else None
+        )
 
         print("🚀 OrchestratorAgent 初始化完成")
-        print(f"   已載入 {len(self.agents)} 個專門代理")
+        print(f"   已註冊 {len(self.agents)} 個專門代理, 已載入 {len(self.agents.loaded())} 個")
+
+    def startup_report(self) -> dict[str, float]:
+        """Seconds spent building each component so far (agents are built on first route)"""
+        return {**self.startup_times, **self.agents.startup_times}
+
+    def _get_session(
+        self, user_info: dict[str, Any], session_id: str | None, message: str
+    ) -> Session:
+        session = self.sessions.get(session_id or user_info.get("user_id"))
+        session.user_info.update(user_info)
+        # Each message is parsed once here, the router and every agent read this profile
+        session.user_info = update_profile(session.user_info, [message])
+        return session
+
+    def routing_stats(self) -> dict[str, float]:
+        return self.router.routing_stats()
+
+    def cache_stats(self) -> dict[str, float]:
+        return self.response_cache.stats.to_dict() if self.response_cache else {}
+
+    def _lookup_cache(self, message: str, session: Session) -> CacheLookup | None:
+        # Follow-up messages depend on earlier turns, only standalone first turns are cached
+        if not self.response_cache or session.conversation_state:
+            return None
+        # Agents put the session profile into their prompt, so the reply may be personalized
+        # (e.g. addressed by name) and must not be served to another user
+        if format_profile(session.user_info):
+            self.response_cache.bypass()
+            return None
+        return self.response_cache.get(message)
+
+    def _serve_cached(
+        self, message: str, session: Session, cache_lookup: CacheLookup
+    ) -> dict[str, Any]:
+        response = cache_lookup.response
+        agent_type = AgentType(response["agent_type"])
+        session.add_message(agent_type.value, message)
+        # Keep the agent's thread complete so follow-up questions still have context
+        agent = self.agents.loaded().get(agent_type)
+        if agent:
+            agent.record_turn(message, response["message"], session.thread_id(agent_type.value))
+        event("cache_hit", tier=cache_lookup.tier, agent_type=agent_type.value)
+        return {**response, "cached": cache_lookup.tier}
+
+    def _store_cache(
+        self,
+        message: str,
+        cache_lookup: CacheLookup | None,
+        routing_result: RoutingResult,
+        result: dict[str, Any],
+        latency: float,
+    ) -> None:
+        if cache_lookup is None or routing_result.agent_type not in self.CACHEABLE_AGENTS:
+            return
+        if routing_result.should_handover or not result.get("message"):
+            return
+        if result["message"].startswith(AGENT_ERROR_PREFIX):
+            return
+        self.response_cache.put(message, result, latency, embedding=cache_lookup.embedding)
+
+    def _offload_session(self, session: Session) -> None:
+        for agent_type, agent in self.agents.loaded().items():
+            if agent_type.value in session.conversation_state:
+                agent.release_thread(session.thread_id(agent_type.value))
+
+    @staticmethod
+    def _routing_info(routing_result: RoutingResult) -> dict[str, Any]:
+        return {
+            "agent_type": routing_result.agent_type.value,
+            "confidence": routing_result.confidence,
+            "reason": routing_result.reason,
+            "sentiment_score": routing_result.sentiment_score,
+            "should_handover": routing_result.should_handover,
+            "routing_tier": routing_result.tier,
+        }
+
+    @staticmethod
+    def _record_request(result: dict[str, Any], seconds: float) -> None:
+        agent_type = result.get("agent_type", "error")
+        REQUESTS.inc(agent_type=agent_type, cached=result.get("cached") or "none")
+        REQUEST_SECONDS.observe(seconds, agent_type=agent_type)
+        if result.get("should_handover"):
+            HANDOVERS.inc(tier=result.get("routing_tier", "llm"))
+
+    @classmethod
+    def _build_response(cls, response: str, routing_result: RoutingResult) -> dict[str, Any]:
+        return {"message": response, **cls._routing_info(routing_result)}
+
+    @staticmethod
+    def _build_error_response(e: Exception) -> dict[str, Any]:
+        return {
+            "message": f"抱歉, 處理您的請求時發生錯誤: {str(e)}",
+            "agent_type": "error",
+            "confidence": 0.0,
+            "reason": "系統錯誤",
+        }
 
     def route_and_execute(
-        self, message: str, user_info: dict[str, Any] = None, is_display: bool = None
+        self,
+        message: str,
+        user_info: dict[str, Any] = None,
+        is_display: bool = None,
+        session_id: str | None = None,
+    ) -> dict[str, Any]:
+        with span("turn") as current:
+            start = time.perf_counter()
+            result = self._route_and_execute(message, user_info, is_display, session_id)
+            self._record_request(result, time.perf_counter() - start)
+            current.set(agent_type=result.get("agent_type"), cached=result.get("cached", False))
+            return result
+
+    def _route_and_execute(
+        self,
+        message: str,
+        user_info: dict[str, Any] = None,
+        is_display: bool = None,
+        session_id: str | None = None,
     ) -> dict[str, Any]:
         user_info = user_info or {}
 
-        print(f"\n📨 收到訊息: {message}")
-        print(f"👤 用戶資訊: {user_info}")
+        event("message_received", chars=len(message), user_fields=sorted(user_info))
 
         try:
+            session = self._get_session(user_info, session_id, message)
+            start = time.perf_counter()
+
+            # 0. Answer repeated standalone questions straight from the response cache
+            cache_lookup = self._lookup_cache(message, session)
+            if cache_lookup and cache_lookup.response:
+                return self._serve_cached(message, session, cache_lookup)
+
             # 1. Use the LLM to determine which agent should we use
-            routing_result = self.router.route_message(message, user_info)
+            routing_result = self.router.route_message(message, session.user_info)
 
             # 2. Use that specific agent
             selected_agent = self.agents[routing_result.agent_type]
 
             # 3. Save the message history
-            self.conversation_state[routing_result.agent_type].append(message)
+            session.add_message(routing_result.agent_type.value, message)
 
             # 4. Excute the corresponding results
             response = self._execute_agent(
                 selected_agent,
                 routing_result.agent_type,
-                self.conversation_state,
+                session,
                 is_display,
                 routing_result,
             )
 
-            return {
-                "message": response,
-                "agent_type": routing_result.agent_type.value,
-                "confidence": routing_result.confidence,
-                "reason": routing_result.reason,
-                "sentiment_score": routing_result.sentiment_score,
-                "should_handover": routing_result.should_handover,
-            }
+            result = self._build_response(response, routing_result)
+            self._store_cache(
+                message, cache_lookup, routing_result, result, time.perf_counter() - start
+            )
+            return result
 
         except Exception as e:
             print(f"route_and_execute Error: {e}")
-            return {
-                "message": f"抱歉, 處理您的請求時發生錯誤: {str(e)}",
-                "agent_type": "error",
-                "confidence": 0.0,
-                "reason": "系統錯誤",
-            }
+            return self._build_error_response(e)
+
+    async def aroute_and_execute(
+        self,
+        message: str,
+        user_info: dict[str, Any] = None,
+        is_display: bool = None,
+        session_id: str | None = None,
+    ) -> dict[str, Any]:
+        with span("turn") as current:
+            start = time.perf_counter()
+            result = await self._aroute_and_execute(message, user_info, is_display, session_id)
+            self._record_request(result, time.perf_counter() - start)
+            current.set(agent_type=result.get("agent_type"), cached=result.get("cached", False))
+            return result
+
+    async def _aroute_and_execute(
+        self,
+        message: str,
+        user_info: dict[str, Any] = None,
+        is_display: bool = None,
+        session_id: str | None = None,
+    ) -> dict[str, Any]:
+        user_info = user_info or {}
+
+        event("message_received", chars=len(message), user_fields=sorted(user_info))
+
+        try:
+            session = self._get_session(user_info, session_id, message)
+            start = time.perf_counter()
+
+            cache_lookup = await asyncio.to_thread(self._lookup_cache, message, session)
+            if cache_lookup and cache_lookup.response:
+                return self._serve_cached(message, session, cache_lookup)
+
+            routing_result = await self.router.aroute_message(message, session.user_info)
+            selected_agent = await self.agents.aget(routing_result.agent_type)
+            session.add_message(routing_result.agent_type.value, message)
+
+            response = await self._aexecute_agent(
+                selected_agent,
+                routing_result.agent_type,
+                session,
+                is_display,
+                routing_result,
+            )
+
+            result = self._build_response(response, routing_result)
+            self._store_cache(
+                message, cache_lookup, routing_result, result, time.perf_counter() - start
+            )
+            return result
+
+        except Exception as e:
+            print(f"aroute_and_execute Error: {e}")
+            return self._build_error_response(e)
+
+    @staticmethod
+    def _agent_failure_message(agent_type: AgentType, e: Exception) -> str:
+        print(f"Streaming agent Error ({agent_type.value}): {e}")
+        if agent_type == AgentType.HANDOVER:
+            return "我們已記錄您的問題，客服將盡快與您聯繫。"
+        return f"{AGENT_ERROR_PREFIX} ({agent_type.value}): {e}"
+
+    @staticmethod
+    def _cached_events(result: dict[str, Any]) -> list[dict[str, Any]]:
+        routing = {k: v for k, v in result.items() if k != "message"}
+        return [
+            {"event": "route", "data": routing},
+            {"event": "token", "data": result["message"]},
+            {"event": "done", "data": result},
+        ]
+
+    def stream_route_and_execute(
+        self,
+        message: str,
+        user_info: dict[str, Any] = None,
+        session_id: str | None = None,
+    ) -> Iterator[dict[str, Any]]:
+        """Streaming version of route_and_execute.
+
+        Yields ``{"event": ..., "data": ...}`` dicts: one ``route`` event once the agent is
+        chosen, a ``token`` event per reply token and a final ``done`` event carrying the
+        same response dict route_and_execute returns.
+        """
+        user_info = user_info or {}
+
+        event("message_received", chars=len(message), user_fields=sorted(user_info))
+
+        start = time.perf_counter()
+        try:
+            session = self._get_session(user_info, session_id, message)
+
+            cache_lookup = self._lookup_cache(message, session)
+            if cache_lookup and cache_lookup.response:
+                cached = self._serve_cached(message, session, cache_lookup)
+                self._record_request(cached, time.perf_counter() - start)
+                yield from self._cached_events(cached)
+                return
+
+            routing_result = self.router.route_message(message, session.user_info)
+            yield {"event": "route", "data": self._routing_info(routing_result)}
+
+            agent_type = routing_result.agent_type
+            selected_agent = self.agents[agent_type]
+            session.add_message(agent_type.value, message)
+            thread_id = session.thread_id(agent_type.value)
+            if agent_type == AgentType.HANDOVER:
+                self._print_comfort_message(routing_result)
+
+            try:
+                for token in selected_agent.stream_conversation(
+                    message, thread_id, session.user_info
+                ):
+                    yield {"event": "token", "data": token}
+                response = selected_agent.last_reply(thread_id)
+            except Exception as e:
+                response = self._agent_failure_message(agent_type, e)
+                yield {"event": "token", "data": response}
+
+            result = self._build_response(response, routing_result)
+            self._store_cache(
+                message, cache_lookup, routing_result, result, time.perf_counter() - start
+            )
+            self._record_request(result, time.perf_counter() - start)
+            yield {"event": "done", "data": result}
+
+        except Exception as e:
+            print(f"stream_route_and_execute Error: {e}")
+            error_response = self._build_error_response(e)
+            self._record_request(error_response, time.perf_counter() - start)
+            yield {"event": "done", "data": error_response}
+
+    async def astream_route_and_execute(
+        self,
+        message: str,
+        user_info: dict[str, Any] = None,
+        session_id: str | None = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Async version of stream_route_and_execute"""
+        user_info = user_info or {}
+
+        event("message_received", chars=len(message), user_fields=sorted(user_info))
+
+        start = time.perf_counter()
+        try:
+            session = self._get_session(user_info, session_id, message)
+
+            cache_lookup = await asyncio.to_thread(self._lookup_cache, message, session)
+            if cache_lookup and cache_lookup.response:
+                cached = self._serve_cached(message, session, cache_lookup)
+                self._record_request(cached, time.perf_counter() - start)
+                for cached_event in self._cached_events(cached):
+                    yield cached_event
+                return
+
+            routing_result = await self.router.aroute_message(message, session.user_info)
+            yield {"event": "route", "data": self._routing_info(routing_result)}
+
+            agent_type = routing_result.agent_type
+            selected_agent = await self.agents.aget(agent_type)
+            session.add_message(agent_type.value, message)
+            thread_id = session.thread_id(agent_type.value)
+            if agent_type == AgentType.HANDOVER:
+                self._print_comfort_message(routing_result)
+
+            try:
+                async for token in selected_agent.astream_conversation(
+                    message, thread_id, session.user_info
+                ):
+                    yield {"event": "token", "data": token}
+                response = selected_agent.last_reply(thread_id)
+            except Exception as e:
+                response = self._agent_failure_message(agent_type, e)
+                yield {"event": "token", "data": response}
+
+            result = self._build_response(response, routing_result)
+            self._store_cache(
+                message, cache_lookup, routing_result, result, time.perf_counter() - start
+            )
+            self._record_request(result, time.perf_counter() - start)
+            yield {"event": "done", "data": result}
+
+        except Exception as e:
+            print(f"astream_route_and_execute Error: {e}")
+            error_response = self._build_error_response(e)
+            self._record_request(error_response, time.perf_counter() - start)
+            yield {"event": "done", "data": error_response}
 
     def _execute_agent(
         self,
         agent,
         agent_type: AgentType,
-        conversation_state: dict,
+        session: Session,
         is_display: bool,
         routing_result: RoutingResult,
     ) -> str:
         try:
-            match agent_type:
-                case AgentType.HANDOVER:
-                    return self._execute_handover_agent(
-                        agent, conversation_state[agent_type], is_display, routing_result
-                    )
+            with span("agent", agent=agent_type.value):
+                # Only the latest message is sent, earlier turns are in the agent's checkpointer
+                new_messages = session.conversation_state[agent_type.value][-1:]
+                thread_id = session.thread_id(agent_type.value)
+                user_info = session.user_info
+                match agent_type:
+                    case AgentType.HANDOVER:
+                        return self._execute_handover_agent(
+                            agent, new_messages, is_display, routing_result, thread_id, user_info
+                        )
+
+                    case AgentType.ORDER:
+                        return agent.run_conversation(
+                            new_messages, is_display, thread_id, user_info
+                        )
+
+                    case AgentType.FAQ:
+                        return agent.run_conversation(
+                            new_messages, is_display, thread_id, user_info
+                        )
+
+                    case AgentType.PRODUCT:
+                        return agent.run_conversation(
+                            new_messages, is_display, thread_id, user_info
+                        )
+
+                    case AgentType.REDIRECT:
+                        return agent.run_conversation(
+                            new_messages, is_display, thread_id, user_info
+                        )
+
+                    case _:
+                        return agent.run_conversation(
+                            new_messages, is_display, thread_id, user_info
+                        )
 
-                case AgentType.ORDER:
-                    return agent.run_conversation(conversation_state[agent_type], is_display)
-
-                case AgentType.FAQ:
-                    return agent.run_conversation(conversation_state[agent_type], is_display)
+        except Exception as e:
+            print(f"_execute_agent Error ({agent_type.value}): {e}")
+            return f"{AGENT_ERROR_PREFIX} ({agent_type.value}): {e}"
 
-                case AgentType.PRODUCT:
-                    return agent.run_conversation(conversation_state[agent_type], is_display)
+    async def _aexecute_agent(
+        self,
+        agent,
+        agent_type: AgentType,
+        session: Session,
+        is_display: bool,
+        routing_result: RoutingResult,
+    ) -> str:
+        try:
+            with span("agent", agent=agent_type.value):
+                new_messages = session.conversation_state[agent_type.value][-1:]
+                thread_id = session.thread_id(agent_type.value)
+                user_info = session.user_info
+                if agent_type == AgentType.HANDOVER:
+                    return await self._aexecute_handover_agent(
+                        agent, new_messages, is_display, routing_result, thread_id, user_info
+                    )
+                return await agent.arun_conversation(new_messages, is_display, thread_id, user_info)
 
-                case AgentType.REDIRECT:
-                    return agent.run_conversation(conversation_state[agent_type], is_display)
+        except Exception as e:
+            print(f"_aexecute_agent Error ({agent_type.value}): {e}")
+            return f"{AGENT_ERROR_PREFIX} ({agent_type.value}): {e}"
 
-                case _:
-                    return agent.run_conversation(conversation_state[agent_type], is_display)
+    @staticmethod
+    def _print_comfort_message(routing_result: RoutingResult) -> None:
+        if routing_result.should_handover and routing_result.sentiment_score:
+            comfort_message = f"""我理解您現在可能感到不滿，非常抱歉造成您的困擾
+            情緒分析: {routing_result.sentiment_score:.2f} / 1.0
+            {routing_result.reason}
 
-        except Exception as e:
-            print(f"_execute_agent Error ({agent_type.value}): {e}")
-            return f"Agent Excuting Error ({agent_type.value}): {e}"
+            讓我來幫助您解決這個問題"""
+            print(comfort_message)
 
     def _execute_handover_agent(
-        self, agent, message: str, is_display: bool, routing_result: RoutingResult
+        self,
+        agent,
+        messages: list[str],
+        is_display: bool,
+        routing_result: RoutingResult,
+        thread_id: str | None = None,
+        user_info: dict[str, Any] | None = None,
     ) -> str:
         try:
-            if routing_result.should_handover and routing_result.sentiment_score:
-                comfort_message = f"""我理解您現在可能感到不滿，非常抱歉造成您的困擾
-                情緒分析: {routing_result.sentiment_score:.2f} / 1.0
-                {routing_result.reason}
-
-                讓我來幫助您解決這個問題"""
-                print(comfort_message)
-            return agent.run_conversation(message, is_display)
+            self._print_comfort_message(routing_result)
+            return agent.run_conversation(messages, is_display, thread_id, user_info)
         except Exception as e:
             print(f"_execute_handover_agent Error: {e}")
             return "我們已記錄您的問題，客服將盡快與您聯繫。"
+
+    async def _aexecute_handover_agent(
+        self,
+        agent,
+        messages: list[str],
+        is_display: bool,
+        routing_result: RoutingResult,
+        thread_id: str | None = None,
+        user_info: dict[str, Any] | None = None,
+    ) -> str:
+        try:
+            self._print_comfort_message(routing_result)
+            return await agent.arun_conversation(messages, is_display, thread_id, user_info)
+        except Exception as e:
+            print(f"_aexecute_handover_agent Error: {e}")
+            return "我們已記錄您的問題，客服將盡快與您聯繫。"
@@ -1,9 +1,7 @@
 from dataclasses import dataclass, field
 from typing import Literal
 
-from langchain.chat_models import init_chat_model
 from langchain_core.language_models.chat_models import BaseChatModel
-from langchain_core.messages import HumanMessage, SystemMessage
 from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.checkpoint.memory import InMemorySaver
 from langgraph.checkpoint.postgres import PostgresSaver
@@ -15,6 +13,8 @@ from chatbot.agent.agent_factory import AgentFactory, GenericAgentState
 from chatbot.tool.base_tool import ToolManager
 from chatbot.tool.order_tool import OrderSearchTool, RequirementCheckerTool
 from chatbot.utils.load_env import get_openai_api_key
+from chatbot.utils.model_pool import model_pool
+from chatbot.utils.tracing import event
 from chatbot.utils.vector_db import VecDBManager
 
 
@@ -33,6 +33,25 @@ class Config:
 
 
 class OrderAgent(AgentFactory):
+    SYSTEM_PROMPT = """
+        你是一個訂單查詢助理。
+
+        工作流程：
+        1. 若缺少必要資訊，請使用 RequirementCheckerTool 判斷缺哪些欄位。
+        - 缺少 user_id → 引導使用者提供 user_id
+        - 缺少 order_id → 在 user_id 已確認後，引導使用者提供 order_id
+        2. 當 user_id 已提供 → 使用 OrderSearchTool 查詢該用戶的訂單列表，讓使用者選擇目標訂單
+        3. 當 order_id 已確認 → 使用 OrderSearchTool 查詢訂單詳情
+        - 包含：訂單狀態、物流追蹤號、預估到貨、購買品項
+        4. 當查不到資料或資訊不完整時 → 請明確告知「需要的下一步」（例如：請確認 user_id 或提供正確的 order_id, 或轉接真人客服）。
+
+        回覆內容：
+        - 先直答使用者的問題
+        - 引導補足缺失資訊（若有）
+        - 訂單查詢結果要條列清楚（狀態、物流、品項）
+        - 最後可以補一句「如需進一步協助，我們也能轉接真人客服」
+        """
+
     def __init__(self):
         super().__init__()
         self.config = Config()
@@ -62,89 +81,13 @@ class OrderAgent(AgentFactory):
 
     def get_llm(self) -> BaseChatModel:
         tools = self.tool_manager.get_langchain_tools()
-        return init_chat_model(
+        return model_pool.get_chat_model(
             model=self.config.model,
             model_provider=self.config.model_provider,
-            api_key=self.api_key,
             temperature=self.config.temperature,
             max_tokens=self.config.max_token,
         ).bind_tools(tools)
 
-    def extract_user_info(self, state: GenericAgentState):
-        """This is just a simple user information extraction"""
-        user_info = state.get("user_info", {})
-
-        for message in state["messages"]:
-            if isinstance(message, HumanMessage):
-                content = message.content.lower()
-                if "my name is" in content or "i'm" in content:
-                    # Get the user name
-                    words = content.split()
-                    for i, word in enumerate(words):
-                        if word in ["i'm", "name", "is"] and i + 1 < len(words):
-                            name = words[i + 1].strip(",.!")
-                            if name.isalpha():
-                                user_info["name"] = name
-
-                if "live in" in content or "from" in content:
-                    # Get the location
-                    if "live in" in content:
-                        location = content.split("live in")[-1].strip(",.!")
-                    elif "from" in content:
-                        location = content.split("from")[-1].strip(",.!")
-                    user_info["location"] = location.strip()
-
-        print(f"📝 UPDATED USER INFO: {user_info}")
-        return {"user_info": user_info}
-
-    def agent_node(self, state: GenericAgentState) -> GenericAgentState:
-        """Main agent reasoning node"""
-        print("🤖 AGENT THINKING...")
-
-        user_info = state.get("user_info", {})
-        user_context = ""
-        if user_info:
-            name = user_info.get("name", "")
-            location = user_info.get("location", "")
-            uid = user_info.get("user_id", "")
-            if name or location or uid:
-                user_context = f"\n用戶資訊: 姓名: {name}, 地點: {location}, user_id: {uid}"
-
-        tool_descriptions = self.tool_manager.get_tool_descriptions()
-        missing_example = {"missing": ["螢幕尺寸", "桌板厚度"]}
-
-        system_msg = SystemMessage(
-            content="""
-        你是一個訂單查詢助理。
-
-        工作流程：
-        1. 若缺少必要資訊，請使用 RequirementCheckerTool 判斷缺哪些欄位。
-        - 缺少 user_id → 引導使用者提供 user_id
-        - 缺少 order_id → 在 user_id 已確認後，引導使用者提供 order_id
-        2. 當 user_id 已提供 → 使用 OrderSearchTool 查詢該用戶的訂單列表，讓使用者選擇目標訂單
-        3. 當 order_id 已確認 → 使用 OrderSearchTool 查詢訂單詳情
-        - 包含：訂單狀態、物流追蹤號、預估到貨、購買品項
-        4. 當查不到資料或資訊不完整時 → 請明確告知「需要的下一步」（例如：請確認 user_id 或提供正確的 order_id, 或轉接真人客服）。
-
-        回覆內容：
-        - 先直答使用者的問題
-        - 引導補足缺失資訊（若有）
-        - 訂單查詢結果要條列清楚（狀態、物流、品項）
-        - 最後可以補一句「如需進一步協助，我們也能轉接真人客服」
-        """
-        )
-        messages = [system_msg] + state["messages"]
-        response = self.model.invoke(messages)
-
-        print(f"💭 AGENT RESPONSE: {response.content}")
-        if response.tool_calls:
-            print(f"🛠️  TOOLS TO CALL: {[tc['name'] for tc in response.tool_calls]}")
-
-        return {
-            "messages": [response],
-            "user_info": state.get("user_info", {}),
-        }
-
     def should_continue(self, state: GenericAgentState) -> Literal["tools", "end"]:
         if not state["messages"]:
             return "end"
@@ -152,17 +95,17 @@ class OrderAgent(AgentFactory):
         last_message = state["messages"][-1]
 
         if hasattr(last_message, "tool_calls") and last_message.tool_calls:
-            print("➡️  繼續執行工具")
+            event("should_continue", agent=type(self).__name__, next="tools")
             return "tools"
 
-        print("✅ 結束對話")
+        event("should_continue", agent=type(self).__name__, next="end")
         return "end"
 
     def create_agent_graph(self) -> StateGraph:
         graph = StateGraph(GenericAgentState)
 
         graph.add_node("extract_user_info", self.extract_user_info)
-        graph.add_node("agent", self.agent_node)
+        graph.add_node("agent", self.get_agent_node())
         graph.add_node("tools", ToolNode(self.tool_manager.get_langchain_tools()))
 
         graph.set_entry_point("extract_user_info")
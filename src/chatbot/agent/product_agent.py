@@ -1,9 +1,7 @@
 from dataclasses import dataclass, field
 from typing import Literal
 
-from langchain.chat_models import init_chat_model
 from langchain_core.language_models.chat_models import BaseChatModel
-from langchain_core.messages import HumanMessage, SystemMessage
 from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.checkpoint.memory import InMemorySaver
 from langgraph.checkpoint.postgres import PostgresSaver
@@ -13,8 +11,14 @@ from langgraph.prebuilt import ToolNode
 
 from chatbot.agent.agent_factory import AgentFactory, GenericAgentState
 from chatbot.tool.base_tool import ToolManager
-from chatbot.tool.product_tool import ProductSearchTool, RequirementCheckerTool
+from chatbot.tool.product_tool import (
+    CompatibilityCheckTool,
+    ProductSearchTool,
+    RequirementCheckerTool,
+)
 from chatbot.utils.load_env import get_openai_api_key
+from chatbot.utils.model_pool import model_pool
+from chatbot.utils.tracing import event
 from chatbot.utils.vector_db import VecDBManager
 
 
@@ -33,6 +37,24 @@ class Config:
 
 
 class ProductAgent(AgentFactory):
+    SYSTEM_PROMPT = """
+        你是一個品牌智能助理。
+
+        相容性問題（螢幕尺寸、重量、VESA、桌板厚度，例如「我的 27 吋螢幕裝得上嗎」）：
+        1. 直接使用工具 compatibility_check，一次取得相容的 SKU 與原因
+        2. 依 compatible 與 incompatible 的原因回答；若沒有相容商品但 missing 不為空，先追問缺少的欄位
+
+        其他使用者輸入可能缺少資訊時：
+        1. 使用工具 check_missing(query) 回傳缺少的欄位
+        2. 若 missing 不為空，先回覆追問訊息
+        3. 若 missing 為空，再使用 ProductSearchTool
+
+        回覆內容：
+        1. 針對使用者需求提供可行的產品建議
+        2. 解釋關鍵依據（如規格相容、使用情境吻合），附商品頁連結與圖片
+        3. 最後可加一句品牌介紹, 簡短即可, 例如: 'JTCG Shop 提供專業桌面配件，讓專注更持久'
+        """
+
     def __init__(self):
         super().__init__()
         self.config = Config()
@@ -46,6 +68,7 @@ class ProductAgent(AgentFactory):
     def _setup_tools(self):
         self.tool_manager.register_tool(RequirementCheckerTool())
         self.tool_manager.register_tool(ProductSearchTool(self.vec_db_manager))
+        self.tool_manager.register_tool(CompatibilityCheckTool())
 
         print(f"🔧 Total registered tool number: {len(self.tool_manager.tools)}.")
 
@@ -62,83 +85,13 @@ class ProductAgent(AgentFactory):
 
     def get_llm(self) -> BaseChatModel:
         tools = self.tool_manager.get_langchain_tools()
-        return init_chat_model(
+        return model_pool.get_chat_model(
             model=self.config.model,
             model_provider=self.config.model_provider,
-            api_key=self.api_key,
             temperature=self.config.temperature,
             max_tokens=self.config.max_token,
         ).bind_tools(tools)
 
-    def extract_user_info(self, state: GenericAgentState):
-        """This is just a simple user information extraction"""
-        user_info = state.get("user_info", {})
-
-        for message in state["messages"]:
-            if isinstance(message, HumanMessage):
-                content = message.content.lower()
-                if "my name is" in content or "i'm" in content:
-                    # Get the user name
-                    words = content.split()
-                    for i, word in enumerate(words):
-                        if word in ["i'm", "name", "is"] and i + 1 < len(words):
-                            name = words[i + 1].strip(",.!")
-                            if name.isalpha():
-                                user_info["name"] = name
-
-                if "live in" in content or "from" in content:
-                    # Get the location
-                    if "live in" in content:
-                        location = content.split("live in")[-1].strip(",.!")
-                    elif "from" in content:
-                        location = content.split("from")[-1].strip(",.!")
-                    user_info["location"] = location.strip()
-
-        print(f"📝 UPDATED USER INFO: {user_info}")
-        return {"user_info": user_info}
-
-    def agent_node(self, state: GenericAgentState) -> GenericAgentState:
-        """Main agent reasoning node"""
-        print("🤖 AGENT THINKING...")
-
-        user_info = state.get("user_info", {})
-        user_context = ""
-        if user_info:
-            name = user_info.get("name", "")
-            location = user_info.get("location", "")
-            if name or location:
-                user_context = f"\n用戶資訊: 姓名: {name}, 地點: {location}"
-
-        tool_descriptions = self.tool_manager.get_tool_descriptions()
-        missing_example = {"missing": ["螢幕尺寸", "桌板厚度"]}
-
-        system_msg = SystemMessage(
-            content="""
-        你是一個品牌智能助理。
-
-        使用者輸入可能缺少資訊時：
-        1. 使用工具 check_missing(query) 回傳缺少的欄位
-        2. 若 missing 不為空，先回覆追問訊息
-        3. 若 missing 為空，再使用 ProductSearchTool
-
-        回覆內容：
-        1. 針對使用者需求提供可行的產品建議
-        2. 解釋關鍵依據（如規格相容、使用情境吻合），附商品頁連結與圖片
-        3. 最後可加一句品牌介紹, 簡短即可, 例如: 'JTCG Shop 提供專業桌面配件，讓專注更持久'
-        """
-        )
-        messages = [system_msg] + state["messages"]
-        response = self.model.invoke(messages)
-
-        print(f"💭 AGENT RESPONSE: {response.content}")
-        if response.tool_calls:
-            print(f"🛠️  TOOLS TO CALL: {[tc['name'] for tc in response.tool_calls]}")
-
-        return {
-            "messages": [response],
-            "user_info": state.get("user_info", {}),
-        }
-
     def should_continue(self, state: GenericAgentState) -> Literal["tools", "end"]:
         if not state["messages"]:
             return "end"
@@ -146,17 +99,17 @@ class ProductAgent(AgentFactory):
         last_message = state["messages"][-1]
 
         if hasattr(last_message, "tool_calls") and last_message.tool_calls:
-            print("➡️  繼續執行工具")
+            event("should_continue", agent=type(self).__name__, next="tools")
             return "tools"
 
-        print("✅ 結束對話")
+        event("should_continue", agent=type(self).__name__, next="end")
         return "end"
 
     def create_agent_graph(self) -> StateGraph:
         graph = StateGraph(GenericAgentState)
 
         graph.add_node("extract_user_info", self.extract_user_info)
-        graph.add_node("agent", self.agent_node)
+        graph.add_node("agent", self.get_agent_node())
         graph.add_node("tools", ToolNode(self.tool_manager.get_langchain_tools()))
 
         graph.set_entry_point("extract_user_info")
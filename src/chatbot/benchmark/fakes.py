@@ -0,0 +1,215 @@
+import asyncio
+import hashlib
+import json
+import re
+import time
+from collections import defaultdict
+from collections.abc import AsyncIterator, Iterator
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    HumanMessage,
+    ToolMessage,
+)
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import Field
+
+
+class FakeChatModel(BaseChatModel):
+    """Offline chat model that answers with a fixed reply and counts its calls."""
+
+    reply: str = "好的，這是測試回覆。"
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        self.calls += 1
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.reply))])
+
+    def bind_tools(self, tools: list, **kwargs: Any) -> "FakeChatModel":
+        return self
+
+
+@dataclass
+class TurnUsage:
+    """LLM usage and stage timings collected for one replayed user turn."""
+
+    latency: float = 0.0
+    llm_calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    stages: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))
+
+
+current_turn: ContextVar[TurnUsage | None] = ContextVar("current_turn", default=None)
+
+_CJK_PATTERN = re.compile(r"[\u3000-\u9fff\uff00-\uffef]")
+
+
+def estimate_tokens(text: str) -> int:
+    # Roughly one token per CJK character and per four other characters
+    cjk = len(_CJK_PATTERN.findall(text))
+    return max(1, cjk + (len(text) - cjk) // 4)
+
+
+NEGATIVE_KEYWORDS = ["煩", "爛", "生氣", "抱怨", "失望", "垃圾", "投訴", "不爽"]
+ROUTE_KEYWORDS = {
+    "handover_agent": ["真人", "human", "客訴", "轉接"],
+    "order_agent": ["訂單", "order", "u_", "JTCG-20", "物流", "追蹤", "track", "到貨"],
+    "product_agent": ["吋", "vesa", "臂", "支架", "kg", "公斤", "推薦", "相容", "桌板", "托盤"],
+    "redirect_agent": ["其他品牌", "天氣", "股票", "電影", "iphone"],
+}
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Deterministic offline stand-in for every LLM call in the pipeline.
+
+    It recognises the sentiment and routing prompts and answers them with keyword rules,
+    and when used as an agent model it calls the first bound tool once before replying.
+    ``latency`` simulates provider round-trip time.
+    """
+
+    latency: float = 0.0
+    chunk_size: int = 4  # characters per streamed chunk
+    tool_args: dict[str, str] = Field(default_factory=dict)
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake-chat"
+
+    def bind_tools(self, tools: list, **kwargs: Any) -> "ScriptedChatModel":
+        tool_args = {tool.name: next(iter(tool.args), "query") for tool in tools}
+        return self.model_copy(update={"tool_args": tool_args})
+
+    def _respond(self, messages: list[BaseMessage]) -> AIMessage:
+        last = messages[-1]
+        content = str(last.content)
+
+        if "評估情緒" in content:
+            text = content.rsplit("訊息:", 1)[-1]
+            score = 0.2 if any(k in text for k in NEGATIVE_KEYWORDS) else 0.7
+            return AIMessage(content=json.dumps({"score": score, "reason": "scripted"}))
+
+        if "路由系統" in content:
+            match = re.search(r'用戶訊息: "(.*)"', content)
+            text = (match.group(1) if match else content).lower()
+            agent_type = next(
+                (name for name, keys in ROUTE_KEYWORDS.items() if any(k in text for k in keys)),
+                "faq_agent",
+            )
+            return AIMessage(
+                content=json.dumps(
+                    {"agent_type": agent_type, "confidence": 0.9, "reason": "scripted"}
+                )
+            )
+
+        if isinstance(last, HumanMessage) and self.tool_args:
+            tool_name, arg_name = next(iter(self.tool_args.items()))
+            call_id = hashlib.md5(content.encode()).hexdigest()[:12]
+            return AIMessage(
+                content="",
+                tool_calls=[{"name": tool_name, "args": {arg_name: content}, "id": call_id}],
+            )
+        if isinstance(last, ToolMessage):
+            return AIMessage(content=f"根據查詢結果為您整理如下：{content[:120]}")
+        return AIMessage(content="好的，這是測試回覆。")
+
+    def _build_result(self, messages: list[BaseMessage]) -> ChatResult:
+        message = self._respond(messages)
+        input_tokens = sum(estimate_tokens(str(m.content)) for m in messages)
+        output_tokens = estimate_tokens(str(message.content) or json.dumps(message.tool_calls))
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+
+        usage = current_turn.get()
+        if usage is not None:
+            usage.llm_calls += 1
+            usage.input_tokens += input_tokens
+            usage.output_tokens += output_tokens
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._build_result(messages)
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._build_result(messages)
+
+    def _chunks(self, messages: list[BaseMessage]) -> Iterator[ChatGenerationChunk]:
+        message = self._build_result(messages).generations[0].message
+        if message.tool_calls:
+            tool_call_chunks = [
+                {"name": tc["name"], "args": json.dumps(tc["args"]), "id": tc["id"], "index": i}
+                for i, tc in enumerate(message.tool_calls)
+            ]
+            pieces = [AIMessageChunk(content="", tool_call_chunks=tool_call_chunks)]
+        else:
+            text = str(message.content)
+            pieces = [
+                AIMessageChunk(content=text[i : i + self.chunk_size])
+                for i in range(0, len(text), self.chunk_size)
+            ] or [AIMessageChunk(content="")]
+        pieces[-1].usage_metadata = message.usage_metadata
+        for piece in pieces:
+            yield ChatGenerationChunk(message=piece)
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        if self.latency:
+            time.sleep(self.latency)
+        for chunk in self._chunks(messages):
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        for chunk in self._chunks(messages):
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
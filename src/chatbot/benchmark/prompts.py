@@ -0,0 +1,78 @@
+"""Prompt token report per agent.
+
+Shows how many input tokens of every agent call are the static, cacheable part (system
+prompt prefix and tool schemas) and how many are per-turn user context and history, and
+compares one call late in a long conversation with what it cost when the prompt was
+rendered again and the whole history replayed. Run with
+``python -m chatbot.benchmark.prompts``, no network is needed.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from chatbot.benchmark.replay import use_fake_models
+
+
+def sample_conversation(turns: int = 10) -> list:
+    """Turns of question, tool call, bulky tool output and answer"""
+    messages = []
+    for turn in range(turns):
+        call_id = f"call_{turn}"
+        order = {"order_id": f"JTCG-202508-{10000 + turn}", "items": ["螢幕支架"] * 20}
+        messages += [
+            HumanMessage(content=f"我的訂單 {turn} 出貨了嗎？", id=f"h{turn}"),
+            AIMessage(
+                content="",
+                tool_calls=[{"name": "order_search", "args": {}, "id": call_id}],
+                id=f"a{turn}",
+            ),
+            ToolMessage(
+                content=json.dumps(order, ensure_ascii=False) * 10,
+                tool_call_id=call_id,
+                id=f"t{turn}",
+            ),
+            AIMessage(content=f"訂單 {turn} 已於今日出貨，預計兩天內送達。", id=f"r{turn}"),
+        ]
+    return messages
+
+
+SAMPLE_STATES = [
+    {"messages": [], "user_info": {}},
+    {"messages": sample_conversation(), "user_info": {"name": "dan", "user_id": "u_123456"}},
+]
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description="Prompt token report per agent")
+    arg_parser.add_argument("--output", "-o", type=str, help="Write the JSON report here")
+    args = arg_parser.parse_args()
+
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    use_fake_models(0.0)
+
+    from chatbot.agent.orchestrator_agent import OrchestratorAgent
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        orchestrator = OrchestratorAgent(lazy=False, routing_log_path=None)
+
+    report = {}
+    for agent_type, agent in orchestrator.agents.loaded().items():
+        prefixes = {agent.get_system_messages(state)[0].content for state in SAMPLE_STATES}
+        report[agent_type.value] = {
+            **agent.prompt_token_report(SAMPLE_STATES[-1]),
+            "prefix_identical_across_turns": len(prefixes) == 1,
+        }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Replay the sample conversation corpus through the chatbot, fully offline.
+
+Every LLM call goes to ``ScriptedChatModel`` and every embedding to a deterministic fake,
+so the numbers measure our own pipeline overhead plus the simulated ``--llm-latency``.
+
+    python -m chatbot.benchmark.replay --concurrency 16 --output bench.json
+    python -m chatbot.benchmark.replay --baseline bench.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import time
+from typing import Any
+
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from chatbot.benchmark.fakes import ScriptedChatModel, TurnUsage, current_turn
+from chatbot.utils import tracing
+from chatbot.utils.model_pool import model_pool
+
+DEFAULT_CORPUS = "data/raw/ai-eng-test-sample-conversations.json"
+
+
+def load_corpus(path: str, limit: int | None = None) -> list[list[str]]:
+    """User turns of each conversation, assistant turns are produced by the bot itself"""
+    with open(path, encoding="utf-8") as f:
+        conversations = json.load(f)
+
+    corpus = []
+    for conversation in conversations[:limit]:
+        turns = [
+            part["text"]
+            for message in conversation
+            if message["role"] == "user"
+            for part in message["content"]
+            if part.get("type") == "text"
+        ]
+        if turns:
+            corpus.append(turns)
+    return corpus
+
+
+def summarize(values: list[float]) -> dict[str, float]:
+    if not values:
+        return {"count": 0}
+    array = np.asarray(values, dtype=float)
+    p50, p95, p99 = np.percentile(array, [50, 95, 99])
+    return {
+        "count": int(array.size),
+        "mean": float(array.mean()),
+        "p50": float(p50),
+        "p95": float(p95),
+        "p99": float(p99),
+        "max": float(array.max()),
+    }
+
+
+def record_stage(span: tracing.Span) -> None:
+    usage = current_turn.get()
+    if usage is None or span.kind == "event":
+        return
+    label = span.attributes.get("tool") or span.attributes.get("agent")
+    usage.stages[f"{span.name}:{label}" if label else span.name].append(span.duration)
+
+
+def use_fake_models(llm_latency: float) -> None:
+    model_pool.set_chat_model_factory(lambda **kwargs: ScriptedChatModel(latency=llm_latency))
+    model_pool.set_embeddings_factory(lambda model: DeterministicFakeEmbedding(size=256))
+
+
+async def replay(chatbot, corpus: list[list[str]], concurrency: int) -> list[TurnUsage]:
+    semaphore = asyncio.Semaphore(concurrency)
+    results: list[TurnUsage] = []
+
+    async def replay_conversation(index: int, turns: list[str]) -> None:
+        async with semaphore:
+            for text in turns:
+                usage = TurnUsage()
+                token = current_turn.set(usage)
+                start = time.perf_counter()
+                try:
+                    await chatbot.aprocess_single_user_message(text, session_id=f"replay-{index}")
+                finally:
+                    usage.latency = time.perf_counter() - start
+                    current_turn.reset(token)
+                results.append(usage)
+
+    await asyncio.gather(*(replay_conversation(i, turns) for i, turns in enumerate(corpus)))
+    return results
+
+
+def build_report(
+    results: list[TurnUsage], wall_seconds: float, settings: dict[str, Any]
+) -> dict[str, Any]:
+    stage_names = sorted({name for usage in results for name in usage.stages})
+    return {
+        "settings": settings,
+        "turns": len(results),
+        "wall_seconds": wall_seconds,
+        "throughput_turns_per_second": len(results) / wall_seconds if wall_seconds else 0.0,
+        "turn_latency": summarize([usage.latency for usage in results]),
+        "stages": {
+            name: summarize([d for usage in results for d in usage.stages.get(name, [])])
+            for name in stage_names
+        },
+        "llm_calls_per_turn": summarize([usage.llm_calls for usage in results]),
+        "input_tokens_per_turn": summarize([usage.input_tokens for usage in results]),
+        "output_tokens_per_turn": summarize([usage.output_tokens for usage in results]),
+    }
+
+
+def compare(report: dict[str, Any], baseline: dict[str, Any]) -> None:
+    print(f"{'metric':<40} {'baseline':>12} {'current':>12} {'change':>9}")
+    rows = [("throughput_turns_per_second", None)] + [
+        (section, key)
+        for section in ["turn_latency", "llm_calls_per_turn", "input_tokens_per_turn"]
+        for key in ["p50", "p95", "p99"]
+    ]
+    for section, key in rows:
+        before = baseline.get(section, {}) if key else baseline.get(section)
+        after = report.get(section, {}) if key else report.get(section)
+        if key:
+            before, after = before.get(key), after.get(key)
+        if before is None or after is None:
+            continue
+        change = (after - before) / before * 100 if before else 0.0
+        name = f"{section}.{key}" if key else section
+        print(f"{name:<40} {before:>12.4f} {after:>12.4f} {change:>8.1f}%")
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description="Offline replay benchmark of the chatbot")
+    arg_parser.add_argument("--corpus", type=str, default=DEFAULT_CORPUS)
+    arg_parser.add_argument("--limit", type=int, default=None, help="Replay the first N only")
+    arg_parser.add_argument("--concurrency", "-c", type=int, default=8)
+    arg_parser.add_argument(
+        "--llm-latency", type=float, default=0.0, help="Simulated seconds per LLM call"
+    )
+    arg_parser.add_argument("--cache", action="store_true", help="Enable the response cache")
+    arg_parser.add_argument(
+        "--no-fast-routing", action="store_true", help="Route every turn with the LLM"
+    )
+    arg_parser.add_argument("--output", "-o", type=str, help="Write the JSON report here")
+    arg_parser.add_argument("--baseline", "-b", type=str, help="JSON report to compare with")
+    arg_parser.add_argument("--verbose", "-v", action="store_true", help="Keep pipeline logs")
+    args = arg_parser.parse_args()
+
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    use_fake_models(args.llm_latency)
+    tracing.add_sink(record_stage)
+
+    from chatbot.main import Chatbot
+
+    corpus = load_corpus(args.corpus, args.limit)
+    logs = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with logs:
+        # Decisions of the scripted models are not training labels, keep them out of the log
+        chatbot = Chatbot(
+            use_response_cache=args.cache,
+            lazy=False,
+            fast_routing=not args.no_fast_routing,
+            routing_log_path=None,
+        )
+        start = time.perf_counter()
+        results = asyncio.run(replay(chatbot, corpus, args.concurrency))
+        wall_seconds = time.perf_counter() - start
+
+    settings = {
+        "corpus": args.corpus,
+        "conversations": len(corpus),
+        "concurrency": args.concurrency,
+        "llm_latency": args.llm_latency,
+        "response_cache": args.cache,
+        "fast_routing": not args.no_fast_routing,
+    }
+    report = build_report(results, wall_seconds, settings)
+    report["routing"] = chatbot.orchestrator.routing_stats()
+    report["query_embedding_cache"] = model_pool.query_cache_stats()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            compare(report, json.load(f))
+    elif not args.output:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Evaluate the pre-LLM routing tiers against the conversation corpus.
+
+Every user turn of the corpus goes through ``FastRouter``, then through the trained
+``IntentClassifier`` when the rules abstain. The report shows how many turns each tier
+answers, how fast, and, given reference labels, how often it agrees with them. The
+classifier is trained partly on the rules' own labels of this corpus, so its accuracy
+is only meaningful against independent labels such as ``--reference llm``.
+
+Reference labels are JSONL lines ``{"message": ..., "agent_type": ...}``. They can be
+produced once with the routing LLM and reused offline afterwards:
+
+    python -m chatbot.benchmark.routing --reference llm --save-labels data/routing_labels.jsonl
+    python -m chatbot.benchmark.routing --labels data/routing_labels.jsonl
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Any
+
+from chatbot.agent.fast_router import FastRouter
+from chatbot.agent.intent_classifier import DEFAULT_MODEL_PATH, IntentClassifier
+from chatbot.benchmark.replay import DEFAULT_CORPUS, load_corpus, summarize
+
+
+def load_labels(path: str) -> dict[str, str]:
+    labels = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                labels[record["message"]] = record["agent_type"]
+    return labels
+
+
+def save_labels(path: str, labels: dict[str, str]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        for message, agent_type in labels.items():
+            f.write(json.dumps({"message": message, "agent_type": agent_type}, ensure_ascii=False))
+            f.write("\n")
+
+
+def label_with_llm(messages: list[str]) -> dict[str, str]:
+    """Reference labels from the routing LLM alone, without the rule tier"""
+    from chatbot.agent.orchestrator_agent import LLMRouter
+
+    router = LLMRouter(concurrent=False)
+    labels = {}
+    for message in messages:
+        response = router._invoke_router(message, {})
+        labels[message] = router._parse_routing_response(response.content, None).agent_type.value
+    return labels
+
+
+def evaluate(
+    fast_router: FastRouter,
+    messages: list[str],
+    labels: dict[str, str],
+    intent_classifier: IntentClassifier | None = None,
+) -> dict[str, Any]:
+    tiers: Counter[str] = Counter()
+    correct: Counter[str] = Counter()
+    labelled: Counter[str] = Counter()
+    latencies: list[float] = []
+    classifier_latencies: list[float] = []
+    mistakes: Counter[tuple[str, str]] = Counter()
+    examples: dict[tuple[str, str], str] = {}
+    per_agent: dict[str, Counter[str]] = defaultdict(Counter)
+
+    for message in messages:
+        start = time.perf_counter()
+        fast_route = fast_router.route(message)
+        latencies.append((time.perf_counter() - start) * 1e6)
+
+        agent_type, tier = (fast_route.agent_type, fast_route.tier) if fast_route else (None, "llm")
+        if fast_route is None and intent_classifier is not None:
+            start = time.perf_counter()
+            prediction = intent_classifier.classify(message)
+            classifier_latencies.append((time.perf_counter() - start) * 1e6)
+            if prediction:
+                agent_type, tier = prediction.agent_type, "classifier"
+
+        tiers[tier] += 1
+        if agent_type is None or message not in labels:
+            continue
+
+        expected = labels[message]
+        labelled[tier] += 1
+        per_agent[expected]["labelled"] += 1
+        if agent_type == expected:
+            correct[tier] += 1
+            per_agent[expected]["correct"] += 1
+        else:
+            mistakes[(expected, agent_type)] += 1
+            examples.setdefault((expected, agent_type), message)
+
+    total = len(messages)
+    return {
+        "messages": total,
+        "tiers": {
+            tier: {
+                "count": count,
+                "hit_rate": count / total if total else 0.0,
+                "accuracy": correct[tier] / labelled[tier] if labelled[tier] else None,
+                "labelled": labelled[tier],
+            }
+            for tier, count in sorted(tiers.items())
+        },
+        "fast_hit_rate": (total - tiers["llm"]) / total if total else 0.0,
+        "fast_router_latency_us": summarize(latencies),
+        "classifier_latency_us": summarize(classifier_latencies),
+        "per_agent_accuracy": {
+            agent: counts["correct"] / counts["labelled"] for agent, counts in per_agent.items()
+        },
+        "mistakes": [
+            {"expected": expected, "routed": routed, "count": count, "example": examples[key]}
+            for key, count in mistakes.most_common(10)
+            for expected, routed in [key]
+        ],
+    }
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description="Evaluate the pre-LLM routing tiers")
+    arg_parser.add_argument("--corpus", type=str, default=DEFAULT_CORPUS)
+    arg_parser.add_argument("--labels", type=str, help="JSONL reference labels")
+    arg_parser.add_argument(
+        "--reference", choices=["llm"], help="Label the corpus with the routing LLM first"
+    )
+    arg_parser.add_argument("--save-labels", type=str, help="Write the reference labels here")
+    arg_parser.add_argument("--min-share", type=float, default=0.8)
+    arg_parser.add_argument("--min-score", type=float, default=2.0)
+    arg_parser.add_argument(
+        "--classifier",
+        type=str,
+        default=DEFAULT_MODEL_PATH,
+        help="Trained intent classifier, evaluated on the turns the rules abstain on",
+    )
+    arg_parser.add_argument("--no-classifier", action="store_true")
+    arg_parser.add_argument("--output", "-o", type=str, help="Write the JSON report here")
+    args = arg_parser.parse_args()
+
+    messages = list(dict.fromkeys(turn for turns in load_corpus(args.corpus) for turn in turns))
+    labels = load_labels(args.labels) if args.labels else {}
+    if args.reference == "llm":
+        labels.update(label_with_llm([m for m in messages if m not in labels]))
+    if args.save_labels:
+        save_labels(args.save_labels, labels)
+
+    fast_router = FastRouter(min_score=args.min_score, min_share=args.min_share)
+    intent_classifier = None if args.no_classifier else IntentClassifier.load(args.classifier)
+    if intent_classifier is None and not args.no_classifier:
+        print(
+            f"No intent classifier at {args.classifier}, only the rule tier is evaluated",
+            file=sys.stderr,
+        )
+    report = evaluate(fast_router, messages, labels, intent_classifier)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
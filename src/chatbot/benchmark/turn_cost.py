@@ -0,0 +1,60 @@
+"""Per-turn LLM call count for a growing conversation.
+
+Run with ``python -m chatbot.benchmark.turn_cost``. No network is needed, the agent
+model is replaced by ``FakeChatModel``.
+"""
+
+import argparse
+import os
+
+from langchain_core.messages import HumanMessage
+
+from chatbot.agent.redirect_agent import RedirectAgent
+from chatbot.benchmark.fakes import FakeChatModel
+
+
+class BenchmarkAgent(RedirectAgent):
+    def get_llm(self) -> FakeChatModel:
+        return FakeChatModel()
+
+
+def replay_calls(agent: BenchmarkAgent, history: list[str]) -> int:
+    """Old behaviour: every past message of the agent is streamed again."""
+    before = agent.model.calls
+    for user_input in history:
+        agent.graph.invoke(
+            {"messages": [HumanMessage(content=user_input)]},
+            config=agent.config.graph_invoke_config,
+        )
+    return agent.model.calls - before
+
+
+def incremental_calls(agent: BenchmarkAgent, user_input: str) -> int:
+    before = agent.model.calls
+    agent.run_conversation([user_input])
+    return agent.model.calls - before
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description="Per-turn LLM calls as a session grows")
+    arg_parser.add_argument("--turns", "-n", type=int, default=20)
+    args = arg_parser.parse_args()
+
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    incremental_agent = BenchmarkAgent()
+    replay_agent = BenchmarkAgent()
+    replay_agent.graph = replay_agent.create_agent_graph()
+
+    history = []
+    print(f"{'turn':>4} | {'incremental':>11} | {'full replay':>11}")
+    for turn in range(1, args.turns + 1):
+        message = f"第 {turn} 個問題"
+        history.append(message)
+        print(
+            f"{turn:>4} | {incremental_calls(incremental_agent, message):>11} | "
+            f"{replay_calls(replay_agent, history):>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,23 @@
 import argparse
+import atexit
+import sys
 
 from chatbot.main import Chatbot
+from chatbot.utils import tracing
 
 
 def main() -> None:
+    # `chatbot serve ...` runs the HTTP service, see chatbot.server for its options
+    if sys.argv[1:2] == ["serve"]:
+        from chatbot.server import main as serve
+
+        serve(sys.argv[2:])
+        return
+
     arg_parser = argparse.ArgumentParser(
-        prog="chatbot", description="Use this agentic AI system as a customer service"
+        prog="chatbot",
+        description="Use this agentic AI system as a customer service",
+        epilog="Run `chatbot serve --help` for the HTTP service mode",
     )
 
     arg_parser.add_argument(
@@ -61,8 +73,29 @@ def main() -> None:
         help="Run the chatbot in test mode with sample messages",
     )
 
+    arg_parser.add_argument(
+        "--startup-report",
+        action="store_true",
+        help="Print how long each component took to start before exiting",
+    )
+
+    arg_parser.add_argument(
+        "--trace",
+        action="append",
+        choices=["console", "json", "otel"],
+        default=[],
+        help="Report pipeline spans (routing, graph nodes, tools, LLM calls), repeatable",
+    )
+
+    arg_parser.add_argument(
+        "--trace-file", type=str, help="JSON lines file of the json sink, stderr by default"
+    )
+
     args = arg_parser.parse_args()
+    tracing.configure(args.trace, args.trace_file)
     chatbot = Chatbot()
+    if args.startup_report:
+        atexit.register(chatbot.print_startup_report)
 
     # set up user basic information
     if args.user_id:
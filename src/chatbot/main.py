@@ -1,9 +1,11 @@
+from collections.abc import AsyncIterator, Iterator
+
 from chatbot.agent.orchestrator_agent import OrchestratorAgent
 
 
 class Chatbot:
-    def __init__(self) -> None:
-        self.orchestrator = OrchestratorAgent()
+    def __init__(self, **orchestrator_kwargs) -> None:
+        self.orchestrator = OrchestratorAgent(**orchestrator_kwargs)
         self.user_info = {}
         self._is_display = False
         self.default_test_messages = [
@@ -49,20 +51,78 @@ class Chatbot:
         self.user_info["email"] = email
 
     @staticmethod
-    def pretty_print(response: dict) -> None:
+    def print_routing(response: dict) -> None:
         print("\n🤖 路由結果:")
         print(f"   代理類型: {response['agent_type']}")
         print(f"   信心度: {response['confidence']:.2f}")
         print(f"   理由: {response['reason']}")
         if response.get("sentiment_score"):
             print(f"   情緒分數: {response['sentiment_score']:.2f}")
+
+    @classmethod
+    def pretty_print(cls, response: dict) -> None:
+        cls.print_routing(response)
         if response.get("message"):
             print(f"\n💬 回應: {response['message']}")
 
+    def print_startup_report(self) -> None:
+        print("\n⏱️ 啟動耗時:")
+        for component, seconds in self.orchestrator.startup_report().items():
+            print(f"   {component}: {seconds:.3f}s")
+
     def process_single_user_message(
-        self, message: str, user_info: dict = None, is_display: bool = False
+        self,
+        message: str,
+        user_info: dict = None,
+        is_display: bool = False,
+        session_id: str | None = None,
     ) -> dict:
-        return self.orchestrator.route_and_execute(message, user_info, is_display)
+        return self.orchestrator.route_and_execute(message, user_info, is_display, session_id)
+
+    async def aprocess_single_user_message(
+        self,
+        message: str,
+        user_info: dict = None,
+        is_display: bool = False,
+        session_id: str | None = None,
+    ) -> dict:
+        return await self.orchestrator.aroute_and_execute(
+            message, user_info, is_display, session_id
+        )
+
+    def stream_single_user_message(
+        self, message: str, user_info: dict = None, session_id: str | None = None
+    ) -> Iterator[dict]:
+        """Yield route, token and done events while the reply is being generated"""
+        yield from self.orchestrator.stream_route_and_execute(message, user_info, session_id)
+
+    async def astream_single_user_message(
+        self, message: str, user_info: dict = None, session_id: str | None = None
+    ) -> AsyncIterator[dict]:
+        async for event in self.orchestrator.astream_route_and_execute(
+            message, user_info, session_id
+        ):
+            yield event
+
+    def print_streaming(self, message: str, user_info: dict = None) -> dict:
+        """Print the reply token by token, returns the final response"""
+        response = {}
+        streamed = False
+        for event in self.stream_single_user_message(message, user_info):
+            match event["event"]:
+                case "route":
+                    self.print_routing(event["data"])
+                    print("\n💬 回應: ", end="", flush=True)
+                    streamed = True
+                case "token":
+                    print(event["data"], end="", flush=True)
+                case "done":
+                    response = event["data"]
+        if streamed:
+            print()
+        else:
+            self.pretty_print(response)
+        return response
 
     def dry_run(self, user_info: dict = None, messages: list[str] = None) -> None:
         user_info = user_info or self.default_user_info
@@ -82,8 +142,13 @@ class Chatbot:
                 print("👋 再見！")
                 break
 
-            response = self.process_single_user_message(user_input, self.user_info, self.is_display)
-            self.pretty_print(response)
+            if self.is_display:
+                response = self.process_single_user_message(
+                    user_input, self.user_info, self.is_display
+                )
+                self.pretty_print(response)
+            else:
+                self.print_streaming(user_input, self.user_info)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,317 @@
+import argparse
+import json
+import threading
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlparse
+
+from chatbot.agent.intent_classifier import DEFAULT_ROUTING_LOG
+from chatbot.main import Chatbot
+from chatbot.utils import metrics, tracing
+from chatbot.utils.model_pool import model_pool
+
+
+class ServerBusyError(Exception):
+    pass
+
+
+class RequestLimiter:
+    """Bounded admission for chat requests.
+
+    At most ``concurrency`` requests run at once and up to ``queue_size`` more wait for a
+    slot. Anything beyond that, or a request that waited longer than ``queue_timeout``, is
+    rejected right away so the load balancer can retry elsewhere instead of piling up.
+    """
+
+    def __init__(self, concurrency: int = 8, queue_size: int = 32, queue_timeout: float = 30):
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._lock = threading.Lock()
+        self.admitted = 0
+        self.rejected = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "concurrency": self.concurrency,
+                "queue_size": self.queue_size,
+                "in_flight": min(self.admitted, self.concurrency),
+                "queued": max(0, self.admitted - self.concurrency),
+                "rejected": self.rejected,
+            }
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        with self._lock:
+            if self.admitted >= self.concurrency + self.queue_size:
+                self.rejected += 1
+                raise ServerBusyError("Too many requests in queue")
+            self.admitted += 1
+        try:
+            if not self._slots.acquire(timeout=self.queue_timeout):
+                with self._lock:
+                    self.rejected += 1
+                raise ServerBusyError("Timed out waiting in queue")
+            try:
+                yield
+            finally:
+                self._slots.release()
+        finally:
+            with self._lock:
+                self.admitted -= 1
+
+
+class ChatRequestHandler(BaseHTTPRequestHandler):
+    """HTTP endpoints of the chatbot.
+
+    - ``POST /chat``: JSON body ``{"message", "session_id", "user_info"}``, answers with
+      the response dict of ``process_single_user_message`` plus the ``session_id``.
+    - ``/chat/stream``: same request as server-sent events: ``route``, one ``token``
+      event per reply token and a final ``done`` event with the full response. Also
+      accepts ``?message=&session_id=`` via GET so a browser ``EventSource`` can connect.
+    - ``GET /health``: queue and concurrency figures for the load balancer.
+    - ``GET /metrics``: request, routing, LLM, tool and cache metrics in Prometheus format.
+
+    Requests without a ``session_id`` get a new one, which is returned to the caller.
+    """
+
+    server: "ChatServer"
+
+    def _send_json(self, status: int, payload: dict[str, Any], headers: dict | None = None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_metrics(self) -> None:
+        body = metrics.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_busy(self, e: ServerBusyError) -> None:
+        self._send_json(503, {"error": str(e)}, headers={"Retry-After": "1"})
+
+    def _read_json(self) -> dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if not isinstance(payload, dict):
+            raise ValueError("Request body must be a JSON object")
+        return payload
+
+    def _parse_request(self, request: dict[str, Any]) -> tuple[str, str, dict] | None:
+        message = str(request.get("message") or "").strip()
+        if not message:
+            self._send_json(400, {"error": "message is required"})
+            return None
+        session_id = str(request.get("session_id") or uuid.uuid4().hex)
+        user_info = request.get("user_info") or {}
+        return message, session_id, user_info
+
+    def _chat(self, request: dict[str, Any]) -> None:
+        parsed = self._parse_request(request)
+        if not parsed:
+            return
+        message, session_id, user_info = parsed
+        try:
+            with self.server.limiter.slot(), self.server.session_lock(session_id):
+                response = self.server.chatbot.process_single_user_message(
+                    message, user_info, session_id=session_id
+                )
+        except ServerBusyError as e:
+            self._send_busy(e)
+            return
+        self._send_json(200, {**response, "session_id": session_id})
+
+    def _stream_events(self, request: dict[str, Any]) -> None:
+        parsed = self._parse_request(request)
+        if not parsed:
+            return
+        message, session_id, user_info = parsed
+        try:
+            with self.server.limiter.slot(), self.server.session_lock(session_id):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("X-Session-Id", session_id)
+                self.end_headers()
+
+                events = self.server.chatbot.stream_single_user_message(
+                    message, user_info, session_id
+                )
+                try:
+                    for event in events:
+                        data = json.dumps(event["data"], ensure_ascii=False)
+                        self.wfile.write(f"event: {event['event']}\ndata: {data}\n\n".encode())
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    # Client went away, stop generating for it
+                    events.close()
+        except ServerBusyError as e:
+            self._send_busy(e)
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        match url.path:
+            case "/health":
+                self._send_json(200, {"status": "ok", **self.server.limiter.stats()})
+            case "/metrics":
+                self._send_metrics()
+            case "/chat/stream":
+                self._stream_events({k: v[-1] for k, v in parse_qs(url.query).items()})
+            case _:
+                self._send_json(404, {"error": f"Unknown path: {url.path}"})
+
+    def do_POST(self) -> None:
+        if self.path not in ["/chat", "/chat/stream"]:
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+            return
+        try:
+            request = self._read_json()
+        except ValueError as e:
+            self._send_json(400, {"error": f"Invalid JSON body: {e}"})
+            return
+
+        if self.path == "/chat":
+            self._chat(request)
+        else:
+            self._stream_events(request)
+
+
+class ChatServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Turns of one session run one at a time, they share the agent's checkpointed thread
+    SESSION_LOCK_STRIPES = 256
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        chatbot: Chatbot,
+        limiter: RequestLimiter | None = None,
+    ):
+        super().__init__(address, ChatRequestHandler)
+        self.chatbot = chatbot
+        self.limiter = limiter or RequestLimiter()
+        self._session_locks = [threading.Lock() for _ in range(self.SESSION_LOCK_STRIPES)]
+        metrics.registry.add_collector(self.metrics_gauges)
+
+    def server_close(self) -> None:
+        metrics.registry.remove_collector(self.metrics_gauges)
+        super().server_close()
+
+    def metrics_gauges(self) -> dict:
+        """Point-in-time figures for ``/metrics``: queue state and cache hit rates"""
+        orchestrator = self.chatbot.orchestrator
+        gauges = {
+            **metrics.stats_gauges("chatbot_server", "Request limiter", self.limiter.stats()),
+            **metrics.stats_gauges(
+                "chatbot_response_cache", "Response cache", orchestrator.cache_stats()
+            ),
+            "chatbot_routing_fast_hit_rate": (
+                "Share of turns routed without the routing LLM",
+                {(): orchestrator.routing_stats()["fast_hit_rate"]},
+            ),
+        }
+        for model, stats in model_pool.query_cache_stats().items():
+            for key, value in stats.items():
+                name = f"chatbot_query_embedding_cache_{key}"
+                _, values = gauges.setdefault(name, (f"Query embedding cache: {key}", {}))
+                values[(("model", model),)] = value
+        return gauges
+
+    def session_lock(self, session_id: str) -> threading.Lock:
+        return self._session_locks[hash(session_id) % self.SESSION_LOCK_STRIPES]
+
+
+def main(argv: list[str] | None = None) -> None:
+    arg_parser = argparse.ArgumentParser(
+        prog="chatbot serve", description="Serve the chatbot over HTTP/JSON"
+    )
+    arg_parser.add_argument("--host", type=str, default="127.0.0.1")
+    arg_parser.add_argument("--port", "-p", type=int, default=8000)
+    arg_parser.add_argument(
+        "--concurrency", "-c", type=int, default=8, help="Requests processed at the same time"
+    )
+    arg_parser.add_argument(
+        "--queue-size", type=int, default=32, help="Requests waiting before answering 503"
+    )
+    arg_parser.add_argument(
+        "--queue-timeout", type=float, default=30, help="Seconds a request may wait in queue"
+    )
+    arg_parser.add_argument(
+        "--max-sessions", type=int, default=1000, help="Sessions kept in memory"
+    )
+    arg_parser.add_argument(
+        "--routing-log",
+        type=str,
+        default=DEFAULT_ROUTING_LOG,
+        help="Append LLM routing decisions to this JSONL file, the classifier's training "
+        "labels ('' to disable)",
+    )
+    arg_parser.add_argument(
+        "--watch-data",
+        type=float,
+        metavar="SECONDS",
+        help="Poll the indexed data files and refresh the vector indexes when they change",
+    )
+    arg_parser.add_argument(
+        "--query-cache-dir", type=str, help="Persist query embeddings here across restarts"
+    )
+    arg_parser.add_argument(
+        "--trace",
+        action="append",
+        choices=["console", "json", "otel"],
+        default=[],
+        help="Report pipeline spans (routing, graph nodes, tools, LLM calls), repeatable",
+    )
+    arg_parser.add_argument(
+        "--trace-file", type=str, help="JSON lines file of the json sink, stderr by default"
+    )
+    arg_parser.add_argument(
+        "--metrics-file", type=str, help="Also write the /metrics output to this file periodically"
+    )
+    arg_parser.add_argument(
+        "--metrics-interval", type=float, default=15, help="Seconds between metrics file dumps"
+    )
+    args = arg_parser.parse_args(argv)
+    tracing.configure(args.trace, args.trace_file)
+    if args.query_cache_dir:
+        model_pool.configure_query_cache(cache_dir=args.query_cache_dir)
+
+    # Build every agent and index up front so no request pays the startup cost
+    chatbot = Chatbot(lazy=False, max_sessions=args.max_sessions, routing_log_path=args.routing_log)
+    chatbot.print_startup_report()
+    limiter = RequestLimiter(args.concurrency, args.queue_size, args.queue_timeout)
+    if args.watch_data:
+        for agent in chatbot.orchestrator.agents.loaded().values():
+            vec_db_manager = getattr(agent, "vec_db_manager", None)
+            if vec_db_manager and vec_db_manager.source_path:
+                vec_db_manager.watch(args.watch_data)
+
+    server = ChatServer((args.host, args.port), chatbot, limiter)
+    if args.metrics_file:
+        metrics.registry.start_dump(args.metrics_file, args.metrics_interval)
+    print(f"🌐 Chatbot server listening on http://{args.host}:{args.port}")
+    print(f"   concurrency={args.concurrency}, queue_size={args.queue_size}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        metrics.registry.stop_dump()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
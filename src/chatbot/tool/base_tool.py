@@ -1,7 +1,17 @@
+import asyncio
 from abc import ABC, abstractmethod
 
 from langchain_core.tools import BaseTool
 
+from chatbot.utils.metrics import TOOL_ERRORS, TOOL_SECONDS
+from chatbot.utils.tracing import span
+
+
+def _span_args(args: tuple, kwargs: dict) -> dict:
+    # Tools take a query string plus a few filters, long values are cut for the logs
+    values = {**{f"arg{i}": value for i, value in enumerate(args)}, **kwargs}
+    return {key: str(value)[:200] for key, value in values.items()}
+
 
 class BaseAgentTool(ABC):
     @abstractmethod
@@ -16,8 +26,45 @@ class BaseAgentTool(ABC):
     def execute(self, **kwargs) -> str:
         pass
 
+    async def aexecute(self, **kwargs) -> str:
+        """Async execute, tools doing network I/O override this with native async calls"""
+        return await asyncio.to_thread(self.execute, **kwargs)
+
     def create_langchain_tool(self) -> BaseTool:
-        return self._create_tool()
+        langchain_tool = self._create_tool()
+        tool_name = self.get_tool_name()
+        func = langchain_tool.func
+
+        def _run(*args, **kwargs):
+            with (
+                span("tool", tool=tool_name, **_span_args(args, kwargs)) as current,
+                TOOL_SECONDS.time(tool=tool_name),
+            ):
+                try:
+                    result = func(*args, **kwargs)
+                except Exception:
+                    TOOL_ERRORS.inc(tool=tool_name)
+                    raise
+                current.set(result_chars=len(str(result)))
+                return result
+
+        async def _arun(**kwargs):
+            with (
+                span("tool", tool=tool_name, **_span_args((), kwargs)) as current,
+                TOOL_SECONDS.time(tool=tool_name),
+            ):
+                try:
+                    result = await self.aexecute(**kwargs)
+                except Exception:
+                    TOOL_ERRORS.inc(tool=tool_name)
+                    raise
+                current.set(result_chars=len(str(result)))
+                return result
+
+        langchain_tool.func = _run
+        if getattr(langchain_tool, "coroutine", None) is None:
+            langchain_tool.coroutine = _arun
+        return langchain_tool
 
     @abstractmethod
     def _create_tool(self) -> BaseTool:
@@ -28,20 +75,29 @@ class ToolManager:
     def __init__(self):
         self.tools: list[BaseTool] = []
         self._tool_map = {}
+        # Built once and reused by bind_tools, ToolNode and the prompt, so every call sends
+        # the same tool schemas; registering a tool invalidates them
+        self._langchain_tools: list[BaseTool] | None = None
+        self._tool_descriptions: str | None = None
 
     def register_tool(self, tool: BaseTool):
         self.tools.append(tool)
         self._tool_map[tool.get_tool_name()] = tool
+        self._langchain_tools = None
+        self._tool_descriptions = None
         print(f"✅ Registered Tools: {tool.get_tool_name()}")
 
     def get_langchain_tools(self) -> list[BaseTool]:
-        return [tool.create_langchain_tool() for tool in self.tools]
+        if self._langchain_tools is None:
+            self._langchain_tools = [tool.create_langchain_tool() for tool in self.tools]
+        return list(self._langchain_tools)
 
     def get_tool_descriptions(self) -> str:
-        descriptions = []
-        for tool in self.tools:
-            descriptions.append(f"- {tool.get_tool_name()}: {tool.get_tool_description()}")
-        return "\n".join(descriptions)
+        if self._tool_descriptions is None:
+            self._tool_descriptions = "\n".join(
+                f"- {tool.get_tool_name()}: {tool.get_tool_description()}" for tool in self.tools
+            )
+        return self._tool_descriptions
 
     def execute_tool(self, tool_name: str, **kwargs) -> str:
         if tool_name in self._tool_map:
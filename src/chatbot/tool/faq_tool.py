@@ -1,8 +1,9 @@
-import pandas as pd
 from langchain_core.documents import Document
 from langchain_core.tools import BaseTool, tool
 
 from chatbot.tool.base_tool import BaseAgentTool
+from chatbot.utils.hybrid_search import HybridSearcher, SearchMode
+from chatbot.utils.product_catalog import ProductCatalog
 from chatbot.utils.vector_db import VecDBManager
 
 
@@ -12,8 +13,9 @@ class SimpleProductSearchTool(BaseAgentTool):
         "Search relevant products for the user's query and provide links and brief descriptions."
     )
 
-    def __init__(self):
-        self.product_df = pd.read_csv("data/raw/ai-eng-test-sample-products.csv")
+    def __init__(self, products_path: str = "data/raw/ai-eng-test-sample-products.csv"):
+        self.catalog = ProductCatalog.from_csv(products_path)
+        self.product_df = self.catalog.df
 
     def get_tool_name(self) -> str:
         return "product_search"
@@ -21,28 +23,12 @@ class SimpleProductSearchTool(BaseAgentTool):
     def get_tool_description(self) -> str:
         return "Search for product information and return relevant product results based on the user’s query."
 
-    def run(self, query: str):
-        # We can use simple word match or vector search
-        results = []
-        for _, row in self.product_df.iterrows():
-            if (
-                query.lower() in row["name"].lower()
-                or query.lower() in row["compatibility_notes"].lower()
-            ):
-                results.append(
-                    {
-                        "title": row["name"],
-                        "compatibility_notes": row["compatibility_notes"],
-                        "link": row["url"],
-                    }
-                )
-            if len(results) >= 5:
-                break
-        return results
+    def run(self, query: str) -> list[dict]:
+        # Spec requirements (size, weight, desk thickness, VESA) are matched on parsed columns
+        return self.catalog.search(query, k=5)
 
     def execute(self, query: str) -> str:
         try:
-            print(f"🔍 Searching product: {query}")
             results = self.run(query)
             if results:
                 formatted_results = "\n".join([f"- {r['title']}: {r['link']}" for r in results])
@@ -62,11 +48,16 @@ class SimpleProductSearchTool(BaseAgentTool):
 
 
 class KnowledgeSearchTool(BaseAgentTool):
-    def __init__(self, vec_db_manager: VecDBManager):
+    def __init__(self, vec_db_manager: VecDBManager, search_mode: SearchMode = "hybrid"):
         self.vec_db_manager = vec_db_manager
         csv_path = "data/raw/ai-eng-test-sample-knowledges.csv"
         self.vec_db_manager.init_from_csv(csv_path=csv_path)
-        self.vec_db = self.vec_db_manager.vec_db
+        self.searcher = HybridSearcher(self.vec_db_manager, mode=search_mode)
+
+    @property
+    def vec_db(self):
+        # Read through the manager so a refreshed index is served without a restart
+        return self.vec_db_manager.vec_db
 
     def get_tool_name(self) -> str:
         return "knowledge_search"
@@ -91,15 +82,31 @@ class KnowledgeSearchTool(BaseAgentTool):
                     metadata_info = f" [標題: {title}]"
                 if source:
                     metadata_info += f" [來源: {source}]"
+                if doc.metadata.get("tags"):
+                    metadata_info += f" [標籤: {', '.join(doc.metadata['tags'])}]"
 
             formatted_docs.append(f"文件 {i}:{metadata_info}\n{content_preview}")
 
         return "\n\n".join(formatted_docs)
 
-    def execute(self, query: str, k: int = 3) -> str:
+    @staticmethod
+    def _metadata_filter(tag: str | None) -> dict | None:
+        return {"tags": tag} if tag else None
+
+    def execute(self, query: str, k: int = 3, tag: str | None = None) -> str:
+        try:
+            results = self.searcher.search(query, k=k, metadata_filter=self._metadata_filter(tag))
+            formatted_results = self._format_documents(results)
+            return f"在知識庫中找到 {len(results)} 筆相關文件:\n\n{formatted_results}"
+        except Exception as e:
+            print(f"Searching error: {e}")
+            return f"Searching error: {str(e)}"
+
+    async def aexecute(self, query: str, k: int = 3, tag: str | None = None) -> str:
         try:
-            print(f"📚 Searching through knowledge database: {query}")
-            results = self.vec_db.similarity_search(query, k=k)
+            results = await self.searcher.asearch(
+                query, k=k, metadata_filter=self._metadata_filter(tag)
+            )
             formatted_results = self._format_documents(results)
             return f"在知識庫中找到 {len(results)} 筆相關文件:\n\n{formatted_results}"
         except Exception as e:
@@ -108,8 +115,13 @@ class KnowledgeSearchTool(BaseAgentTool):
 
     def _create_tool(self) -> BaseTool:
         @tool
-        def knowledge_search(query: str) -> str:
-            """Search knowledge through database"""
-            return self.execute(query=query)
+        def knowledge_search(query: str, tag: str | None = None) -> str:
+            """Search knowledge through database.
+
+            Args:
+                query: What to search for.
+                tag: Only search articles with this tag, e.g. 退換貨, 保固, 發票, 運費, 付款.
+            """
+            return self.execute(query=query, tag=tag)
 
         return knowledge_search
@@ -2,12 +2,14 @@ import json
 import re
 import uuid
 
-from langchain.chat_models import init_chat_model
+from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.messages import HumanMessage
 from langchain_core.tools import BaseTool, tool
 
 from chatbot.tool.base_tool import BaseAgentTool
-from chatbot.utils.load_env import get_openai_api_key
+from chatbot.utils.metrics import LLM_SECONDS, record_llm_tokens
+from chatbot.utils.model_pool import model_pool
+from chatbot.utils.tracing import llm_usage, span
 
 
 class SentimentCheckerTool(BaseAgentTool):
@@ -23,19 +25,16 @@ class SentimentCheckerTool(BaseAgentTool):
     def get_tool_description(self) -> str:
         return "Detect user sentiment. If too negative, suggest transferring to human agent."
 
-    def _get_semantic_model(self) -> None:
-        api_key = get_openai_api_key()
-        return init_chat_model(
+    def _get_semantic_model(self) -> BaseChatModel:
+        return model_pool.get_chat_model(
             model="gpt-4o-mini",
             model_provider="openai",
-            api_key=api_key,
             temperature=0,
             max_tokens=100,
         )
 
-    def _analyze_sentiment(self, message: str) -> dict:
-        """分析情緒"""
-        prompt = f"""請對以下訊息評估情緒，給出一個情緒分數(score)，範圍 0到1：
+    def _get_sentiment_prompt(self, message: str) -> str:
+        return f"""請對以下訊息評估情緒，給出一個情緒分數(score)，範圍 0到1：
         - 0: 非常負面（憤怒、沮喪、抱怨）
         - 0.5: 中性
         - 1: 非常正面（開心、滿意）
@@ -44,42 +43,73 @@ class SentimentCheckerTool(BaseAgentTool):
 
         訊息: {message}"""
 
+    def _parse_sentiment(self, response, message: str) -> dict:
+        response_content = response.content if hasattr(response, "content") else str(response)
+
+        # 提取JSON
+        match = re.search(r"\{.*?\}", response_content, re.DOTALL)
+        if match:
+            try:
+                result = json.loads(match.group())
+                score = float(result.get("score", 0.5))
+                reason = result.get("reason", "無法判斷")
+                return {"score": score, "reason": reason, "message": message}
+            except (json.JSONDecodeError, ValueError) as e:
+                print(f"JSON 解析錯誤: {e}")
+                return {"score": 0.5, "reason": "解析失敗", "message": message}
+        else:
+            print("未找到有效的JSON格式")
+            return {"score": 0.5, "reason": "格式錯誤", "message": message}
+
+    def _analyze_sentiment(self, message: str) -> dict:
+        """分析情緒"""
         try:
-            # 修正：正確調用模型並提取內容
-            response = self.semantic_model.invoke([HumanMessage(content=prompt)])
-            response_content = response.content if hasattr(response, "content") else str(response)
-
-            print(f"🎭 情緒分析回應: {response_content}")
-
-            # 提取JSON
-            match = re.search(r"\{.*?\}", response_content, re.DOTALL)
-            if match:
-                try:
-                    result = json.loads(match.group())
-                    score = float(result.get("score", 0.5))
-                    reason = result.get("reason", "無法判斷")
-                    return {"score": score, "reason": reason, "message": message}
-                except (json.JSONDecodeError, ValueError) as e:
-                    print(f"JSON 解析錯誤: {e}")
-                    return {"score": 0.5, "reason": "解析失敗", "message": message}
-            else:
-                print("未找到有效的JSON格式")
-                return {"score": 0.5, "reason": "格式錯誤", "message": message}
+            with span("sentiment") as current:
+                with LLM_SECONDS.time(caller="sentiment"):
+                    response = self.semantic_model.invoke(
+                        [HumanMessage(content=self._get_sentiment_prompt(message))]
+                    )
+                record_llm_tokens("sentiment", response)
+                result = self._parse_sentiment(response, message)
+                current.set(score=result["score"], **llm_usage(response))
+            return result
+        except Exception as e:
+            print(f"情緒分析模型調用錯誤: {e}")
+            return {"score": 0.5, "reason": f"模型錯誤: {str(e)}", "message": message}
 
+    async def _aanalyze_sentiment(self, message: str) -> dict:
+        """分析情緒 (async)"""
+        try:
+            with span("sentiment") as current:
+                with LLM_SECONDS.time(caller="sentiment"):
+                    response = await self.semantic_model.ainvoke(
+                        [HumanMessage(content=self._get_sentiment_prompt(message))]
+                    )
+                record_llm_tokens("sentiment", response)
+                result = self._parse_sentiment(response, message)
+                current.set(score=result["score"], **llm_usage(response))
+            return result
         except Exception as e:
             print(f"情緒分析模型調用錯誤: {e}")
             return {"score": 0.5, "reason": f"模型錯誤: {str(e)}", "message": message}
 
+    def _format_result(self, result: dict) -> str:
+        score = result["score"]
+        if score < self.NEGATIVE_THRESHOLD:
+            return f"使用者情緒高，建議轉接客服 (分數: {score:.2f})"
+        else:
+            return f"情緒正常 (分數: {score:.2f})"
+
     def execute(self, message: str) -> str:
         try:
-            result = self._analyze_sentiment(message)
-            score = result["score"]
-
-            if score < self.NEGATIVE_THRESHOLD:
-                return "使用者情緒高，建議轉接客服"
-            else:
-                return "情緒正常"
+            return self._format_result(self._analyze_sentiment(message))
+        except Exception as e:
+            print(f"Sentiment analysis error: {e}")
+            return f"Error analyzing sentiment: {str(e)}"
 
+    async def aexecute(self, message: str) -> str:
+        try:
+            return self._format_result(await self._aanalyze_sentiment(message))
         except Exception as e:
             print(f"Sentiment analysis error: {e}")
             return f"Error analyzing sentiment: {str(e)}"
@@ -124,7 +154,6 @@ class HandoffToHumanTool(BaseAgentTool):
 
     def execute(self, query: str, history: list[str] = None) -> str:
         try:
-            print(f"🙋 Handoff request: {query}")
             return self._handoff(query, history or [])
         except Exception as e:
             return {"error": f"Handoff error: {str(e)}"}
@@ -1,21 +1,39 @@
 import json
+import re
 
 from langchain_core.documents import Document
 from langchain_core.tools import BaseTool, tool
 
 from chatbot.tool.base_tool import BaseAgentTool
+from chatbot.utils.order_store import OrderStore
 from chatbot.utils.vector_db import VecDBManager
 
+# key=value pairs the agent passes in structured queries, e.g. "user_id=u_123456, order_id=..."
+QUERY_FIELD_PATTERN = re.compile(r"\b(user_id|order_id|tracking|status)\s*=\s*([^,\s]+)", re.I)
+
 
 class OrderSearchTool(BaseAgentTool):
-    def __init__(self, vec_db_manager: VecDBManager):
+    def __init__(
+        self,
+        vec_db_manager: VecDBManager,
+        data_path: str = "data/raw/ai-eng-test-sample-order.json",
+    ):
+        # data_path may also point to a SQLite file (.db/.sqlite) for larger order volumes
+        self.data_path = data_path
         self.vec_db_manager = vec_db_manager
-        json_path = "data/raw/ai-eng-test-sample-order.json"
-        self.vec_db_manager.init_from_json(json_path=json_path)
-        self.vec_db = self.vec_db_manager.vec_db
+        self.vec_db_manager.init_from_documents(
+            self._load_orders(), source_path=data_path, load_source=self._load_orders
+        )
+
+    def _load_orders(self) -> list[Document]:
+        """(Re)load the order store, the documents are what the vector index should hold"""
+        self.order_store = OrderStore.load(self.data_path)
+        return self.order_store.documents()
 
-        with open(json_path, encoding="utf-8") as f:
-            self.orders_data = json.load(f)["orders_db"]
+    @property
+    def vec_db(self):
+        # Read through the manager so a refreshed index is served without a restart
+        return self.vec_db_manager.vec_db
 
     def get_tool_name(self) -> str:
         return "order_search"
@@ -23,48 +41,60 @@ class OrderSearchTool(BaseAgentTool):
     def get_tool_description(self) -> str:
         return "Search order information through database"
 
-    def _structure_search(self, query: str) -> dict:
-        query_lower = query.lower()
-        user_id = None
-        order_id = None
+    def _parse_query(self, query: str) -> dict[str, str]:
+        return {k.lower(): v.strip() for k, v in QUERY_FIELD_PATTERN.findall(query)}
 
-        if "user_id=" in query_lower:
-            user_id = query_lower.split("user_id=")[-1].split(",")[0].strip()
-        if "order_id=" in query_lower:
-            order_id = query_lower.split("order_id=")[-1].split(",")[0].strip()
+    def _owned_order(self, user_id: str, order: dict | None) -> dict | None:
+        if order and self.order_store.get_owner(order["order_id"]) == user_id:
+            return order
+        return None
+
+    def _structure_search(self, query: str) -> dict:
+        fields = self._parse_query(query)
+        user_id = fields.get("user_id", "").lower()
+        order_id = fields.get("order_id")
+        tracking = fields.get("tracking")
 
         if not user_id:
             return {"error": "缺少 user_id, 請提供 user_id 以查詢訂單。"}
 
-        user_orders = self.orders_data.get(user_id)
-        if not user_orders:
+        if not self.order_store.has_user(user_id):
             return {"error": f"查無此 user_id ({user_id}) 的訂單紀錄，請確認是否正確。"}
 
-        orders = user_orders.get("orders", [])
+        if order_id or tracking:
+            # Hash lookups, the owner check keeps users from reading each other's orders
+            if order_id:
+                target_order = self._owned_order(user_id, self.order_store.get_order(order_id))
+            else:
+                target_order = self._owned_order(
+                    user_id, self.order_store.get_by_tracking(tracking)
+                )
+            if not target_order:
+                return {
+                    "error": f"user_id={user_id} 下查無此訂單 {order_id or tracking}，"
+                    "請確認 order_id 是否正確。"
+                }
+            return {"user_id": user_id, "order": target_order}
+
+        orders = self.order_store.get_user_orders(user_id)
         if not orders:
             return {"message": f"user_id={user_id} 沒有任何訂單紀錄。"}
 
-        if not order_id:
-            return {
-                "user_id": user_id,
-                "orders": [
-                    {
-                        "order_id": o["order_id"],
-                        "status": o["status"],
-                        "eta": o["eta"],
-                        "items": o["items"],
-                    }
-                    for o in orders
-                ],
-            }
-
-        target_order = next((o for o in orders if o["order_id"].lower() == order_id.lower()), None)
-        if not target_order:
-            return {
-                "error": f"user_id={user_id} 下查無此訂單 {order_id}，請確認 order_id 是否正確。"
-            }
-
-        return {"user_id": user_id, "order": target_order}
+        if fields.get("status"):
+            orders = self.order_store.get_user_orders(user_id, status=fields["status"])
+
+        return {
+            "user_id": user_id,
+            "orders": [
+                {
+                    "order_id": o["order_id"],
+                    "status": o["status"],
+                    "eta": o["eta"],
+                    "items": o["items"],
+                }
+                for o in orders
+            ],
+        }
 
     def _format_documents(self, documents: list[Document]) -> str:
         if not documents:
@@ -87,17 +117,68 @@ class OrderSearchTool(BaseAgentTool):
 
         return "\n\n".join(formatted_docs)
 
-    def _semantic_search(self, query: str, k: int = 3) -> str:
-        results = self.vec_db.similarity_search(query, k=k)
+    @staticmethod
+    def _free_text(query: str) -> str:
+        return QUERY_FIELD_PATTERN.sub(" ", query).strip(" ,;，、")
+
+    def _plan(self, query: str) -> tuple[str, str | None]:
+        """``("structured" | "semantic" | "refuse", user_id)`` for a tool query.
+
+        Orders are only ever returned to their owner: without a user_id nothing is
+        searched, and the semantic fallback is restricted to that user's orders.
+        """
+        fields = self._parse_query(query)
+        user_id = fields.get("user_id", "").lower() or None
+        if user_id is None:
+            return "refuse", None
+        if fields.get("order_id") or fields.get("tracking") or not self._free_text(query):
+            return "structured", user_id
+        if not self.order_store.has_user(user_id):
+            return "structured", user_id  # reports the unknown user_id
+        return "semantic", user_id
+
+    @staticmethod
+    def _refusal() -> str:
+        return json.dumps(
+            {"error": "缺少 user_id, 請提供 user_id 以查詢訂單。"}, ensure_ascii=False, indent=2
+        )
+
+    def _format_results(self, results: list[Document]) -> str:
         formatted_results = self._format_documents(results)
         return f"在知識庫中找到 {len(results)} 筆相關文件:\n\n{formatted_results}"
 
+    def _semantic_search(self, query: str, user_id: str, k: int = 3) -> str:
+        results = self.vec_db_manager.search(
+            self._free_text(query), k=k, metadata_filter={"user_id": user_id}
+        )
+        return self._format_results(results)
+
+    async def _asemantic_search(self, query: str, user_id: str, k: int = 3) -> str:
+        results = await self.vec_db_manager.asearch(
+            self._free_text(query), k=k, metadata_filter={"user_id": user_id}
+        )
+        return self._format_results(results)
+
     def execute(self, query: str, k: int = 3) -> str:
         try:
-            if "user_id=" in query.lower():
-                return json.dumps(self._structure_search(query), ensure_ascii=False, indent=2)
-            else:
-                return self._semantic_search(query, k=k)
+            mode, user_id = self._plan(query)
+            if mode == "refuse":
+                return self._refusal()
+            if mode == "semantic":
+                return self._semantic_search(query, user_id, k=k)
+            return json.dumps(self._structure_search(query), ensure_ascii=False, indent=2)
+        except Exception as e:
+            print(f"Searching error: {e}")
+            return f"Searching error: {str(e)}"
+
+    async def aexecute(self, query: str, k: int = 3) -> str:
+        try:
+            mode, user_id = self._plan(query)
+            if mode == "refuse":
+                return self._refusal()
+            if mode == "semantic":
+                return await self._asemantic_search(query, user_id, k=k)
+            return json.dumps(self._structure_search(query), ensure_ascii=False, indent=2)
         except Exception as e:
             print(f"Searching error: {e}")
             return f"Searching error: {str(e)}"
@@ -130,7 +211,6 @@ class RequirementCheckerTool(BaseAgentTool):
 
     def execute(self, query: str) -> dict:
         try:
-            print(f"📚 Checking missing information: {query}")
             return self._check(query)
         except Exception as e:
             print(f"Checking error: {e}")
@@ -1,16 +1,26 @@
+import json
+from dataclasses import asdict
+
 from langchain_core.documents import Document
 from langchain_core.tools import BaseTool, tool
 
 from chatbot.tool.base_tool import BaseAgentTool
+from chatbot.utils.hybrid_search import HybridSearcher, SearchMode
+from chatbot.utils.product_catalog import CompatibilityIndex, ProductQuery
 from chatbot.utils.vector_db import VecDBManager
 
 
 class ProductSearchTool(BaseAgentTool):
-    def __init__(self, vec_db_manager: VecDBManager):
+    def __init__(self, vec_db_manager: VecDBManager, search_mode: SearchMode = "hybrid"):
         self.vec_db_manager = vec_db_manager
         csv_path = "data/raw/ai-eng-test-sample-products.csv"
         self.vec_db_manager.init_from_csv(csv_path=csv_path)
-        self.vec_db = self.vec_db_manager.vec_db
+        self.searcher = HybridSearcher(self.vec_db_manager, mode=search_mode)
+
+    @property
+    def vec_db(self):
+        # Read through the manager so a refreshed index is served without a restart
+        return self.vec_db_manager.vec_db
 
     def get_tool_name(self) -> str:
         return "knowledge_search"
@@ -40,10 +50,35 @@ class ProductSearchTool(BaseAgentTool):
 
         return "\n\n".join(formatted_docs)
 
-    def execute(self, query: str, k: int = 3) -> str:
+    @staticmethod
+    def _metadata_filter(
+        arm_type: str | None = None, min_size_inch: float | None = None, vesa: str | None = None
+    ) -> dict | None:
+        metadata_filter = {}
+        if arm_type:
+            metadata_filter["specs.arm_type"] = arm_type
+        if min_size_inch:
+            metadata_filter["specs.size_max_inch"] = {"$gte": min_size_inch}
+        if vesa:
+            metadata_filter["specs.vesa"] = vesa.lower().replace("×", "x").replace(" ", "")
+        return metadata_filter or None
+
+    def execute(self, query: str, k: int = 3, **filters) -> str:
         try:
-            print(f"📚 Searching through knowledge database: {query}")
-            results = self.vec_db.similarity_search(query, k=k)
+            results = self.searcher.search(
+                query, k=k, metadata_filter=self._metadata_filter(**filters)
+            )
+            formatted_results = self._format_documents(results)
+            return f"在知識庫中找到 {len(results)} 筆相關文件:\n\n{formatted_results}"
+        except Exception as e:
+            print(f"Searching error: {e}")
+            return f"Searching error: {str(e)}"
+
+    async def aexecute(self, query: str, k: int = 3, **filters) -> str:
+        try:
+            results = await self.searcher.asearch(
+                query, k=k, metadata_filter=self._metadata_filter(**filters)
+            )
             formatted_results = self._format_documents(results)
             return f"在知識庫中找到 {len(results)} 筆相關文件:\n\n{formatted_results}"
         except Exception as e:
@@ -52,9 +87,24 @@ class ProductSearchTool(BaseAgentTool):
 
     def _create_tool(self) -> BaseTool:
         @tool
-        def product_search(query: str) -> str:
-            """Search knowledge through database"""
-            return self.execute(query=query)
+        def product_search(
+            query: str,
+            arm_type: str | None = None,
+            min_size_inch: float | None = None,
+            vesa: str | None = None,
+        ) -> str:
+            """Search knowledge through database.
+
+            Args:
+                query: What to search for.
+                arm_type: Only this arm type: dual_gas_spring, single_mechanical,
+                    single_heavy_gas_spring, wall_mount or accessory.
+                min_size_inch: Only products supporting screens at least this large.
+                vesa: Only products supporting this VESA pattern, e.g. 100x100.
+            """
+            return self.execute(
+                query=query, arm_type=arm_type, min_size_inch=min_size_inch, vesa=vesa
+            )
 
         return product_search
 
@@ -86,7 +136,6 @@ class RequirementCheckerTool(BaseAgentTool):
 
     def execute(self, query: str) -> str:
         try:
-            print(f"📚 Checking missing information: {query}")
             return self._call(query)
 
         except Exception as e:
@@ -100,3 +149,110 @@ class RequirementCheckerTool(BaseAgentTool):
             return self.execute(query=query)
 
         return check_missing
+
+
+class CompatibilityCheckTool(BaseAgentTool):
+    """Deterministic fit check of monitor arms against screen size, weight, VESA and desk"""
+
+    # Requirement name the agent asks for when it is missing
+    REQUIREMENTS: dict = {
+        "size_inch": "螢幕尺寸",
+        "weight_kg": "螢幕重量",
+        "vesa": "VESA孔距",
+        "desk_thickness_mm": "桌板厚度",
+    }
+    MAX_NEAR_MISSES = 3
+
+    def __init__(self, products_path: str = "data/raw/ai-eng-test-sample-products.csv"):
+        self.index = CompatibilityIndex.from_csv(products_path)
+
+    def get_tool_name(self) -> str:
+        return "compatibility_check"
+
+    def get_tool_description(self) -> str:
+        return "Check which products fit the screen size, weight, VESA and desk thickness"
+
+    def _call(
+        self,
+        query: str = "",
+        size_inch: float | None = None,
+        weight_kg: float | None = None,
+        vesa: str | None = None,
+        desk_thickness_mm: float | None = None,
+    ) -> dict:
+        """Fit check, run from the repository root for the default products CSV
+
+        >>> result = CompatibilityCheckTool()._call(query="VESA 100x100mm 27吋 6kg")
+        >>> result["requirements"]["desk_thickness_mm"], result["missing"]
+        (None, ['桌板厚度'])
+        >>> len(result["compatible"]) > 0
+        True
+        """
+        # Explicit arguments win over values parsed from the free text
+        requirements = ProductQuery.parse(query or "")
+        if size_inch is not None:
+            requirements.size_inch = size_inch
+        if weight_kg is not None:
+            requirements.weight_kg = weight_kg
+        if vesa:
+            vesa_query = ProductQuery.parse(vesa).vesa
+            requirements.vesa = vesa_query or vesa.strip().lower()
+        if desk_thickness_mm is not None:
+            requirements.desk_thickness_mm = desk_thickness_mm
+
+        missing = [
+            label
+            for field_name, label in self.REQUIREMENTS.items()
+            if getattr(requirements, field_name) is None
+        ]
+        results = self.index.check(requirements)
+        compatible = [r for r in results if r.compatible]
+        near_misses = [r for r in results if not r.compatible][: self.MAX_NEAR_MISSES]
+        return {
+            "requirements": {
+                field_name: getattr(requirements, field_name) for field_name in self.REQUIREMENTS
+            },
+            "missing": missing,
+            "compatible": [asdict(r) for r in compatible],
+            "incompatible": [
+                {"sku": r.sku, "name": r.name, "failures": r.failures} for r in near_misses
+            ],
+        }
+
+    def execute(self, **kwargs) -> str:
+        try:
+            return json.dumps(self._call(**kwargs), ensure_ascii=False, indent=2)
+        except Exception as e:
+            print(f"Compatibility check error: {e}")
+            return f"Compatibility check error: {str(e)}"
+
+    def _create_tool(self) -> BaseTool:
+        @tool
+        def compatibility_check(
+            query: str = "",
+            size_inch: float | None = None,
+            weight_kg: float | None = None,
+            vesa: str | None = None,
+            desk_thickness_mm: float | None = None,
+        ) -> str:
+            """Check which products fit the user's screen and desk, with the reasons.
+
+            Args:
+                query: The user's own words, sizes like "27 吋 6kg 桌板 4cm" are parsed from it.
+                size_inch: Screen size in inches.
+                weight_kg: Screen weight in kg.
+                vesa: VESA hole pattern, e.g. 100x100.
+                desk_thickness_mm: Desk thickness in mm.
+
+            Returns JSON with the compatible SKUs and why, near misses with what fails, and
+            the requirements still missing that should be asked for.
+            """
+            return self.execute(
+                query=query,
+                size_inch=size_inch,
+                weight_kg=weight_kg,
+                vesa=vesa,
+                desk_thickness_mm=desk_thickness_mm,
+            )
+
+        return compatibility_check
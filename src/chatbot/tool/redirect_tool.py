@@ -34,7 +34,6 @@ class RedirectTopicTool(BaseAgentTool):
 
     def execute(self, query: str) -> dict:
         try:
-            print(f"🔄 Redirect check: {query}")
             return self._check_and_redirect(query)
         except Exception as e:
             print(f"Redirect tool error: {e}")
@@ -69,7 +68,6 @@ class TopicCheckerTool(BaseAgentTool):
 
     def execute(self, query: str) -> dict:
         try:
-            print(f"Checking topic relevance: {query}")
             return self._check_topic(query)
         except Exception as e:
             print(f"Topic check error: {e}")
@@ -0,0 +1,110 @@
+"""Typed document metadata built from flattened CSV rows, and metadata filters.
+
+CSV columns are paths into nested records (``tags/0``, ``urls/0/href``, ``specs/vesa/1``),
+they become nested metadata again: ``{"tags": [...], "urls": [{"href": ...}], "specs": {...}}``.
+
+Filters map a dotted metadata path to a value or to operator conditions:
+
+    {"tags": "退換貨"}                                  # any list element equals
+    {"specs.size_max_inch": {"$gte": 34}}
+    {"specs.arm_type": {"$in": ["dual_gas_spring", "single_heavy_gas_spring"]}}
+"""
+
+import math
+import operator
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+
+_COMPARISONS: dict[str, Callable[[Any, Any], bool]] = {
+    "$eq": operator.eq,
+    "$gt": operator.gt,
+    "$gte": operator.ge,
+    "$lt": operator.lt,
+    "$lte": operator.le,
+    "$in": lambda value, targets: value in targets,
+}
+_NEGATIONS = {"$ne": "$eq", "$nin": "$in"}
+
+
+def _typed(value: Any) -> Any:
+    """Plain Python value of a pandas cell, None for missing cells"""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+def _listify(node: Any) -> Any:
+    if not isinstance(node, dict):
+        return node
+    node = {key: _listify(value) for key, value in node.items()}
+    if node and all(key.isdigit() for key in node):
+        return [node[key] for key in sorted(node, key=int)]
+    return node
+
+
+def row_metadata(row: dict[str, Any]) -> dict[str, Any]:
+    """Nested, typed metadata of one flattened CSV row, plus ``title`` and ``source``"""
+    nested: dict[str, Any] = {}
+    for column, value in row.items():
+        value = _typed(value)
+        if value is None:
+            continue
+        *parents, leaf = str(column).split("/")
+        node = nested
+        for part in parents:
+            node = node.setdefault(part, {})
+        node[leaf] = value
+    metadata = _listify(nested)
+
+    metadata.setdefault("title", metadata.get("name", ""))
+    urls = metadata.get("urls") or [{}]
+    metadata.setdefault("source", urls[0].get("href") or metadata.get("url", ""))
+    return metadata
+
+
+def get_path(metadata: dict[str, Any], path: str) -> Any:
+    node: Any = metadata
+    for part in path.split("."):
+        if isinstance(node, dict):
+            node = node.get(part)
+        elif isinstance(node, list) and part.isdigit() and int(part) < len(node):
+            node = node[int(part)]
+        else:
+            return None
+    return node
+
+
+def _compare(op: str, value: Any, target: Any) -> bool:
+    if op in _NEGATIONS:
+        return not _compare(_NEGATIONS[op], value, target)
+    if op not in _COMPARISONS:
+        raise ValueError(f"Unsupported filter operator: {op}")
+    if value is None:
+        return False
+    # A list field matches when any of its elements does, e.g. tags or VESA patterns
+    values = value if isinstance(value, list) else [value]
+    for item in values:
+        try:
+            if _COMPARISONS[op](item, target):
+                return True
+        except TypeError:
+            continue
+    return False
+
+
+def matches(metadata: dict[str, Any], metadata_filter: dict[str, Any]) -> bool:
+    for path, condition in metadata_filter.items():
+        value = get_path(metadata, path)
+        conditions = condition if isinstance(condition, dict) else {"$eq": condition}
+        if not all(_compare(op, value, target) for op, target in conditions.items()):
+            return False
+    return True
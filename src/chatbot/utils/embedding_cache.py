@@ -0,0 +1,116 @@
+import hashlib
+import json
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+
+from langchain.storage import LocalFileStore
+from langchain_core.embeddings import Embeddings
+
+
+def embeddings_namespace(embeddings: Embeddings, model: str) -> str:
+    """Cache namespace of an embeddings client, e.g. ``OpenAIEmbeddings-text-embedding-ada-002``.
+
+    The client class is part of it so fake/offline embeddings never mix with real ones.
+    """
+    embeddings = getattr(embeddings, "underlying", embeddings)
+    return f"{type(embeddings).__name__}-{model}"
+
+
+def normalize_query(text: str) -> str:
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text)).strip()
+
+
+class QueryCachedEmbeddings(Embeddings):
+    """Embeddings client with an LRU cache of query vectors and an optional disk tier.
+
+    Agents re-issue the same tool queries within and across sessions, every vector store
+    embeds its queries through this wrapper so a repeated query costs no API round-trip.
+    Document embeddings pass through untouched, ``VecDBManager`` caches those per row.
+    """
+
+    def __init__(
+        self,
+        underlying: Embeddings,
+        namespace: str,
+        max_size: int = 2048,
+        cache_dir: str | None = None,
+    ):
+        self.underlying = underlying
+        self.namespace = namespace
+        self.max_size = max_size
+        self.store = LocalFileStore(str(Path(cache_dir))) if cache_dir else None
+        self._memory: OrderedDict[str, list[float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _key(self, text: str) -> str:
+        digest = hashlib.sha256(normalize_query(text).encode("utf-8")).hexdigest()
+        return f"{self.namespace}/{digest}"
+
+    def _lookup(self, key: str) -> list[float] | None:
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return vector
+
+        if self.store:
+            cached = self.store.mget([key])[0]
+            if cached is not None:
+                vector = json.loads(cached)
+                with self._lock:
+                    self.disk_hits += 1
+                self._remember(key, vector, persist=False)
+                return vector
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _remember(self, key: str, vector: list[float], persist: bool = True) -> None:
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_size:
+                self._memory.popitem(last=False)
+        if persist and self.store:
+            self.store.mset([(key, json.dumps(vector).encode())])
+
+    def embed_query(self, text: str) -> list[float]:
+        key = self._key(text)
+        vector = self._lookup(key)
+        if vector is None:
+            vector = self.underlying.embed_query(text)
+            self._remember(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> list[float]:
+        key = self._key(text)
+        vector = self._lookup(key)
+        if vector is None:
+            vector = await self.underlying.aembed_query(text)
+            self._remember(key, vector)
+        return vector
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.underlying.embed_documents(texts)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await self.underlying.aembed_documents(texts)
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "size": len(self._memory),
+            }
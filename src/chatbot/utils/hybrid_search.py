@@ -0,0 +1,216 @@
+"""Hybrid lexical + vector retrieval over the documents of a ``VecDBManager``.
+
+Queries are first scored with BM25 on an in-memory inverted index. When the lexical match
+is confident, e.g. a SKU, 統編 or a VESA pattern, its results are returned right away and
+no query embedding is needed. Otherwise the lexical and vector rankings are merged with
+reciprocal rank fusion.
+"""
+
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Any, Literal
+
+from langchain.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from chatbot.utils.doc_metadata import matches
+from chatbot.utils.vector_db import VecDBManager
+
+SearchMode = Literal["hybrid", "lexical", "vector"]
+
+_WORD_PATTERN = re.compile(r"[a-z0-9]+(?:[-_.][a-z0-9]+)*")
+_CJK_PATTERN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Latin words and identifiers whole (plus their parts), CJK runs as character bigrams"""
+    text = unicodedata.normalize("NFKC", text).lower()
+    tokens = []
+    for word in _WORD_PATTERN.findall(text):
+        tokens.append(word)
+        parts = re.split(r"[-_.]", word)
+        if len(parts) > 1:
+            tokens.extend(parts)
+    for run in _CJK_PATTERN.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i : i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+class BM25Index:
+    """Inverted index with Okapi BM25 scoring"""
+
+    def __init__(self, documents: list[Document], k1: float = 1.5, b: float = 0.75):
+        self.documents = documents
+        self.k1 = k1
+        self.b = b
+        self.postings: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        self.lengths: list[int] = []
+        for position, doc in enumerate(documents):
+            counts = Counter(tokenize(doc.page_content))
+            self.lengths.append(sum(counts.values()))
+            for token, tf in counts.items():
+                self.postings[token].append((position, tf))
+        self.average_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+
+        n = len(documents)
+        self.idf = {
+            token: math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for token, postings in self.postings.items()
+        }
+        # Terms unknown to the corpus still count with the highest IDF in the query mass
+        self.max_idf = max(self.idf.values(), default=1.0)
+
+    def search(
+        self, query: str, k: int, allowed: set[int] | None = None
+    ) -> tuple[list[tuple[int, float]], float]:
+        """Top ``k`` ``(position, score)`` pairs and the coverage of the best match.
+
+        Coverage is the share of the query's IDF mass the best document contains, 1.0
+        means every query term (weighted by rarity) occurs in it.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        scores: dict[int, float] = defaultdict(float)
+        matched: dict[int, float] = defaultdict(float)
+        for term in terms:
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for position, tf in self.postings[term]:
+                if allowed is not None and position not in allowed:
+                    continue
+                norm = 1 - self.b + self.b * self.lengths[position] / self.average_length
+                scores[position] += idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+                matched[position] += idf
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        query_mass = sum(self.idf.get(term, self.max_idf) for term in terms)
+        coverage = matched[ranked[0][0]] / query_mass if ranked and query_mass else 0.0
+        return ranked, coverage
+
+
+@dataclass
+class HybridStats:
+    lexical_only: int = 0
+    fused: int = 0
+    vector_only: int = 0
+
+    def to_dict(self) -> dict[str, int]:
+        return {
+            "lexical_only": self.lexical_only,
+            "fused": self.fused,
+            "vector_only": self.vector_only,
+        }
+
+
+class HybridSearcher:
+    """BM25 and vector search over one ``VecDBManager``, fused with reciprocal rank fusion.
+
+    The lexical index is rebuilt from the vector store's docstore whenever the manager swaps
+    in a new index, so it follows ``upsert``/``refresh`` without extra bookkeeping. In
+    ``hybrid`` mode a lexical top hit covering at least ``lexical_confidence`` of the query
+    and scoring ``lexical_margin`` times the runner-up is returned without an embedding call.
+    """
+
+    def __init__(
+        self,
+        vec_db_manager: VecDBManager,
+        mode: SearchMode = "hybrid",
+        candidates: int = 20,
+        rrf_k: int = 60,
+        lexical_confidence: float = 0.8,
+        lexical_margin: float = 1.5,
+    ):
+        self.vec_db_manager = vec_db_manager
+        self.mode = mode
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+        self.lexical_confidence = lexical_confidence
+        self.lexical_margin = lexical_margin
+        self.stats = HybridStats()
+        self._lock = threading.Lock()
+        # Separate from ``_lock`` so counting never waits for a lexical index rebuild
+        self._stats_lock = threading.Lock()
+        self._indexed_store: FAISS | None = None
+        self._lexical: BM25Index | None = None
+
+    def _lexical_index(self) -> BM25Index | None:
+        store = self.vec_db_manager.vec_db
+        if store is None:
+            return None
+        with self._lock:
+            if store is not self._indexed_store:
+                documents = [
+                    store.docstore.search(doc_id) for doc_id in store.index_to_docstore_id.values()
+                ]
+                self._lexical = BM25Index(documents)
+                self._indexed_store = store
+            return self._lexical
+
+    def _lexical_search(
+        self, index: BM25Index, query: str, metadata_filter: dict[str, Any] | None
+    ) -> tuple[list[Document], bool]:
+        allowed = None
+        if metadata_filter:
+            allowed = {
+                position
+                for position, doc in enumerate(index.documents)
+                if matches(doc.metadata, metadata_filter)
+            }
+        ranked, coverage = index.search(query, self.candidates, allowed)
+        confident = bool(ranked) and coverage >= self.lexical_confidence
+        if confident and len(ranked) > 1:
+            confident = ranked[0][1] >= self.lexical_margin * ranked[1][1]
+        return [index.documents[position] for position, _ in ranked], confident
+
+    def _fuse(self, rankings: list[list[Document]], k: int) -> list[Document]:
+        scores: dict[str, float] = defaultdict(float)
+        documents: dict[str, Document] = {}
+        for ranking in rankings:
+            for rank, doc in enumerate(ranking):
+                key = doc.id or doc.page_content
+                scores[key] += 1 / (self.rrf_k + rank + 1)
+                documents.setdefault(key, doc)
+        return [documents[key] for key in sorted(scores, key=scores.get, reverse=True)[:k]]
+
+    def _plan(
+        self, query: str, k: int, metadata_filter: dict[str, Any] | None
+    ) -> tuple[list[Document] | None, list[Document]]:
+        """Final results if no vector search is needed, otherwise the lexical ranking"""
+        index = self._lexical_index() if self.mode != "vector" else None
+        if index is None:
+            with self._stats_lock:
+                self.stats.vector_only += 1
+            return None, []
+        lexical, confident = self._lexical_search(index, query, metadata_filter)
+        if self.mode == "lexical" or confident:
+            with self._stats_lock:
+                self.stats.lexical_only += 1
+            return lexical[:k], lexical
+        with self._stats_lock:
+            self.stats.fused += 1
+        return None, lexical
+
+    def search(
+        self, query: str, k: int = 3, metadata_filter: dict[str, Any] | None = None
+    ) -> list[Document]:
+        results, lexical = self._plan(query, k, metadata_filter)
+        if results is not None:
+            return results
+        vector = self.vec_db_manager.search(query, self.candidates, metadata_filter)
+        return self._fuse([lexical, vector], k)
+
+    async def asearch(
+        self, query: str, k: int = 3, metadata_filter: dict[str, Any] | None = None
+    ) -> list[Document]:
+        results, lexical = self._plan(query, k, metadata_filter)
+        if results is not None:
+            return results
+        vector = await self.vec_db_manager.asearch(query, self.candidates, metadata_filter)
+        return self._fuse([lexical, vector], k)
@@ -0,0 +1,273 @@
+"""Aggregate metrics in the Prometheus text format.
+
+Counters and histograms are updated on the request path (a dict update under a lock),
+gauges such as cache hit rates are read from collectors when the metrics are rendered.
+``chatbot serve`` exposes ``registry.render()`` at ``GET /metrics`` and can also dump it
+to a file periodically (e.g. for the node_exporter textfile collector).
+"""
+
+import bisect
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from chatbot.utils.tracing import llm_usage
+
+# Seconds, from fast routing tiers up to slow LLM turns
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = tuple[str, ...]
+# name -> (help, {label: value} -> value) for gauges read at render time
+Collector = Callable[[], dict[str, tuple[str, dict[tuple[tuple[str, str], ...], float]]]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs: list[tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}, got {sorted(labels)}")
+        return tuple(str(labels[label]) for label in self.labels)
+
+    @abstractmethod
+    def samples(self) -> list[str]:
+        pass
+
+    def render(self) -> str:
+        header = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        return "\n".join(header + self.samples())
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(list(zip(self.labels, key, strict=True)))} "
+            f"{_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> (per-bucket counts, +Inf included, sum)
+        self._values: dict[LabelValues, tuple[list[int], float]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: Any) -> int:
+        with self._lock:
+            counts, _ = self._values.get(self._key(labels)) or ([], 0.0)
+        return sum(counts)
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            values = sorted(
+                (key, (list(counts), total)) for key, (counts, total) in self._values.items()
+            )
+        lines = []
+        for key, (counts, total) in values:
+            pairs = list(zip(self.labels, key, strict=True))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts, strict=True):
+                cumulative += count
+                le = _format_labels([*pairs, ("le", _format_value(float(bound)))])
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(pairs)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(pairs)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+        self._collectors: list[Collector] = []
+        self._lock = threading.Lock()
+        self._dump_stop: threading.Event | None = None
+
+    def _register(self, metric: Metric) -> Metric:
+        with self._lock:
+            existing = self._metrics.setdefault(metric.name, metric)
+        if type(existing) is not type(metric) or existing.labels != metric.labels:
+            raise ValueError(f"Metric {metric.name} is already registered differently")
+        return existing
+
+    def counter(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def add_collector(self, collector: Collector) -> None:
+        with self._lock:
+            self._collectors.append(collector)
+
+    def remove_collector(self, collector: Collector) -> None:
+        with self._lock:
+            if collector in self._collectors:
+                self._collectors.remove(collector)
+
+    def _render_gauges(self) -> list[str]:
+        blocks = []
+        for collector in list(self._collectors):
+            try:
+                gauges = collector()
+            except Exception as e:
+                print(f"Metrics collector error: {e}")
+                continue
+            for name, (help, values) in gauges.items():
+                lines = [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+                for labels, value in values.items():
+                    lines.append(f"{name}{_format_labels(list(labels))} {_format_value(value)}")
+                blocks.append("\n".join(lines))
+        return blocks
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        blocks = [metric.render() for metric in metrics] + self._render_gauges()
+        return "\n".join(blocks) + "\n"
+
+    def dump(self, path: str) -> None:
+        # Written to a temp file first so scrapers never read a half-written file
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def start_dump(self, path: str, interval: float = 15.0) -> None:
+        """Rewrite ``path`` with the current metrics every ``interval`` seconds"""
+        self.stop_dump()
+        stop = self._dump_stop = threading.Event()
+
+        def _loop() -> None:
+            while not stop.wait(interval):
+                try:
+                    self.dump(path)
+                except OSError as e:
+                    print(f"Metrics dump error ({path}): {e}")
+
+        threading.Thread(target=_loop, name="metrics-dump", daemon=True).start()
+
+    def stop_dump(self) -> None:
+        if self._dump_stop:
+            self._dump_stop.set()
+            self._dump_stop = None
+
+
+registry = MetricsRegistry()
+
+REQUESTS = registry.counter(
+    "chatbot_requests_total", "Chat turns handled", ("agent_type", "cached")
+)
+REQUEST_SECONDS = registry.histogram(
+    "chatbot_request_seconds", "End-to-end latency of a chat turn", ("agent_type",)
+)
+HANDOVERS = registry.counter(
+    "chatbot_handovers_total", "Turns handed over to a human agent", ("tier",)
+)
+ROUTING_DECISIONS = registry.counter(
+    "chatbot_routing_decisions_total", "Routing decisions per tier", ("tier", "agent_type")
+)
+ROUTING_FALLBACKS = registry.counter(
+    "chatbot_routing_fallbacks_total", "Turns routed to the FAQ agent as a fallback", ("reason",)
+)
+AGENT_RUN_SECONDS = registry.histogram(
+    "chatbot_agent_run_seconds", "Latency of one agent graph run", ("agent",)
+)
+LLM_SECONDS = registry.histogram("chatbot_llm_seconds", "Latency of one LLM call", ("caller",))
+LLM_TOKENS = registry.counter("chatbot_llm_tokens_total", "LLM tokens used", ("caller", "kind"))
+TOOL_SECONDS = registry.histogram(
+    "chatbot_tool_seconds", "Latency of one tool invocation", ("tool",)
+)
+TOOL_ERRORS = registry.counter(
+    "chatbot_tool_errors_total", "Tool invocations that raised", ("tool",)
+)
+
+
+def record_llm_tokens(caller: str, response: Any) -> None:
+    usage = llm_usage(response)
+    for kind in ("input", "output"):
+        if f"{kind}_tokens" in usage:
+            LLM_TOKENS.inc(usage[f"{kind}_tokens"], caller=caller, kind=kind)
+
+
+def stats_gauges(prefix: str, help: str, stats: dict[str, Any]) -> dict:
+    """Collector output for a flat ``stats()`` dict, one gauge per numeric field"""
+    return {
+        f"{prefix}_{key}": (f"{help}: {key}", {(): value})
+        for key, value in stats.items()
+        if isinstance(value, int | float) and not isinstance(value, bool)
+    }
@@ -0,0 +1,86 @@
+import threading
+from collections.abc import Callable
+
+from langchain.chat_models import init_chat_model
+from langchain.embeddings.openai import OpenAIEmbeddings
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from chatbot.utils.embedding_cache import QueryCachedEmbeddings, embeddings_namespace
+from chatbot.utils.load_env import get_openai_api_key
+
+
+def _default_chat_model_factory(model: str, model_provider: str, **kwargs) -> BaseChatModel:
+    return init_chat_model(
+        model=model, model_provider=model_provider, api_key=get_openai_api_key(), **kwargs
+    )
+
+
+def _default_embeddings_factory(model: str) -> Embeddings:
+    return OpenAIEmbeddings(api_key=get_openai_api_key(), model=model)
+
+
+class ModelPool:
+    """Process wide cache of chat model and embedding clients.
+
+    Agents, tools and the router ask the pool instead of building their own client, so
+    components configured the same way share one client and its connection pool.
+    Embedding clients come wrapped in a shared query-embedding cache, see
+    ``configure_query_cache``.
+    """
+
+    def __init__(self):
+        self._chat_models: dict[tuple, BaseChatModel] = {}
+        self._embeddings: dict[str, QueryCachedEmbeddings] = {}
+        self._lock = threading.Lock()
+        self._chat_model_factory: Callable[..., BaseChatModel] = _default_chat_model_factory
+        self._embeddings_factory: Callable[[str], Embeddings] = _default_embeddings_factory
+        self._query_cache_size = 2048
+        self._query_cache_dir: str | None = None
+
+    def get_chat_model(
+        self, model: str = "gpt-4o-mini", model_provider: str = "openai", **kwargs
+    ) -> BaseChatModel:
+        key = (model, model_provider, tuple(sorted(kwargs.items())))
+        with self._lock:
+            if key not in self._chat_models:
+                self._chat_models[key] = self._chat_model_factory(
+                    model=model, model_provider=model_provider, **kwargs
+                )
+            return self._chat_models[key]
+
+    def get_embeddings(self, model: str = "text-embedding-ada-002") -> Embeddings:
+        with self._lock:
+            if model not in self._embeddings:
+                embeddings = self._embeddings_factory(model)
+                self._embeddings[model] = QueryCachedEmbeddings(
+                    embeddings,
+                    namespace=embeddings_namespace(embeddings, model),
+                    max_size=self._query_cache_size,
+                    cache_dir=self._query_cache_dir,
+                )
+            return self._embeddings[model]
+
+    def configure_query_cache(self, max_size: int = 2048, cache_dir: str | None = None) -> None:
+        """Size of the in-memory query-embedding LRU and the directory of its disk tier"""
+        with self._lock:
+            self._query_cache_size = max_size
+            self._query_cache_dir = cache_dir
+            self._embeddings.clear()
+
+    def query_cache_stats(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            return {model: embeddings.stats() for model, embeddings in self._embeddings.items()}
+
+    def set_chat_model_factory(self, factory: Callable[..., BaseChatModel]) -> None:
+        with self._lock:
+            self._chat_model_factory = factory
+            self._chat_models.clear()
+
+    def set_embeddings_factory(self, factory: Callable[[str], Embeddings]) -> None:
+        with self._lock:
+            self._embeddings_factory = factory
+            self._embeddings.clear()
+
+
+model_pool = ModelPool()
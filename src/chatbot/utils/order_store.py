@@ -0,0 +1,183 @@
+import json
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Any
+
+from langchain_core.documents import Document
+
+SQLITE_SUFFIXES = {".db", ".sqlite", ".sqlite3"}
+
+# Personal fields stay out of the embedded text, they are only served by exact lookups
+_DOCUMENT_EXCLUDED_FIELDS = {"shipping_address", "contact_phone"}
+
+
+class OrderStore:
+    """In-memory order table with hash indexes on order_id, user_id, tracking and status.
+
+    Every lookup is a dict access, keys are compared case-insensitively. Orders can be
+    loaded from the sample JSON (``orders_db`` keyed by user) or from a SQLite file with
+    ``users`` and ``orders`` tables, see ``to_sqlite`` for the schema.
+    """
+
+    def __init__(self):
+        self.orders: dict[str, dict[str, Any]] = {}  # order_id -> order
+        self.owners: dict[str, str] = {}  # order_id -> user_id
+        self.by_user: dict[str, list[str]] = {}  # user_id -> order_ids, in source order
+        self.by_tracking: dict[str, str] = {}  # tracking -> order_id
+        self.by_status: dict[str, set[str]] = {}  # status -> order_ids
+
+    def __len__(self) -> int:
+        return len(self.orders)
+
+    @staticmethod
+    def _key(value: str) -> str:
+        return value.strip().lower()
+
+    def add_user(self, user_id: str) -> None:
+        self.by_user.setdefault(self._key(user_id), [])
+
+    def add_order(self, user_id: str, order: dict[str, Any]) -> None:
+        user_key = self._key(user_id)
+        order_key = self._key(order["order_id"])
+        if order_key in self.orders:
+            self.remove_order(order["order_id"])
+
+        self.orders[order_key] = order
+        self.owners[order_key] = user_key
+        self.by_user.setdefault(user_key, []).append(order_key)
+        if order.get("tracking"):
+            self.by_tracking[self._key(order["tracking"])] = order_key
+        if order.get("status"):
+            self.by_status.setdefault(self._key(order["status"]), set()).add(order_key)
+
+    def remove_order(self, order_id: str) -> dict[str, Any] | None:
+        order_key = self._key(order_id)
+        order = self.orders.pop(order_key, None)
+        if order is None:
+            return None
+
+        user_key = self.owners.pop(order_key)
+        self.by_user[user_key].remove(order_key)
+        if order.get("tracking"):
+            self.by_tracking.pop(self._key(order["tracking"]), None)
+        if order.get("status"):
+            self.by_status.get(self._key(order["status"]), set()).discard(order_key)
+        return order
+
+    def has_user(self, user_id: str) -> bool:
+        return self._key(user_id) in self.by_user
+
+    def get_order(self, order_id: str) -> dict[str, Any] | None:
+        return self.orders.get(self._key(order_id))
+
+    def get_owner(self, order_id: str) -> str | None:
+        return self.owners.get(self._key(order_id))
+
+    def get_by_tracking(self, tracking: str) -> dict[str, Any] | None:
+        order_key = self.by_tracking.get(self._key(tracking))
+        return self.orders.get(order_key) if order_key else None
+
+    def get_user_orders(self, user_id: str, status: str | None = None) -> list[dict[str, Any]]:
+        order_keys = self.by_user.get(self._key(user_id), [])
+        if status:
+            with_status = self.by_status.get(self._key(status), set())
+            order_keys = [key for key in order_keys if key in with_status]
+        return [self.orders[key] for key in order_keys]
+
+    def documents(self) -> list[Document]:
+        """One document per order for semantic fallback search"""
+        documents = []
+        for order_key, order in self.orders.items():
+            fields = []
+            for k, v in order.items():
+                if k in _DOCUMENT_EXCLUDED_FIELDS:
+                    continue
+                if k == "items":
+                    v = ", ".join(
+                        f"{item.get('name', item.get('sku'))} x{item.get('qty', 1)}" for item in v
+                    )
+                fields.append(f"{k}: {v}")
+            documents.append(
+                Document(
+                    id=order_key,
+                    page_content=" | ".join(fields),
+                    metadata={
+                        "order_id": order["order_id"],
+                        "user_id": self.owners[order_key],
+                        "status": order.get("status", ""),
+                    },
+                )
+            )
+        return documents
+
+    @classmethod
+    def load(cls, path: str) -> "OrderStore":
+        if Path(path).suffix.lower() in SQLITE_SUFFIXES:
+            return cls.from_sqlite(path)
+        return cls.from_json(path)
+
+    @classmethod
+    def from_json(cls, json_path: str) -> "OrderStore":
+        with open(json_path, encoding="utf-8") as f:
+            orders_db = json.load(f)["orders_db"]
+
+        store = cls()
+        for user_id, user_data in orders_db.items():
+            store.add_user(user_id)
+            for order in user_data.get("orders", []):
+                store.add_order(user_id, order)
+        return store
+
+    @classmethod
+    def from_sqlite(cls, db_path: str) -> "OrderStore":
+        store = cls()
+        with closing(sqlite3.connect(db_path)) as conn, conn:
+            conn.row_factory = sqlite3.Row
+            for row in conn.execute("SELECT user_id FROM users"):
+                store.add_user(row["user_id"])
+            for row in conn.execute("SELECT * FROM orders ORDER BY rowid"):
+                order = {k: v for k, v in dict(row).items() if v is not None}
+                user_id = order.pop("user_id")
+                order["items"] = json.loads(order.get("items") or "[]")
+                store.add_order(user_id, order)
+        return store
+
+    def to_sqlite(self, db_path: str) -> None:
+        """Write the store to SQLite, e.g. to convert the JSON sample for larger volumes"""
+        columns = ["order_id", "user_id", "placed_at", "status", "carrier", "tracking", "eta"]
+        columns += ["shipping_address", "contact_phone", "order_url", "items"]
+        with closing(sqlite3.connect(db_path)) as conn, conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS users (user_id TEXT PRIMARY KEY);
+                CREATE TABLE IF NOT EXISTS orders (
+                    order_id TEXT PRIMARY KEY,
+                    user_id TEXT NOT NULL REFERENCES users (user_id),
+                    placed_at TEXT,
+                    status TEXT,
+                    carrier TEXT,
+                    tracking TEXT,
+                    eta TEXT,
+                    shipping_address TEXT,
+                    contact_phone TEXT,
+                    order_url TEXT,
+                    items TEXT
+                );
+                CREATE INDEX IF NOT EXISTS orders_user_id ON orders (user_id);
+                """
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO users (user_id) VALUES (?)",
+                [(user_id,) for user_id in self.by_user],
+            )
+            rows = []
+            for order_key, order in self.orders.items():
+                row = {**order, "user_id": self.owners[order_key]}
+                row["items"] = json.dumps(order.get("items", []), ensure_ascii=False)
+                rows.append([row.get(column) for column in columns])
+            conn.executemany(
+                f"INSERT OR REPLACE INTO orders ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' for _ in columns)})",
+                rows,
+            )
@@ -0,0 +1,356 @@
+"""Structured product search over the product CSV.
+
+Everything a query needs is computed once at load time: lowercased text, a token index and
+numeric spec columns parsed from strings such as ``2-9`` (kg per arm) or ``10-85`` (desk
+thickness in mm). A query like "27 吋 6kg 桌板 40mm" becomes a few vectorized masks over
+those columns instead of a Python loop over rows.
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from chatbot.utils.hybrid_search import tokenize
+
+_NUMBER = r"(\d+(?:\.\d+)?)"
+_LENGTH = rf"{_NUMBER}\s*(mm|毫米|cm|公分)"
+_DESK = r"(?:桌板|桌面|桌厚|desk)"
+SIZE_PATTERN = re.compile(rf"{_NUMBER}\s*(?:吋|英寸|inch(?:es)?|\")", re.I)
+WEIGHT_PATTERN = re.compile(rf"{_NUMBER}\s*(?:kg|公斤|千克)", re.I)
+LENGTH_PATTERN = re.compile(_LENGTH, re.I)
+# A length only counts as desk thickness next to a desk keyword, "100mm" alone may be anything
+THICKNESS_PATTERNS = [
+    re.compile(rf"{_DESK}[^\d\n]{{0,12}}?{_LENGTH}", re.I),
+    re.compile(rf"{_LENGTH}[^\d\n]{{0,8}}?{_DESK}", re.I),
+]
+# The trailing unit belongs to the VESA spec ("100x100mm"), not to a thickness
+VESA_PATTERN = re.compile(r"(\d{2,3})\s*[x×*]\s*(\d{2,3})(?:\s*(?:mm|毫米))?", re.I)
+RANGE_PATTERN = r"^\s*(?P<low>\d+(?:\.\d+)?)(?:\s*[-–~]\s*(?P<high>\d+(?:\.\d+)?))?"
+
+
+@dataclass
+class ProductQuery:
+    """Requirements parsed from a free-text product question"""
+
+    size_inch: float | None = None
+    weight_kg: float | None = None
+    desk_thickness_mm: float | None = None
+    vesa: str | None = None
+    terms: list[str] = field(default_factory=list)
+
+    @property
+    def has_specs(self) -> bool:
+        return any(
+            v is not None
+            for v in (self.size_inch, self.weight_kg, self.desk_thickness_mm, self.vesa)
+        )
+
+    @classmethod
+    def parse(cls, text: str) -> "ProductQuery":
+        """Spec requirements and remaining search terms of ``text``
+
+        >>> query = ProductQuery.parse("VESA 100x100mm 27吋 6kg")
+        >>> query.vesa, query.size_inch, query.weight_kg, query.desk_thickness_mm
+        ('100x100', 27.0, 6.0, None)
+        >>> ProductQuery.parse("100 x 100 mm 桌板 4cm").desk_thickness_mm
+        40.0
+        >>> ProductQuery.parse("2 in 1 充電線").size_inch is None
+        True
+        """
+        text = unicodedata.normalize("NFKC", text)
+        query = cls()
+        if match := VESA_PATTERN.search(text):
+            query.vesa = f"{int(match.group(1))}x{int(match.group(2))}"
+        # VESA numbers must not be read again as a size or a thickness
+        rest = VESA_PATTERN.sub(" ", text)
+        if match := SIZE_PATTERN.search(rest):
+            query.size_inch = float(match.group(1))
+        if match := WEIGHT_PATTERN.search(rest):
+            query.weight_kg = float(match.group(1))
+        for pattern in THICKNESS_PATTERNS:
+            if match := pattern.search(rest):
+                value = float(match.group(1))
+                query.desk_thickness_mm = value * 10 if match.group(2) in ("cm", "公分") else value
+                break
+
+        # Spec expressions are matched as requirements, not as text
+        for pattern in (SIZE_PATTERN, WEIGHT_PATTERN, LENGTH_PATTERN):
+            rest = pattern.sub(" ", rest)
+        query.terms = list(dict.fromkeys(tokenize(rest)))
+        return query
+
+
+def _parse_range(values: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """``"2-9"`` -> (2, 9); a single number is an upper bound; missing -> NaN"""
+    parts = values.astype("string").str.extract(RANGE_PATTERN).astype(float)
+    single = parts["high"].isna() & parts["low"].notna()
+    low = np.where(single, 0.0, parts["low"].to_numpy())
+    high = np.where(single, parts["low"].to_numpy(), parts["high"].to_numpy())
+    return low, high
+
+
+class ProductCatalog:
+    """Product table with precomputed search columns and vectorized spec matching"""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df.reset_index(drop=True)
+        self.name_lc = self.df["name"].fillna("").str.lower()
+        self.notes_lc = self.df["compatibility_notes"].fillna("").str.lower()
+
+        # Token -> row positions, built from SKU, name and notes
+        texts = self.df["sku"].fillna("") + " " + self.df["name"].fillna("")
+        texts = texts + " " + self.df["compatibility_notes"].fillna("")
+        postings: dict[str, list[int]] = {}
+        for position, text in enumerate(texts):
+            for token in set(tokenize(text)):
+                postings.setdefault(token, []).append(position)
+        self.token_index = {token: np.asarray(rows) for token, rows in postings.items()}
+
+        self.size_max_inch = pd.to_numeric(
+            self._column("specs/size_max_inch"), errors="coerce"
+        ).to_numpy(dtype=float)
+        self.weight_min_kg, self.weight_max_kg = _parse_range(
+            self._column("specs/weight_per_arm_kg")
+        )
+        self.desk_min_mm, self.desk_max_mm = _parse_range(self._column("specs/desk_thickness_mm"))
+
+        # One boolean column per VESA pattern, e.g. "100x100"
+        vesa_columns = [col for col in self.df.columns if col.startswith("specs/vesa/")]
+        vesa = (
+            self.df[vesa_columns]
+            .astype("string")
+            .apply(lambda column: column.str.lower().str.replace(r"\s", "", regex=True))
+        )
+        self.vesa_patterns = sorted(set(vesa.stack().dropna()))
+        self.vesa_matrix = (
+            np.column_stack(
+                [(vesa == pattern).any(axis=1).to_numpy() for pattern in self.vesa_patterns]
+            )
+            if self.vesa_patterns
+            else np.zeros((len(self.df), 0), dtype=bool)
+        )
+
+    @classmethod
+    def from_csv(cls, path: str) -> "ProductCatalog":
+        return cls(pd.read_csv(path))
+
+    def _column(self, name: str) -> pd.Series:
+        if name in self.df.columns:
+            return self.df[name]
+        return pd.Series(np.nan, index=self.df.index)
+
+    def text_scores(self, terms: list[str]) -> np.ndarray:
+        scores = np.zeros(len(self.df))
+        for term in terms:
+            rows = self.token_index.get(term)
+            if rows is not None:
+                np.add.at(scores, rows, 1)
+        return scores
+
+    def spec_mask(self, query: ProductQuery) -> np.ndarray:
+        """Rows meeting every requirement of ``query``; unknown specs never match"""
+        mask = np.ones(len(self.df), dtype=bool)
+        with np.errstate(invalid="ignore"):
+            if query.size_inch is not None:
+                mask &= self.size_max_inch >= query.size_inch
+            if query.weight_kg is not None:
+                mask &= (self.weight_min_kg <= query.weight_kg) & (
+                    query.weight_kg <= self.weight_max_kg
+                )
+            if query.desk_thickness_mm is not None:
+                mask &= (self.desk_min_mm <= query.desk_thickness_mm) & (
+                    query.desk_thickness_mm <= self.desk_max_mm
+                )
+        if query.vesa is not None:
+            if query.vesa in self.vesa_patterns:
+                mask &= self.vesa_matrix[:, self.vesa_patterns.index(query.vesa)]
+            else:
+                mask[:] = False
+        return mask
+
+    def search(self, text: str, k: int = 5) -> list[dict[str, Any]]:
+        """Products compatible with the specs in ``text``, ranked by text match then fit.
+
+        Without spec requirements only rows matching the text are returned.
+        """
+        query = ProductQuery.parse(text)
+        scores = self.text_scores(query.terms)
+        # The whole question appearing verbatim in a name or note outranks token matches
+        phrase = unicodedata.normalize("NFKC", text).strip().lower()
+        if phrase:
+            verbatim = self.name_lc.str.contains(phrase, regex=False) | self.notes_lc.str.contains(
+                phrase, regex=False
+            )
+            scores += verbatim.to_numpy() * (len(query.terms) + 1)
+        mask = self.spec_mask(query)
+        if not query.has_specs:
+            mask &= scores > 0
+
+        rows = np.flatnonzero(mask)
+        if not len(rows):
+            return []
+        # Closest size fit first: a 27 吋 screen is better served by a 27 吋 arm than a 49 吋 one
+        slack = self.size_max_inch[rows] - (query.size_inch or 0)
+        slack = np.where(np.isnan(slack), np.inf, slack)
+        order = np.lexsort((slack, -scores[rows]))
+        return [self._result(int(row)) for row in rows[order][:k]]
+
+    def _result(self, row: int) -> dict[str, Any]:
+        record = self.df.iloc[row]
+        return {
+            "sku": record["sku"],
+            "title": record["name"],
+            "compatibility_notes": record["compatibility_notes"],
+            "link": record["url"],
+            "size_max_inch": self._number(self.size_max_inch[row]),
+            "weight_kg": self._range(self.weight_min_kg[row], self.weight_max_kg[row]),
+            "desk_thickness_mm": self._range(self.desk_min_mm[row], self.desk_max_mm[row]),
+            "vesa": [
+                p for p, ok in zip(self.vesa_patterns, self.vesa_matrix[row], strict=True) if ok
+            ],
+        }
+
+    @staticmethod
+    def _number(value: float) -> float | None:
+        return None if np.isnan(value) else float(value)
+
+    @staticmethod
+    def _range(low: float, high: float) -> tuple[float, float] | None:
+        return None if np.isnan(high) else (float(low), float(high))
+
+
+@dataclass
+class CompatibilityResult:
+    sku: str
+    name: str
+    link: str
+    compatible: bool
+    reasons: list[str]
+    failures: list[str]
+
+
+class CompatibilityIndex:
+    """Precomputed fit lookups for monitor-arm questions over a ``ProductCatalog``.
+
+    Every spec dimension is kept as a sorted array of ``(value, row)`` so "supports at least
+    27 吋" or "weight range contains 6 kg" is a binary search instead of a scan, and each
+    VESA pattern maps to the rows supporting it. ``check`` explains per product which
+    requirement passed or failed, so the agent can answer without reasoning over raw specs.
+    """
+
+    def __init__(self, catalog: ProductCatalog):
+        self.catalog = catalog
+        self._size_max = self._sorted(catalog.size_max_inch)
+        self._weight_min = self._sorted(catalog.weight_min_kg)
+        self._weight_max = self._sorted(catalog.weight_max_kg)
+        self._desk_min = self._sorted(catalog.desk_min_mm)
+        self._desk_max = self._sorted(catalog.desk_max_mm)
+        self._vesa_rows = {
+            pattern: np.flatnonzero(catalog.vesa_matrix[:, i])
+            for i, pattern in enumerate(catalog.vesa_patterns)
+        }
+
+    @classmethod
+    def from_csv(cls, path: str) -> "CompatibilityIndex":
+        return cls(ProductCatalog.from_csv(path))
+
+    @staticmethod
+    def _sorted(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        rows = np.flatnonzero(~np.isnan(values))
+        order = np.argsort(values[rows], kind="stable")
+        return values[rows][order], rows[order]
+
+    @staticmethod
+    def _at_least(index: tuple[np.ndarray, np.ndarray], value: float) -> np.ndarray:
+        values, rows = index
+        return rows[np.searchsorted(values, value, side="left") :]
+
+    @staticmethod
+    def _at_most(index: tuple[np.ndarray, np.ndarray], value: float) -> np.ndarray:
+        values, rows = index
+        return rows[: np.searchsorted(values, value, side="right")]
+
+    def _rows_mask(self, rows: np.ndarray) -> np.ndarray:
+        mask = np.zeros(len(self.catalog.df), dtype=bool)
+        mask[rows] = True
+        return mask
+
+    def fitting_rows(self, query: ProductQuery) -> dict[str, np.ndarray]:
+        """Boolean mask of the products meeting each requirement given in ``query``"""
+        masks = {}
+        if query.size_inch is not None:
+            masks["size"] = self._rows_mask(self._at_least(self._size_max, query.size_inch))
+        if query.weight_kg is not None:
+            masks["weight"] = self._rows_mask(
+                self._at_most(self._weight_min, query.weight_kg)
+            ) & self._rows_mask(self._at_least(self._weight_max, query.weight_kg))
+        if query.desk_thickness_mm is not None:
+            masks["desk"] = self._rows_mask(
+                self._at_most(self._desk_min, query.desk_thickness_mm)
+            ) & self._rows_mask(self._at_least(self._desk_max, query.desk_thickness_mm))
+        if query.vesa is not None:
+            masks["vesa"] = self._rows_mask(self._vesa_rows.get(query.vesa, np.empty(0, int)))
+        return masks
+
+    def _explain(self, row: int, query: ProductQuery, dimension: str, ok: bool) -> str:
+        catalog = self.catalog
+        match dimension:
+            case "size":
+                size = catalog.size_max_inch[row]
+                if np.isnan(size):
+                    return "無螢幕尺寸規格"
+                return f"支援至 {size:g} 吋 {'≥' if ok else '<'} {query.size_inch:g} 吋"
+            case "weight":
+                low, high = catalog.weight_min_kg[row], catalog.weight_max_kg[row]
+                if np.isnan(high):
+                    return "無承重規格"
+                verb = "含" if ok else "不含"
+                return f"單臂承重 {low:g}–{high:g} kg {verb} {query.weight_kg:g} kg"
+            case "desk":
+                low, high = catalog.desk_min_mm[row], catalog.desk_max_mm[row]
+                if np.isnan(high):
+                    return "不適用桌夾安裝"
+                verb = "含" if ok else "不含"
+                return f"桌板厚度 {low:g}–{high:g} mm {verb} {query.desk_thickness_mm:g} mm"
+            case _:
+                supported = [
+                    p
+                    for p, has in zip(catalog.vesa_patterns, catalog.vesa_matrix[row], strict=True)
+                    if has
+                ]
+                if ok:
+                    return f"支援 VESA {query.vesa}"
+                return f"不支援 VESA {query.vesa} (支援: {', '.join(supported) or '無'})"
+
+    def check(self, query: ProductQuery) -> list[CompatibilityResult]:
+        """Every product with the requirements it meets and misses, compatible ones first"""
+        masks = self.fitting_rows(query)
+        if not masks:
+            return []
+        passed = np.sum(list(masks.values()), axis=0)
+        # Fully compatible first, then near misses, smallest adequate size first
+        slack = self.catalog.size_max_inch - (query.size_inch or 0)
+        order = np.lexsort((np.where(np.isnan(slack), np.inf, slack), -passed))
+
+        results = []
+        df = self.catalog.df
+        for row in order:
+            reasons, failures = [], []
+            for dimension, mask in masks.items():
+                ok = bool(mask[row])
+                (reasons if ok else failures).append(self._explain(row, query, dimension, ok))
+            results.append(
+                CompatibilityResult(
+                    sku=df["sku"].iloc[row],
+                    name=df["name"].iloc[row],
+                    link=df["url"].iloc[row],
+                    compatible=not failures,
+                    reasons=reasons,
+                    failures=failures,
+                )
+            )
+        return results
@@ -0,0 +1,237 @@
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from chatbot.utils.vector_db import file_sha256
+
+# Messages carrying personal data are never cached
+PERSONAL_DATA_PATTERN = re.compile(
+    r"user_id|order_id|u_\d+|JTCG-\d{6}-\d+|[^@\s]+@[^@\s]+\.[^@\s]+|09\d{2}-?\d{3}-?\d{3}",
+    re.IGNORECASE,
+)
+
+
+NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+
+
+def normalize_text(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text).lower()
+    return re.sub(r"[\s\W_]+", "", text)
+
+
+def numeric_tokens(text: str) -> tuple[str, ...]:
+    """Numbers in the message, "27 吋" and "32 吋" embed almost the same but differ here"""
+    return tuple(sorted(NUMBER_PATTERN.findall(unicodedata.normalize("NFKC", text))))
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    response: dict[str, Any]
+    latency: float
+    created_at: float = field(default_factory=time.monotonic)
+    embedding: np.ndarray | None = None
+    numbers: tuple[str, ...] = ()
+
+
+@dataclass
+class CacheLookup:
+    response: dict[str, Any] | None = None
+    tier: str | None = None  # "exact" | "semantic"
+    # Query embedding computed on a miss, handed back to put() to avoid a second call
+    embedding: np.ndarray | None = None
+
+
+@dataclass
+class CacheStats:
+    exact_hits: int = 0
+    semantic_hits: int = 0
+    misses: int = 0
+    bypassed: int = 0
+    saved_seconds: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        return (self.exact_hits + self.semantic_hits) / lookups if lookups else 0.0
+
+    def to_dict(self) -> dict[str, float]:
+        return {
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": self.hit_rate,
+            "saved_seconds": self.saved_seconds,
+        }
+
+
+class ResponseCache:
+    """Two tier response cache: normalized exact match, then embedding similarity.
+
+    A semantic hit also needs the same numbers as the cached question, so "27 吋" never
+    answers "32 吋" however close the embeddings are.
+
+    Entries expire after ``ttl_seconds`` and the least recently used entry is dropped once
+    ``max_entries`` is reached. The whole cache is cleared when one of the
+    ``source_paths`` (e.g. the knowledge CSV) changes on disk.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float | None = 3600,
+        embeddings: Embeddings | None = None,
+        similarity_threshold: float | None = 0.95,
+        source_paths: list[str] | None = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self.source_paths = source_paths or []
+        self.stats = CacheStats()
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._source_stats = self._stat_sources()
+        self._source_hashes = self._hash_sources()
+
+    @property
+    def semantic_enabled(self) -> bool:
+        return self.embeddings is not None and self.similarity_threshold is not None
+
+    def is_cacheable(self, message: str) -> bool:
+        return bool(normalize_text(message)) and not PERSONAL_DATA_PATTERN.search(message)
+
+    def _hash_sources(self) -> dict[str, str]:
+        hashes = {}
+        for path in self.source_paths:
+            try:
+                hashes[path] = file_sha256(path)
+            except OSError:
+                hashes[path] = ""
+        return hashes
+
+    def _stat_sources(self) -> dict[str, tuple[int, int]]:
+        stats = {}
+        for path in self.source_paths:
+            try:
+                stat = os.stat(path)
+                stats[path] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                stats[path] = (0, 0)
+        return stats
+
+    def check_sources(self) -> bool:
+        """Clear the cache if a source file changed, returns True when it did"""
+        # Cheap stat first, the files are only hashed again when they were touched
+        stats = self._stat_sources()
+        if stats == self._source_stats:
+            return False
+        self._source_stats = stats
+        hashes = self._hash_sources()
+        if hashes == self._source_hashes:
+            return False
+        self.clear()
+        self._source_hashes = hashes
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _embed(self, message: str) -> np.ndarray | None:
+        if not self.semantic_enabled:
+            return None
+        try:
+            vector = np.asarray(self.embeddings.embed_query(message), dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            return vector / norm if norm else vector
+        except Exception as e:
+            print(f"Response cache embedding error: {e}")
+            return None
+
+    def _is_expired(self, entry: CacheEntry, now: float) -> bool:
+        return self.ttl_seconds is not None and now - entry.created_at > self.ttl_seconds
+
+    def bypass(self) -> None:
+        """Count a message the caller chose not to look up, e.g. a personalized one"""
+        with self._lock:
+            self.stats.bypassed += 1
+
+    def get(self, message: str) -> CacheLookup:
+        if not self.is_cacheable(message):
+            self.bypass()
+            return CacheLookup()
+        self.check_sources()
+
+        key = normalize_text(message)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and not self._is_expired(entry, now):
+                self._entries.move_to_end(key)
+                self.stats.exact_hits += 1
+                self.stats.saved_seconds += entry.latency
+                return CacheLookup(response=entry.response, tier="exact")
+
+        embedding = self._embed(message)
+        if embedding is not None:
+            numbers = numeric_tokens(message)
+            with self._lock:
+                best, best_score = None, -1.0
+                for candidate in self._entries.values():
+                    if candidate.embedding is None or self._is_expired(candidate, now):
+                        continue
+                    # Questions differing only in a size, weight or amount are not the same
+                    if candidate.numbers != numbers:
+                        continue
+                    score = float(candidate.embedding @ embedding)
+                    if score > best_score:
+                        best, best_score = candidate, score
+                if best is not None and best_score >= self.similarity_threshold:
+                    self._entries.move_to_end(best.key)
+                    self.stats.semantic_hits += 1
+                    self.stats.saved_seconds += best.latency
+                    return CacheLookup(response=best.response, tier="semantic")
+
+        with self._lock:
+            self.stats.misses += 1
+        return CacheLookup(embedding=embedding)
+
+    def put(
+        self,
+        message: str,
+        response: dict[str, Any],
+        latency: float,
+        embedding: np.ndarray | None = None,
+    ) -> None:
+        if not self.is_cacheable(message):
+            return
+        key = normalize_text(message)
+        if embedding is None and self.semantic_enabled:
+            embedding = self._embed(message)
+
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = CacheEntry(
+                key=key,
+                response=response,
+                latency=latency,
+                embedding=embedding,
+                numbers=numeric_tokens(message),
+            )
+            now = time.monotonic()
+            while self._entries:
+                oldest = next(iter(self._entries.values()))
+                if len(self._entries) <= self.max_entries and not self._is_expired(oldest, now):
+                    break
+                self._entries.popitem(last=False)
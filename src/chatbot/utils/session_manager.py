@@ -0,0 +1,102 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+DEFAULT_SESSION_ID = "default"
+
+
+@dataclass
+class Session:
+    session_id: str
+    user_info: dict = field(default_factory=dict)
+    # agent name -> recent user messages routed to that agent
+    conversation_state: dict[str, list[str]] = field(default_factory=dict)
+    history_limit: int = 20
+    last_access: float = field(default_factory=time.monotonic)
+
+    def thread_id(self, agent_name: str) -> str:
+        """LangGraph thread id of this session inside one agent's checkpointer"""
+        return f"{self.session_id}:{agent_name}"
+
+    def add_message(self, agent_name: str, message: str) -> list[str]:
+        history = self.conversation_state.setdefault(agent_name, [])
+        history.append(message)
+        del history[: -self.history_limit]
+        return history
+
+
+class SessionManager:
+    """Per-user session store with LRU and TTL eviction.
+
+    Evicted sessions are handed to ``on_evict`` so their agent threads can be released
+    from memory; with a Postgres/Redis checkpointer the graph state stays in the
+    checkpointer and is picked up again when the user comes back.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        ttl_seconds: float | None = 3600,
+        history_limit: int = 20,
+        on_evict: Callable[[Session], None] | None = None,
+    ):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.history_limit = history_limit
+        self.on_evict = on_evict
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def get(self, session_id: str | None = None) -> Session:
+        session_id = session_id or DEFAULT_SESSION_ID
+        now = time.monotonic()
+
+        with self._lock:
+            evicted = self._pop_expired(now)
+            session = self._sessions.pop(session_id, None)
+            if session is None:
+                session = Session(session_id=session_id, history_limit=self.history_limit)
+            session.last_access = now
+            self._sessions[session_id] = session
+
+            while len(self._sessions) > self.max_sessions:
+                _, oldest = self._sessions.popitem(last=False)
+                evicted.append(oldest)
+
+        self._handle_evicted(evicted)
+        return session
+
+    def evict(self, session_id: str) -> None:
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session:
+            self._handle_evicted([session])
+
+    def _pop_expired(self, now: float) -> list[Session]:
+        expired = []
+        if self.ttl_seconds is None:
+            return expired
+        # The dict is kept in access order, so expired sessions sit at the front
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.last_access < self.ttl_seconds:
+                break
+            expired.append(self._sessions.popitem(last=False)[1])
+        return expired
+
+    def _handle_evicted(self, sessions: list[Session]) -> None:
+        if not self.on_evict:
+            return
+        for session in sessions:
+            try:
+                self.on_evict(session)
+            except Exception as e:
+                print(f"Session eviction error ({session.session_id}): {e}")
@@ -0,0 +1,34 @@
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - tiktoken ships with langchain-openai
+    tiktoken = None
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str):
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        # The BPE files are downloaded on first use, offline runs fall back to estimates
+        print(
+            f"Token counts are estimated, could not load the {model} tokenizer ({type(e).__name__})"
+        )
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """Number of tokens of ``text`` for ``model``, estimated when the tokenizer is unavailable"""
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is None:
+        # Rough average over mixed CJK / Latin text
+        return max(1, len(text) // 2)
+    return len(encoding.encode(text))
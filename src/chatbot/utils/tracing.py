@@ -0,0 +1,247 @@
+"""Lightweight spans for the chat pipeline.
+
+Stages (sentiment, routing, graph nodes, tools, LLM calls) are wrapped in ``span`` and
+notable moments are reported with ``event``. Both are no-ops until a sink is registered,
+so they can stay on the hot path. Sinks: ``ConsoleSink`` for development logs,
+``JsonLogSink`` for JSON lines and ``OpenTelemetrySink`` for an OTel tracer provider.
+"""
+
+import json
+import secrets
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, TextIO
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # pragma: no cover - optional dependency
+    otel_trace = None
+
+
+@dataclass
+class Span:
+    name: str
+    attributes: dict[str, Any] = field(default_factory=dict)
+    start: float = 0.0
+    duration: float = 0.0
+    trace_id: str = ""
+    span_id: str = ""
+    parent_id: str | None = None
+    kind: str = "span"  # "span" | "event"
+    error: str | None = None
+    wall_time: float = 0.0
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+
+class _NoopSpan(Span):
+    def set(self, **attributes: Any) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan(name="noop")
+
+SpanSink = Callable[[Span], None]
+
+_sinks: list[SpanSink] = []
+_current: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def add_sink(sink: SpanSink) -> None:
+    if sink not in _sinks:
+        _sinks.append(sink)
+
+
+def remove_sink(sink: SpanSink) -> None:
+    if sink in _sinks:
+        _sinks.remove(sink)
+
+
+def enabled() -> bool:
+    return bool(_sinks)
+
+
+def _new_span(name: str, attributes: dict[str, Any], kind: str) -> Span:
+    parent = _current.get()
+    return Span(
+        name=name,
+        attributes=attributes,
+        start=time.perf_counter(),
+        trace_id=parent.trace_id if parent else secrets.token_hex(16),
+        span_id=secrets.token_hex(8),
+        parent_id=parent.span_id if parent else None,
+        kind=kind,
+        wall_time=time.time(),
+    )
+
+
+def _emit(current: Span) -> None:
+    for sink in list(_sinks):
+        try:
+            sink(current)
+        except Exception as e:
+            print(f"Tracing sink error ({type(sink).__name__}): {e}")
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span]:
+    """Time a pipeline stage and hand it to the registered sinks.
+
+    With no sink registered this is a no-op, so it is safe to leave on the hot path.
+    Attributes known only afterwards (e.g. token counts) are added with ``Span.set``.
+    """
+    if not _sinks:
+        yield NOOP_SPAN
+        return
+
+    current = _new_span(name, attributes, "span")
+    for sink in list(_sinks):
+        on_start = getattr(sink, "on_start", None)
+        if on_start:
+            on_start(current)
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current.reset(token)
+        current.duration = time.perf_counter() - current.start
+        _emit(current)
+
+
+def event(name: str, **attributes: Any) -> None:
+    """Report a point-in-time event inside the current span, replaces debug prints"""
+    if not _sinks:
+        return
+    _emit(_new_span(name, attributes, "event"))
+
+
+def llm_usage(message: Any) -> dict[str, int]:
+    """Token counts of an LLM response, empty when the provider reports none"""
+    usage = getattr(message, "usage_metadata", None) or {}
+    return {
+        key: usage[key] for key in ("input_tokens", "output_tokens", "total_tokens") if key in usage
+    }
+
+
+def _depth(current: Span, depths: dict[str, int]) -> int:
+    return depths.get(current.parent_id, -1) + 1 if current.parent_id else 0
+
+
+class ConsoleSink:
+    """Readable one-line-per-span log, what the pipeline used to ``print``"""
+
+    def __init__(self, stream: TextIO | None = None, events: bool = True):
+        self.stream = stream
+        self.events = events
+        self._depths: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def on_start(self, current: Span) -> None:
+        with self._lock:
+            self._depths[current.span_id] = _depth(current, self._depths)
+
+    def __call__(self, current: Span) -> None:
+        if current.kind == "event" and not self.events:
+            return
+        with self._lock:
+            if current.kind == "event":
+                depth = _depth(current, self._depths)
+            else:
+                depth = self._depths.pop(current.span_id, 0)
+        attributes = " ".join(f"{key}={value}" for key, value in current.attributes.items())
+        timing = "" if current.kind == "event" else f" {current.duration * 1000:.1f}ms"
+        error = f" ❌ {current.error}" if current.error else ""
+        line = f"{'  ' * depth}{'•' if current.kind == 'event' else '⏱️'} {current.name}{timing}"
+        stream = self.stream or sys.stdout
+        with self._lock:
+            stream.write(f"{line} {attributes}{error}".rstrip() + "\n")
+
+
+class JsonLogSink:
+    """One JSON object per span or event, appended to a file or stream"""
+
+    def __init__(self, path: str | None = None, stream: TextIO | None = None):
+        self.stream = stream or (open(path, "a", encoding="utf-8") if path else sys.stderr)
+        self._lock = threading.Lock()
+
+    def __call__(self, current: Span) -> None:
+        record = asdict(current)
+        del record["start"]
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+
+class OpenTelemetrySink:
+    """Forward spans to OpenTelemetry, the tracer provider and exporter are set up by the caller"""
+
+    def __init__(self, tracer_name: str = "chatbot"):
+        if otel_trace is None:
+            raise ImportError("OpenTelemetrySink needs the opentelemetry-api package")
+        self.tracer = otel_trace.get_tracer(tracer_name)
+        self._open: dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _attributes(current: Span) -> dict[str, Any]:
+        # OTel only accepts primitive attribute values
+        return {
+            key: value if isinstance(value, str | bool | int | float) else str(value)
+            for key, value in current.attributes.items()
+            if value is not None
+        }
+
+    def _context(self, current: Span):
+        with self._lock:
+            parent = self._open.get(current.parent_id) if current.parent_id else None
+        return otel_trace.set_span_in_context(parent) if parent else None
+
+    def on_start(self, current: Span) -> None:
+        otel_span = self.tracer.start_span(
+            current.name,
+            context=self._context(current),
+            start_time=int(current.wall_time * 1e9),
+        )
+        with self._lock:
+            self._open[current.span_id] = otel_span
+
+    def __call__(self, current: Span) -> None:
+        if current.kind == "event":
+            with self._lock:
+                parent = self._open.get(current.parent_id) if current.parent_id else None
+            if parent:
+                parent.add_event(current.name, self._attributes(current))
+            return
+
+        with self._lock:
+            otel_span = self._open.pop(current.span_id, None)
+        if otel_span is None:
+            return
+        otel_span.set_attributes(self._attributes(current))
+        if current.error:
+            otel_span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR, current.error))
+        otel_span.end(end_time=int((current.wall_time + current.duration) * 1e9))
+
+
+def configure(sinks: list[str], json_path: str | None = None) -> None:
+    """Register sinks by name: ``console``, ``json`` and ``otel``"""
+    for name in sinks:
+        match name:
+            case "console":
+                add_sink(ConsoleSink())
+            case "json":
+                add_sink(JsonLogSink(json_path))
+            case "otel":
+                add_sink(OpenTelemetrySink())
+            case _:
+                raise ValueError(f"Unsupported tracing sink: {name}")
@@ -0,0 +1,97 @@
+"""Incremental user profile extraction.
+
+The profile is a plain dict (``name``, ``email``, ``location``, ``user_id``, ``order_id``)
+kept on the session and in each agent's graph state. Only messages that have not been
+scanned yet are parsed, later mentions overwrite earlier ones.
+"""
+
+import re
+from collections.abc import Iterable
+
+from langchain_core.messages import AnyMessage, HumanMessage
+
+CJK_NAME = r"[\u4e00-\u9fff]{2,3}"
+LATIN_NAME = r"[A-Za-z][A-Za-z'-]{0,30}"
+
+NAME_PATTERNS = [
+    re.compile(rf"(?:我叫|我的名字是|我的名字叫)\s*({CJK_NAME}|{LATIN_NAME})"),
+    re.compile(rf"我是\s*({LATIN_NAME})"),
+    re.compile(r"\b(?:[Mm]y name is|[Cc]all me|I'm|I am)\s+([A-Z][A-Za-z'-]+)"),
+]
+LOCATION_PATTERNS = [
+    re.compile(r"(?:住在|來自|来自)\s*([\u4e00-\u9fff]{2,5})"),
+    re.compile(r"\b(?:[Ll]ive in|[Ff]rom)\s+([A-Z][A-Za-z .'-]*?)\s*(?=[,.!?]|$)"),
+]
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+USER_ID_PATTERN = re.compile(r"(?<![a-z0-9_])u_[a-z0-9]+", re.IGNORECASE)
+ORDER_ID_PATTERN = re.compile(r"(?<![A-Za-z0-9])JTCG-\d{6}-\d{4,5}(?!\d)", re.IGNORECASE)
+
+PROFILE_LABELS = [
+    ("name", "姓名"),
+    ("email", "信箱"),
+    ("location", "地點"),
+    ("user_id", "user_id"),
+    ("order_id", "order_id"),
+]
+
+
+def _last_match(patterns: list[re.Pattern], text: str) -> str | None:
+    found = None
+    for pattern in patterns:
+        for match in pattern.finditer(text):
+            found = match.group(match.lastindex or 0)
+    return found
+
+
+def extract_profile(text: str) -> dict[str, str]:
+    """Profile fields mentioned in one message"""
+    fields = {
+        "name": _last_match(NAME_PATTERNS, text),
+        "location": _last_match(LOCATION_PATTERNS, text),
+        "email": _last_match([EMAIL_PATTERN], text),
+        "user_id": _last_match([USER_ID_PATTERN], text),
+        "order_id": _last_match([ORDER_ID_PATTERN], text),
+    }
+    if fields["user_id"]:
+        fields["user_id"] = fields["user_id"].lower()
+    if fields["order_id"]:
+        fields["order_id"] = fields["order_id"].upper()
+    return {key: value.strip() for key, value in fields.items() if value}
+
+
+def update_profile(user_info: dict, texts: Iterable[str]) -> dict:
+    """New profile with the fields found in ``texts`` merged over ``user_info``"""
+    profile = dict(user_info or {})
+    for text in texts:
+        profile.update(extract_profile(text))
+    return profile
+
+
+def unseen_messages(messages: list[AnyMessage], cursor: str | None) -> list[AnyMessage]:
+    """Messages after the one with id ``cursor``, all of them if it is gone (compacted)"""
+    if cursor:
+        for i in range(len(messages) - 1, -1, -1):
+            if messages[i].id == cursor:
+                return messages[i + 1 :]
+    return messages
+
+
+def update_profile_from_messages(
+    user_info: dict, messages: list[AnyMessage], cursor: str | None
+) -> tuple[dict, str | None]:
+    """Profile updated with the user messages after ``cursor``, and the new cursor"""
+    new_messages = unseen_messages(messages, cursor)
+    texts = [
+        message.content
+        for message in new_messages
+        if isinstance(message, HumanMessage) and isinstance(message.content, str)
+    ]
+    profile = update_profile(user_info, texts)
+    return profile, (messages[-1].id if messages else cursor)
+
+
+def format_profile(user_info: dict) -> str:
+    """``用戶資訊: 姓名: ..., 信箱: ...`` line shared by the router and agent prompts"""
+    user_info = user_info or {}
+    known = [f"{label}: {user_info[key]}" for key, label in PROFILE_LABELS if user_info.get(key)]
+    return f"用戶資訊: {', '.join(known)}" if known else ""
@@ -1,30 +1,528 @@
+import hashlib
 import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
 
+import faiss
+import numpy as np
 import pandas as pd
-from langchain.embeddings.openai import OpenAIEmbeddings
+from langchain.embeddings import CacheBackedEmbeddings
+from langchain.storage import LocalFileStore
 from langchain.vectorstores import FAISS
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_core.documents import Document
+
+from chatbot.utils.doc_metadata import matches, row_metadata
+from chatbot.utils.embedding_cache import embeddings_namespace
+from chatbot.utils.load_env import root_dir
+from chatbot.utils.model_pool import model_pool
+
+
+def file_sha256(path: str) -> str:
+    """Content hash of a source file, used to key the on-disk index cache."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class RefreshStats:
+    added: int = 0
+    updated: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.updated or self.deleted)
+
+    def to_dict(self) -> dict[str, int]:
+        return {
+            "added": self.added,
+            "updated": self.updated,
+            "deleted": self.deleted,
+            "unchanged": self.unchanged,
+        }
+
+
+@dataclass
+class IngestStats:
+    rows: int = 0
+    batches: int = 0
+    retries: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> dict[str, float]:
+        return {
+            "rows": self.rows,
+            "batches": self.batches,
+            "retries": self.retries,
+            "seconds": self.seconds,
+            "rows_per_second": self.rows_per_second,
+        }
 
 
 class VecDBManager:
-    def __init__(self, api_key: str):
+    """Builds and caches the FAISS index of one data source.
+
+    Rows are read in chunks of ``chunk_rows`` and embedded in batches of ``batch_size``,
+    with at most ``max_concurrency`` embedding requests in flight. A failing batch is
+    retried up to ``max_retries`` times with exponential backoff (rate limits, timeouts),
+    and finished batches are appended to the index in source order as they come back.
+
+    Every vector is stored under a stable document id (the ``id``/``sku`` column of CSV
+    sources) together with a hash of its text, so ``upsert``/``delete`` and ``refresh``
+    only re-embed rows that changed. Updates are applied to a copy of the index which then
+    replaces ``vec_db`` in one assignment: searches in flight keep the old index, the next
+    ones see the new one. A relative ``cache_dir`` is resolved against the project root.
+    """
+
+    CSV_ID_COLUMNS = ("id", "sku")
+
+    def __init__(
+        self,
+        api_key: str,
+        embedding_model: str = "text-embedding-ada-002",
+        cache_dir: str | None = "data/cache/vec_db",
+        batch_size: int = 256,
+        max_concurrency: int = 4,
+        max_retries: int = 5,
+        backoff_seconds: float = 1.0,
+        chunk_rows: int = 5000,
+    ):
         self.api_key = api_key
+        self.embedding_model = embedding_model
+        # Relative to the project root, not the working directory the process started in
+        self.cache_dir = root_dir / cache_dir if cache_dir else None
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.chunk_rows = chunk_rows
         self.vec_db: FAISS | None = None
+        self.last_ingest_stats: IngestStats | None = None
+        self.source_path: str | None = None
+        self._load_source: Callable[[], Iterable[list[Document]]] | None = None
+        self._index_layout = "rows"
+        self._write_lock = threading.Lock()
+        self._watch_stop: threading.Event | None = None
+
+    def _cache_namespace(self) -> str:
+        embeddings = model_pool.get_embeddings(self.embedding_model)
+        return embeddings_namespace(embeddings, self.embedding_model)
+
+    def _get_embeddings(self):
+        embeddings = model_pool.get_embeddings(self.embedding_model)
+        if not self.cache_dir:
+            return embeddings
+
+        # Row level cache: unchanged rows are looked up by text hash instead of re-embedded
+        store = LocalFileStore(str(self.cache_dir / "embeddings"))
+        return CacheBackedEmbeddings.from_bytes_store(
+            embeddings, store, namespace=self._cache_namespace()
+        )
+
+    def _index_path(self, source_path: str, layout: str = "rows") -> Path | None:
+        # ``layout`` tells apart indexes built from the same file with different documents
+        if not self.cache_dir:
+            return None
+        key = hashlib.sha256(
+            f"{file_sha256(source_path)}:{self._cache_namespace()}:{layout}".encode()
+        ).hexdigest()
+        return self.cache_dir / "indexes" / key[:32]
+
+    def _load_cached_index(self, index_path: Path | None) -> bool:
+        if not index_path or not (index_path / "index.faiss").exists():
+            return False
+        try:
+            # The index is only ever written by us, so the pickled docstore is trusted
+            self.vec_db = FAISS.load_local(
+                str(index_path), self._get_embeddings(), allow_dangerous_deserialization=True
+            )
+            print(f"⚡ Loaded cached vector index: {index_path}")
+            return True
+        except Exception as e:
+            print(f"Failed to load cached vector index ({index_path}): {e}")
+            return False
+
+    def _save_index(self, index_path: Path | None) -> None:
+        if not index_path or not self.vec_db:
+            return
+        try:
+            index_path.mkdir(parents=True, exist_ok=True)
+            self.vec_db.save_local(str(index_path))
+        except Exception as e:
+            print(f"Failed to save vector index ({index_path}): {e}")
+
+    def _embed_batch(self, embeddings, texts: list[str]) -> tuple[list[list[float]], int]:
+        """Vectors of one batch and the number of retries it took"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return embeddings.embed_documents(texts), attempt
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = min(30.0, self.backoff_seconds * 2**attempt) * (0.5 + random.random())
+                print(f"Embedding batch failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+        return [], self.max_retries
+
+    def _batches(self, chunks: Iterable[list[Document]]) -> Iterator[list[Document]]:
+        for documents in chunks:
+            for start in range(0, len(documents), self.batch_size):
+                yield documents[start : start + self.batch_size]
+
+    @staticmethod
+    def _append(store: FAISS | None, embeddings, documents, vectors) -> FAISS:
+        text_embeddings = list(zip([doc.page_content for doc in documents], vectors, strict=True))
+        metadatas = [doc.metadata for doc in documents]
+        ids = [doc.id for doc in documents] if all(doc.id for doc in documents) else None
+        if store is None:
+            return FAISS.from_embeddings(text_embeddings, embeddings, metadatas=metadatas, ids=ids)
+        store.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+        return store
+
+    @staticmethod
+    def _copy_store(store: FAISS | None) -> FAISS | None:
+        """Independent copy of an index, updated while the original keeps serving searches"""
+        if store is None:
+            return None
+        return FAISS(
+            embedding_function=store.embedding_function,
+            index=faiss.clone_index(store.index),
+            docstore=InMemoryDocstore(dict(store.docstore._dict)),
+            index_to_docstore_id=dict(store.index_to_docstore_id),
+            normalize_L2=store._normalize_L2,
+            distance_strategy=store.distance_strategy,
+        )
+
+    def _embed_into(
+        self, store: FAISS | None, chunks: Iterable[list[Document]]
+    ) -> tuple[FAISS | None, IngestStats]:
+        """Embed document chunks concurrently and append them to ``store`` in order"""
+        embeddings = self._get_embeddings()
+        stats = IngestStats()
+        start = time.perf_counter()
+
+        pending: deque[tuple[list[Document], Future]] = deque()
+
+        def collect_oldest() -> None:
+            nonlocal store
+            documents, future = pending.popleft()
+            vectors, retries = future.result()
+            store = self._append(store, embeddings, documents, vectors)
+            stats.retries += retries
+            stats.rows += len(documents)
+            stats.batches += 1
+            if stats.batches % 10 == 0:
+                seconds = time.perf_counter() - start
+                print(f"📥 Embedded {stats.rows} rows ({stats.rows / seconds:.0f} rows/s)")
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            for documents in self._batches(chunks):
+                # Bounded read-ahead keeps memory flat for large sources
+                if len(pending) >= self.max_concurrency * 2:
+                    collect_oldest()
+                texts = [doc.page_content for doc in documents]
+                future = executor.submit(self._embed_batch, embeddings, texts)
+                pending.append((documents, future))
+            while pending:
+                collect_oldest()
+
+        stats.seconds = time.perf_counter() - start
+        self.last_ingest_stats = stats
+        print(
+            f"📥 Indexed {stats.rows} rows in {stats.batches} batches, "
+            f"{stats.seconds:.2f}s ({stats.rows_per_second:.0f} rows/s, {stats.retries} retries)"
+        )
+        return store, stats
+
+    def ingest(self, chunks: Iterable[list[Document]], replace: bool = True) -> IngestStats:
+        """Embed document chunks and add them to the index, or build a new one if ``replace``"""
+        with self._write_lock:
+            base = None if replace else self._copy_store(self.vec_db)
+            store, stats = self._embed_into(base, chunks)
+            self.vec_db = store
+        return stats
+
+    @staticmethod
+    def _keyed(documents: Iterable[Document]) -> list[Document]:
+        keyed = []
+        for doc in documents:
+            if not doc.id:
+                raise ValueError(f"Document without id: {doc.page_content[:50]}")
+            metadata = {**doc.metadata, "content_hash": content_hash(doc.page_content)}
+            keyed.append(Document(id=doc.id, page_content=doc.page_content, metadata=metadata))
+        return keyed
+
+    def _indexed_hashes(self, store: FAISS | None) -> dict[str, str | None]:
+        if store is None:
+            return {}
+        return {
+            doc_id: doc.metadata.get("content_hash") for doc_id, doc in store.docstore._dict.items()
+        }
+
+    def _apply(
+        self, upserts: list[Document], deletes: Iterable[str]
+    ) -> tuple[FAISS | None, IngestStats | None]:
+        """Copy-on-write update: changes go to a copy which then replaces ``vec_db``"""
+        store = self._copy_store(self.vec_db)
+        indexed = self._indexed_hashes(store)
+        stale = [doc_id for doc_id in deletes if doc_id in indexed]
+        stale += [doc.id for doc in upserts if doc.id in indexed]
+        if stale:
+            store.delete(list(dict.fromkeys(stale)))
+
+        stats = None
+        if upserts:
+            store, stats = self._embed_into(store, [upserts])
+        self.vec_db = store
+        return store, stats
+
+    def upsert(self, documents: Iterable[Document]) -> IngestStats | None:
+        """Add or replace documents by id, only the given documents are embedded"""
+        with self._write_lock:
+            return self._apply(self._keyed(documents), [])[1]
+
+    def delete(self, ids: Iterable[str]) -> int:
+        """Remove documents by id, returns how many were in the index"""
+        ids = list(ids)
+        with self._write_lock:
+            before = len(self._indexed_hashes(self.vec_db))
+            self._apply([], ids)
+            return before - len(self._indexed_hashes(self.vec_db))
+
+    def refresh(self, documents: Iterable[Document] | None = None) -> RefreshStats:
+        """Re-sync the index with its source and re-embed only added or changed rows.
+
+        ``documents`` is the new content of the source; by default it is read again from
+        the file the index was built from. Only the latter is saved to disk, the saved index
+        is keyed by the file's hash and must hold exactly what the file contains.
+        """
+        from_source = documents is None
+        if documents is not None:
+            chunks: Iterable[list[Document]] = [list(documents)]
+        elif self._load_source:
+            chunks = self._load_source()
+        else:
+            raise ValueError("Index has no source to refresh from")
+
+        stats = RefreshStats()
+        with self._write_lock:
+            indexed = self._indexed_hashes(self.vec_db)
+            seen: set[str] = set()
+            upserts: list[Document] = []
+            for chunk in chunks:
+                for doc in self._keyed(chunk):
+                    seen.add(doc.id)
+                    if doc.id not in indexed:
+                        stats.added += 1
+                    elif indexed[doc.id] != doc.metadata["content_hash"]:
+                        stats.updated += 1
+                    else:
+                        stats.unchanged += 1
+                        continue
+                    upserts.append(doc)
+            deletes = [doc_id for doc_id in indexed if doc_id not in seen]
+            stats.deleted = len(deletes)
+
+            if stats.changed:
+                self._apply(upserts, deletes)
+                if from_source and self.source_path and os.path.exists(self.source_path):
+                    self._save_index(self._index_path(self.source_path, self._index_layout))
+        print(f"🔄 Refreshed vector index {self.source_path or ''}: {stats.to_dict()}")
+        return stats
+
+    def watch(self, interval: float = 5.0) -> threading.Thread:
+        """Poll the source file and ``refresh`` the index whenever it changes"""
+        if not self.source_path:
+            raise ValueError("Index has no source file to watch")
+        self.stop_watching()
+        stop = self._watch_stop = threading.Event()
+        source_path = self.source_path
+
+        def poll() -> None:
+            last = os.stat(source_path).st_mtime_ns
+            while not stop.wait(interval):
+                try:
+                    mtime = os.stat(source_path).st_mtime_ns
+                    if mtime != last:
+                        last = mtime
+                        self.refresh()
+                except Exception as e:
+                    print(f"Failed to refresh vector index from {source_path}: {e}")
+
+        thread = threading.Thread(target=poll, name=f"watch-{source_path}", daemon=True)
+        thread.start()
+        return thread
+
+    def stop_watching(self) -> None:
+        if self._watch_stop:
+            self._watch_stop.set()
+            self._watch_stop = None
+
+    @staticmethod
+    def _filtered_positions(store: FAISS, metadata_filter: dict[str, Any]) -> np.ndarray:
+        docs = store.docstore._dict
+        return np.asarray(
+            [
+                position
+                for position, doc_id in store.index_to_docstore_id.items()
+                if matches(docs[doc_id].metadata, metadata_filter)
+            ],
+            dtype=np.int64,
+        )
+
+    @staticmethod
+    def _search_positions(
+        store: FAISS, vector: list[float], k: int, positions: np.ndarray
+    ) -> list[Document]:
+        if not len(positions):
+            return []
+        query = np.asarray([vector], dtype=np.float32)
+        if store._normalize_L2:
+            faiss.normalize_L2(query)
+        # Only the filtered rows are scored, the selector restricts the scan to them
+        params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(positions))
+        _, found = store.index.search(query, min(k, len(positions)), params=params)
+        return [
+            store.docstore.search(store.index_to_docstore_id[position])
+            for position in found[0]
+            if position != -1
+        ]
+
+    def search(
+        self, query: str, k: int = 3, metadata_filter: dict[str, Any] | None = None
+    ) -> list[Document]:
+        """Similarity search among the documents matching ``metadata_filter``.
+
+        The filter is applied before the vector search (see ``chatbot.utils.doc_metadata``
+        for the syntax), so ``k`` results come from the matching documents only.
+        """
+        store = self.vec_db
+        if store is None:
+            return []
+        if not metadata_filter:
+            return store.similarity_search(query, k=k)
+        positions = self._filtered_positions(store, metadata_filter)
+        if not len(positions):
+            return []
+        vector = store.embedding_function.embed_query(query)
+        return self._search_positions(store, vector, k, positions)
+
+    async def asearch(
+        self, query: str, k: int = 3, metadata_filter: dict[str, Any] | None = None
+    ) -> list[Document]:
+        store = self.vec_db
+        if store is None:
+            return []
+        if not metadata_filter:
+            return await store.asimilarity_search(query, k=k)
+        positions = self._filtered_positions(store, metadata_filter)
+        if not len(positions):
+            return []
+        vector = await store.embedding_function.aembed_query(query)
+        return self._search_positions(store, vector, k, positions)
+
+    def _set_source(
+        self,
+        source_path: str | None,
+        layout: str,
+        load_source: Callable[[], Iterable[list[Document]]] | None,
+    ) -> Path | None:
+        self.source_path = source_path
+        self._index_layout = layout
+        self._load_source = load_source
+        return self._index_path(source_path, layout) if source_path else None
 
     def init_from_texts(self, texts: list[str]):
-        embeddings = OpenAIEmbeddings(api_key=self.api_key)
-        self.vec_db = FAISS.from_texts(texts, embeddings)
+        self.ingest([[Document(page_content=text) for text in texts]])
 
-    def init_from_csv(self, csv_path: str):
-        df = pd.read_csv(csv_path)
+    def init_from_documents(
+        self,
+        documents: list[Document],
+        source_path: str | None = None,
+        load_source: Callable[[], list[Document]] | None = None,
+    ):
+        """Index prepared documents, cached on disk against ``source_path`` when given.
 
-        texts = []
-        for _, row in df.iterrows():
-            combined_text = " | ".join([str(row[col]) for col in df.columns])
-            texts.append(combined_text)
+        Documents need stable ids for ``upsert``/``refresh``; ``load_source`` re-reads
+        them when the source file changes.
+        """
+        keyed = self._keyed(documents)
+        load_chunks = (lambda: [load_source()]) if load_source else None
+        index_path = self._set_source(source_path, "keyed-documents", load_chunks)
+        if self._load_cached_index(index_path):
+            return
 
-        self.init_from_texts(texts)
+        self.ingest([keyed])
+        self._save_index(index_path)
+
+    def _csv_id_column(self, csv_path: str) -> str | None:
+        columns = pd.read_csv(csv_path, nrows=0).columns
+        return next((col for col in self.CSV_ID_COLUMNS if col in columns), None)
+
+    def _iter_csv_documents(self, csv_path: str, id_column: str | None) -> Iterator[list[Document]]:
+        seen: set[str] = set()
+        for chunk in pd.read_csv(csv_path, chunksize=self.chunk_rows):
+            # Column-wise string concatenation instead of a Python loop over rows
+            columns = [chunk[col].astype(str) for col in chunk.columns]
+            combined = columns[0]
+            for column in columns[1:]:
+                combined = combined + " | " + column
+            if id_column:
+                ids = chunk[id_column].astype(str).str.strip().tolist()
+            else:
+                ids = [f"row-{i}" for i in chunk.index]
+
+            documents = []
+            rows = chunk.to_dict("records")
+            for doc_id, text, row in zip(ids, combined.tolist(), rows, strict=True):
+                if doc_id in seen:
+                    print(f"Duplicate id {doc_id} in {csv_path}, only the first row is indexed")
+                    continue
+                seen.add(doc_id)
+                metadata = {**row_metadata(row), "id": doc_id}
+                documents.append(Document(id=doc_id, page_content=text, metadata=metadata))
+            yield self._keyed(documents)
+
+    def init_from_csv(self, csv_path: str, id_column: str | None = None):
+        """Index one document per row, keyed by ``id_column`` (``id`` or ``sku`` by default)"""
+        id_column = id_column or self._csv_id_column(csv_path)
+        index_path = self._set_source(
+            csv_path,
+            f"typed-rows-{id_column or 'index'}",
+            lambda: self._iter_csv_documents(csv_path, id_column),
+        )
+        if self._load_cached_index(index_path):
+            return
+
+        self.ingest(self._iter_csv_documents(csv_path, id_column))
+        self._save_index(index_path)
 
     def init_from_json(self, json_path: str):
+        index_path = self._index_path(json_path)
+        if self._load_cached_index(index_path):
+            return
+
         with open(json_path, encoding="utf-8") as f:
             data = json.load(f)
 
@@ -45,3 +543,4 @@ class VecDBManager:
             texts.append(str(data))
 
         self.init_from_texts(texts)
+        self._save_index(index_path)
@@ -0,0 +1,19 @@
+import pytest
+
+from chatbot.benchmark.replay import use_fake_models
+from chatbot.utils.model_pool import (
+    _default_chat_model_factory,
+    _default_embeddings_factory,
+    model_pool,
+)
+
+
+@pytest.fixture
+def fake_models(monkeypatch):
+    """Route every chat model and embedding client through the offline fakes"""
+    # Agents still ask for a key when they are built, the fakes never use it
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    use_fake_models(0.0)
+    yield
+    model_pool.set_chat_model_factory(_default_chat_model_factory)
+    model_pool.set_embeddings_factory(_default_embeddings_factory)
@@ -0,0 +1,79 @@
+from pathlib import Path
+
+import pytest
+
+from chatbot.agent.fast_router import FastRouter, KeywordAutomaton
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data" / "raw"
+
+
+@pytest.fixture(scope="module")
+def router() -> FastRouter:
+    return FastRouter(
+        knowledge_path=str(DATA_DIR / "ai-eng-test-sample-knowledges.csv"),
+        products_path=str(DATA_DIR / "ai-eng-test-sample-products.csv"),
+    )
+
+
+def test_automaton_finds_every_keyword_in_one_pass():
+    automaton = KeywordAutomaton(["退貨", "退換貨", "運費", "return policy"])
+    assert automaton.find("退換貨和運費的 return policy") == {"退換貨", "運費", "return policy"}
+
+
+def test_latin_keywords_only_match_whole_words():
+    automaton = KeywordAutomaton(["rma", "mount", "human", "jtcg-arm"])
+    assert automaton.find("is it normal? information, format, amount, humanity") == set()
+    assert automaton.find("rma form for the mount, talk to a human") == {"rma", "mount", "human"}
+    assert automaton.find("jtcg-arm-single") == {"jtcg-arm"}
+
+
+def test_cjk_keywords_match_inside_text():
+    automaton = KeywordAutomaton(["吋", "退貨"])
+    assert automaton.find("27吋螢幕可以退貨嗎") == {"吋", "退貨"}
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "Is it normal that my monitor wobbles?",
+        "Where can I find more information?",
+        "What format is the manual in?",
+        "What amount of weight can it hold?",
+        "Can I pay with PayPal?",
+        "Do you accept PayPal?",
+        "I believe in humanity",
+    ],
+)
+def test_substrings_of_latin_words_do_not_route(router, message):
+    assert router.route(message) is None
+
+
+@pytest.mark.parametrize(
+    "message, agent_type, tier",
+    [
+        ("我要退貨，運費誰付？", "faq_agent", "keyword"),
+        ("What payment methods do you accept?", "faq_agent", "keyword"),
+        ("請幫我轉接真人客服", "handover_agent", "keyword"),
+        ("I want to talk to a human", "handover_agent", "keyword"),
+        ("Where is my order?", "order_agent", "keyword"),
+        ("我的訂單 JTCG-202508-10001 到哪了", "order_agent", "pattern"),
+        ("user_id=u_123456", "order_agent", "pattern"),
+        ("recommend a mount for 27 inches", "product_agent", "keyword"),
+        ("JTCG-ARM-SINGLE-LITE-27 的規格", "product_agent", "keyword"),
+        ("今天天氣如何", "redirect_agent", "keyword"),
+    ],
+)
+def test_clear_intents_are_routed(router, message, agent_type, tier):
+    route = router.route(message)
+    assert route is not None
+    assert (route.agent_type, route.tier) == (agent_type, tier)
+
+
+def test_mixed_intents_fall_through_to_the_llm(router):
+    assert router.route("退貨流程是什麼？另外推薦一支單臂") is None
+
+
+def test_nested_keywords_are_counted_once(router):
+    scores, keywords, _ = router.score("退換貨")
+    assert keywords == ["退換貨"]
+    assert scores == {"faq_agent": 3.0}
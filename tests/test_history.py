@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.graph.message import add_messages
+
+from chatbot.agent.history import HistoryManager
+from chatbot.agent.redirect_agent import RedirectAgent
+from chatbot.benchmark.fakes import FakeChatModel
+
+SUMMARY = "SUMMARY-OF-EARLIER-TURNS"
+
+
+def tool_turn(turn: int, output: str) -> list:
+    call_id = f"call_{turn}"
+    return [
+        HumanMessage(content=f"question {turn}", id=f"h{turn}"),
+        AIMessage(
+            content="",
+            tool_calls=[{"name": "lookup", "args": {}, "id": call_id}],
+            id=f"a{turn}",
+        ),
+        ToolMessage(content=output, tool_call_id=call_id, id=f"t{turn}"),
+        AIMessage(content=f"answer {turn}", id=f"r{turn}"),
+    ]
+
+
+@pytest.fixture
+def summary_model(monkeypatch):
+    model = FakeChatModel(reply=SUMMARY)
+    monkeypatch.setattr(HistoryManager, "_get_model", lambda self: model)
+    return model
+
+
+def test_past_tool_outputs_are_truncated_once():
+    history = HistoryManager(max_tokens=10**6, max_tool_chars=50)
+    messages = tool_turn(0, "x" * 500) + [HumanMessage(content="question 1", id="h1")]
+
+    first = history.compact(messages)
+    assert len(first.replacements) == 1
+    assert first.replacements[0].additional_kwargs["truncated"]
+
+    second = history.compact(add_messages(messages, first.state_update["messages"]))
+    assert second.replacements == []
+    assert second.state_update == {}
+    assert second.messages[2].content == first.messages[2].content
+
+
+def test_current_turn_tool_output_is_kept_in_full():
+    history = HistoryManager(max_tokens=10**6, max_tool_chars=50)
+    messages = tool_turn(0, "x" * 500)
+
+    compaction = history.compact(messages)
+    assert compaction.replacements == []
+    assert compaction.messages[2].content == "x" * 500
+
+
+def test_old_turns_are_folded_into_the_summary(summary_model):
+    history = HistoryManager(max_tokens=1, keep_turns=1)
+    messages = tool_turn(0, "first") + tool_turn(1, "second")
+
+    compaction = history.compact(messages)
+    assert compaction.summary == SUMMARY
+    assert {removal.id for removal in compaction.removals} == {"h0", "a0", "t0", "r0"}
+    assert compaction.messages[0].content.endswith(SUMMARY)
+    assert [m.id for m in compaction.messages[1:]] == ["h1", "a1", "t1", "r1"]
+    assert compaction.state_update["summary"] == SUMMARY
+    assert summary_model.calls == 1
+
+
+def test_failed_summary_falls_back_to_the_user_questions(monkeypatch):
+    def broken_model(self):
+        raise RuntimeError("offline")
+
+    monkeypatch.setattr(HistoryManager, "_get_model", broken_model)
+    history = HistoryManager(max_tokens=1, keep_turns=1)
+
+    compaction = history.compact(tool_turn(0, "first") + tool_turn(1, "second"))
+    assert "question 0" in compaction.summary
+
+
+@pytest.fixture
+def compacting_agent(fake_models, summary_model):
+    agent = RedirectAgent()
+    # Every turn after the first evicts the previous one and calls the summary model
+    agent.history = HistoryManager(max_tokens=1, keep_turns=1)
+    return agent
+
+
+def test_streamed_reply_excludes_the_summary(compacting_agent):
+    agent = compacting_agent
+    list(agent.stream_conversation("第一個問題", thread_id="t"))
+
+    tokens = list(agent.stream_conversation("第二個問題", thread_id="t"))
+    assert compacting_agent.history._get_model().calls == 1
+    assert SUMMARY not in "".join(tokens)
+    assert "".join(tokens) == agent.last_reply("t")
+
+
+def test_async_streamed_reply_excludes_the_summary(compacting_agent):
+    agent = compacting_agent
+
+    async def stream(text: str) -> list[str]:
+        return [token async for token in agent.astream_conversation(text, thread_id="t")]
+
+    asyncio.run(stream("第一個問題"))
+    tokens = asyncio.run(stream("第二個問題"))
+    assert SUMMARY not in "".join(tokens)
+    assert "".join(tokens) == agent.last_reply("t")
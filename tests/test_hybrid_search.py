@@ -0,0 +1,108 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+from langchain_core.documents import Document
+
+from chatbot.utils.hybrid_search import BM25Index, HybridSearcher, tokenize
+from chatbot.utils.vector_db import VecDBManager
+
+PRODUCTS_PATH = (
+    Path(__file__).resolve().parents[1] / "data" / "raw" / "ai-eng-test-sample-products.csv"
+)
+
+
+@pytest.fixture
+def manager(fake_models, monkeypatch) -> VecDBManager:
+    manager = VecDBManager("sk-test", cache_dir=None)
+    manager.init_from_csv(str(PRODUCTS_PATH))
+    manager.vector_searches = 0
+    search, asearch = manager.search, manager.asearch
+
+    def counted_search(*args, **kwargs):
+        manager.vector_searches += 1
+        return search(*args, **kwargs)
+
+    async def counted_asearch(*args, **kwargs):
+        manager.vector_searches += 1
+        return await asearch(*args, **kwargs)
+
+    monkeypatch.setattr(manager, "search", counted_search)
+    monkeypatch.setattr(manager, "asearch", counted_asearch)
+    return manager
+
+
+def test_tokenize_keeps_identifiers_whole_and_splits_cjk_into_bigrams():
+    assert tokenize("ＪＴＣＧ-ARM-49") == ["jtcg-arm-49", "jtcg", "arm", "49"]
+    assert tokenize("螢幕支架") == ["螢幕", "幕支", "支架"]
+    assert tokenize("吋") == ["吋"]
+
+
+def test_unknown_query_terms_lower_the_coverage():
+    index = BM25Index([Document(page_content="vesa 100x100"), Document(page_content="cable tray")])
+    _, coverage = index.search("vesa 100x100", k=2)
+    assert coverage == pytest.approx(1.0)
+
+    _, coverage = index.search("vesa 100x100 zzz", k=2)
+    assert coverage < 0.8
+
+
+def test_confident_lexical_match_skips_the_embedding(manager):
+    searcher = HybridSearcher(manager)
+
+    results = searcher.search("JTCG-ARM-ULTRAWIDE-49", k=3)
+    assert results[0].id == "JTCG-ARM-ULTRAWIDE-49"
+    assert manager.vector_searches == 0
+    assert searcher.stats.to_dict() == {"lexical_only": 1, "fused": 0, "vector_only": 0}
+
+
+def test_vague_query_is_fused_with_the_vector_ranking(manager):
+    searcher = HybridSearcher(manager)
+
+    results = searcher.search("有推薦的螢幕支架嗎", k=3)
+    assert len(results) == 3
+    assert manager.vector_searches == 1
+    assert searcher.stats.fused == 1
+
+
+def test_async_search_follows_the_same_plan(manager):
+    searcher = HybridSearcher(manager)
+
+    asyncio.run(searcher.asearch("JTCG-WALL-ARM-34"))
+    asyncio.run(searcher.asearch("有推薦的螢幕支架嗎"))
+    assert manager.vector_searches == 1
+    assert (searcher.stats.lexical_only, searcher.stats.fused) == (1, 1)
+
+
+@pytest.mark.parametrize("mode, vector_searches", [("lexical", 0), ("vector", 1)])
+def test_single_ranking_modes(manager, mode, vector_searches):
+    searcher = HybridSearcher(manager, mode=mode)
+
+    searcher.search("有推薦的螢幕支架嗎")
+    assert manager.vector_searches == vector_searches
+
+
+def test_lexical_ranking_respects_the_metadata_filter(manager):
+    searcher = HybridSearcher(manager, mode="lexical")
+
+    results = searcher.search(
+        "JTCG-ARM-ULTRAWIDE-49", k=6, metadata_filter={"specs.arm_type": "accessory"}
+    )
+    assert results
+    assert {doc.metadata["specs"]["arm_type"] for doc in results} == {"accessory"}
+
+
+def test_lexical_index_follows_index_updates(manager):
+    searcher = HybridSearcher(manager, mode="lexical")
+    assert "JTCG-DESK-CLAMP-XL" not in {doc.id for doc in searcher.search("JTCG-DESK-CLAMP-XL")}
+
+    manager.upsert([Document(id="JTCG-DESK-CLAMP-XL", page_content="JTCG-DESK-CLAMP-XL 加大夾具")])
+    assert searcher.search("JTCG-DESK-CLAMP-XL")[0].id == "JTCG-DESK-CLAMP-XL"
+
+
+def test_reciprocal_rank_fusion_rewards_agreement(manager):
+    searcher = HybridSearcher(manager, rrf_k=60)
+    a, b, c = (Document(id=name, page_content=name) for name in "abc")
+
+    fused = searcher._fuse([[a, b, c], [b, c, a]], k=3)
+    assert [doc.id for doc in fused] == ["b", "a", "c"]
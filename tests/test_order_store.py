@@ -0,0 +1,104 @@
+import json
+import re
+from pathlib import Path
+
+import pytest
+
+from chatbot.utils.order_store import OrderStore
+
+ORDERS_PATH = Path(__file__).resolve().parents[1] / "data" / "raw" / "ai-eng-test-sample-order.json"
+
+
+@pytest.fixture(scope="module")
+def store() -> OrderStore:
+    return OrderStore.from_json(str(ORDERS_PATH))
+
+
+def test_lookups_are_case_insensitive(store):
+    assert store.get_order("jtcg-202508-10001")["order_id"] == "JTCG-202508-10001"
+    assert store.get_by_tracking(" dhl1234567 ")["order_id"] == "JTCG-202508-10001"
+    assert store.get_owner("JTCG-202508-10001") == "u_123456"
+    assert store.has_user("U_123456")
+
+
+def test_user_orders_keep_source_order_and_filter_by_status(store):
+    orders = store.get_user_orders("u_123456")
+    assert [o["order_id"] for o in orders] == ["JTCG-202508-10001", "JTCG-202507-09012"]
+    delivered = store.get_user_orders("u_123456", status="DELIVERED")
+    assert [o["order_id"] for o in delivered] == ["JTCG-202507-09012"]
+
+
+def test_reassigned_order_changes_owner_and_indexes():
+    store = OrderStore()
+    order = {"order_id": "A-1", "tracking": "T1", "status": "processing"}
+    store.add_order("u_1", order)
+    store.add_order("u_2", {**order, "tracking": "T2", "status": "shipped"})
+
+    assert store.get_owner("A-1") == "u_2"
+    assert store.get_user_orders("u_1") == []
+    assert store.get_by_tracking("T1") is None
+    assert store.get_user_orders("u_2", status="processing") == []
+    assert len(store) == 1
+
+
+def test_documents_leave_out_personal_fields(store):
+    document = next(doc for doc in store.documents() if doc.id == "jtcg-202508-10001")
+    assert document.metadata["user_id"] == "u_123456"
+    assert "shipping_address" not in document.page_content
+    assert "contact_phone" not in document.page_content
+
+
+def test_sqlite_round_trip(store, tmp_path):
+    db_path = str(tmp_path / "orders.db")
+    store.to_sqlite(db_path)
+    loaded = OrderStore.load(db_path)
+
+    assert len(loaded) == len(store)
+    assert loaded.get_order("JTCG-202508-10001") == store.get_order("JTCG-202508-10001")
+    assert loaded.by_user == store.by_user
+
+
+@pytest.fixture
+def order_tool(fake_models):
+    from chatbot.tool.order_tool import OrderSearchTool
+    from chatbot.utils.vector_db import VecDBManager
+
+    return OrderSearchTool(VecDBManager("sk-test", cache_dir=None), data_path=str(ORDERS_PATH))
+
+
+def test_owner_reads_an_order_by_id_or_tracking(order_tool):
+    by_id = json.loads(order_tool.execute("user_id=u_123456, order_id=JTCG-202508-10001"))
+    assert by_id["order"]["order_id"] == "JTCG-202508-10001"
+
+    by_tracking = json.loads(order_tool.execute("user_id=u_123456, tracking=TEX998877"))
+    assert by_tracking["order"]["order_id"] == "JTCG-202507-09012"
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "user_id=u_123456, order_id=JTCG-202508-12005",
+        "user_id=u_123456, tracking=DHL556677",
+    ],
+)
+def test_other_users_orders_are_not_served(order_tool, query):
+    result = json.loads(order_tool.execute(query))
+    assert "order" not in result
+    assert "查無此訂單" in result["error"]
+
+
+def test_queries_without_user_id_are_refused(order_tool):
+    for query in ["order_id=JTCG-202508-10001", "DHL1234567 到哪了"]:
+        assert "缺少 user_id" in json.loads(order_tool.execute(query))["error"]
+
+
+def test_unknown_user_is_reported(order_tool):
+    result = json.loads(order_tool.execute("user_id=u_000000, 我的螢幕支架"))
+    assert "u_000000" in result["error"]
+
+
+def test_semantic_fallback_only_searches_the_callers_orders(order_tool):
+    result = order_tool.execute("user_id=u_222222, 之前買的螢幕支架", k=10)
+
+    order_ids = set(re.findall(r"order_id: (\S+)", result))
+    assert order_ids == {"JTCG-202508-12005", "JTCG-202506-05077"}
@@ -0,0 +1,136 @@
+import re
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+
+from chatbot.utils.response_cache import ResponseCache, numeric_tokens
+
+REPLY = {"agent_type": "faq_agent", "message": "七天內可退貨"}
+
+
+class CanonicalEmbedding(Embeddings):
+    """Embeds a canonical form, so paraphrases and number changes look identical"""
+
+    def __init__(self):
+        self.fake = DeterministicFakeEmbedding(size=32)
+
+    @staticmethod
+    def canonical(text: str) -> str:
+        return re.sub(r"\d|請問|\s", "", text)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.fake.embed_query(self.canonical(text))
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self.embed_query(text) for text in texts]
+
+
+@pytest.fixture
+def cache() -> ResponseCache:
+    return ResponseCache(embeddings=CanonicalEmbedding())
+
+
+def test_exact_hit_ignores_case_spacing_and_punctuation(cache):
+    cache.put("退貨政策是什麼？", REPLY, latency=2.0)
+
+    lookup = cache.get("  退貨政策 是什麼?")
+    assert (lookup.response, lookup.tier) == (REPLY, "exact")
+    assert cache.stats.exact_hits == 1
+    assert cache.stats.saved_seconds == 2.0
+
+
+def test_semantic_hit_for_a_paraphrase(cache):
+    cache.put("退貨政策是什麼？", REPLY, latency=1.0)
+
+    lookup = cache.get("請問退貨政策是什麼？")
+    assert (lookup.response, lookup.tier) == (REPLY, "semantic")
+
+
+def test_semantic_tier_requires_the_same_numbers(cache):
+    cache.put("27吋螢幕能用哪款支架？", REPLY, latency=1.0)
+
+    assert cache.get("32吋螢幕能用哪款支架？").response is None
+    assert cache.get("請問27吋螢幕能用哪款支架？").tier == "semantic"
+    assert cache.stats.misses == 1
+
+
+def test_numeric_tokens_are_normalized():
+    assert numeric_tokens("２７吋 6.5kg") == ("27", "6.5")
+    assert numeric_tokens("沒有數字") == ()
+
+
+def test_miss_hands_back_the_query_embedding(cache):
+    lookup = cache.get("運費怎麼算？")
+    assert lookup.response is None
+    assert lookup.embedding is not None
+    assert cache.stats.misses == 1
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "我的 user_id 是 u_123456",
+        "訂單 JTCG-202508-10001 到哪了",
+        "請寄到 dan@example.com",
+        "我的電話 0912-345-678",
+    ],
+)
+def test_personal_data_bypasses_the_cache(cache, message):
+    cache.put(message, REPLY, latency=1.0)
+
+    assert cache.get(message).response is None
+    assert cache.stats.bypassed == 1
+    assert len(cache._entries) == 0
+
+
+def test_expired_entries_are_not_served():
+    cache = ResponseCache(ttl_seconds=0)
+    cache.put("退貨政策是什麼？", REPLY, latency=1.0)
+
+    assert cache.get("退貨政策是什麼？").response is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2, embeddings=None)
+    cache.put("問題一", REPLY, latency=1.0)
+    cache.put("問題二", REPLY, latency=1.0)
+    cache.get("問題一")
+    cache.put("問題三", REPLY, latency=1.0)
+
+    assert cache.get("問題二").response is None
+    assert cache.get("問題一").response == REPLY
+
+
+def test_changed_source_file_clears_the_cache(tmp_path):
+    source = tmp_path / "knowledge.csv"
+    source.write_text("v1", encoding="utf-8")
+    cache = ResponseCache(source_paths=[str(source)])
+    cache.put("退貨政策是什麼？", REPLY, latency=1.0)
+
+    source.write_text("v2 changed", encoding="utf-8")
+    assert cache.get("退貨政策是什麼？").response is None
+
+
+def test_personalized_sessions_are_not_cached(fake_models):
+    from chatbot.agent.orchestrator_agent import OrchestratorAgent
+
+    orchestrator = OrchestratorAgent(
+        fast_routing=True, intent_classifier_path=None, routing_log_path=None
+    )
+    question = "你們的退貨政策是什麼？"
+
+    first = orchestrator.route_and_execute(question, session_id="anonymous-1")
+    assert "cached" not in first
+
+    personalized = orchestrator.route_and_execute(
+        question, user_info={"name": "王小明"}, session_id="named"
+    )
+    assert "cached" not in personalized
+    assert orchestrator.response_cache.stats.bypassed == 1
+
+    named_in_message = orchestrator.route_and_execute(f"我叫王小明，{question}", session_id="n2")
+    assert "cached" not in named_in_message
+
+    again = orchestrator.route_and_execute(question, session_id="anonymous-2")
+    assert again["cached"] == "exact"
+    assert again["message"] == first["message"]
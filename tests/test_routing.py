@@ -0,0 +1,57 @@
+import json
+from pathlib import Path
+
+from chatbot.agent.fast_router import FastRouter
+from chatbot.agent.intent_classifier import IntentPrediction, RoutingDecisionLog
+from chatbot.benchmark.routing import evaluate
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data" / "raw"
+
+
+class StubClassifier:
+    """Confident about product questions only"""
+
+    def classify(self, message: str) -> IntentPrediction | None:
+        if "支架" in message:
+            return IntentPrediction(agent_type="product_agent", confidence=0.9)
+        return None
+
+
+def test_llm_decisions_are_logged_as_training_labels(fake_models, tmp_path):
+    from chatbot.agent.orchestrator_agent import LLMRouter
+
+    log_path = tmp_path / "logs" / "routing_decisions.jsonl"
+    router = LLMRouter(concurrent=False, decision_log=RoutingDecisionLog(str(log_path)))
+
+    result = router.route_message("我想退貨")
+    assert result.tier == "llm"
+
+    records = [json.loads(line) for line in log_path.read_text(encoding="utf-8").splitlines()]
+    assert records == [
+        {
+            "message": "我想退貨",
+            "agent_type": result.agent_type.value,
+            "confidence": result.confidence,
+            "tier": "llm",
+        }
+    ]
+
+
+def test_evaluate_reports_the_classifier_tier():
+    fast_router = FastRouter(
+        knowledge_path=str(DATA_DIR / "ai-eng-test-sample-knowledges.csv"),
+        products_path=str(DATA_DIR / "ai-eng-test-sample-products.csv"),
+    )
+    messages = ["我要退貨，運費誰付？", "有適合桌邊的支架嗎", "嗯嗯"]
+    labels = {"有適合桌邊的支架嗎": "product_agent"}
+
+    report = evaluate(fast_router, messages, labels, intent_classifier=StubClassifier())
+    assert fast_router.route("有適合桌邊的支架嗎") is None
+    assert report["tiers"]["classifier"] == {
+        "count": 1,
+        "hit_rate": 1 / 3,
+        "accuracy": 1.0,
+        "labelled": 1,
+    }
+    assert report["tiers"]["llm"]["count"] == 1
+    assert report["fast_hit_rate"] == 2 / 3
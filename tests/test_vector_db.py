@@ -0,0 +1,177 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+from langchain_core.documents import Document
+
+from chatbot.utils.vector_db import VecDBManager
+
+PRODUCTS_PATH = (
+    Path(__file__).resolve().parents[1] / "data" / "raw" / "ai-eng-test-sample-products.csv"
+)
+
+
+def doc(doc_id: str, text: str, **metadata) -> Document:
+    return Document(id=doc_id, page_content=text, metadata=metadata)
+
+
+def indexed_texts(manager: VecDBManager) -> dict[str, str]:
+    return {
+        doc_id: document.page_content for doc_id, document in manager.vec_db.docstore._dict.items()
+    }
+
+
+@pytest.fixture
+def manager(fake_models, tmp_path) -> VecDBManager:
+    return VecDBManager("sk-test", cache_dir=str(tmp_path / "cache"))
+
+
+@pytest.fixture
+def source(tmp_path):
+    """A JSON source file and a loader that turns it into keyed documents"""
+    path = tmp_path / "source.json"
+
+    def write(rows: dict[str, str]) -> None:
+        path.write_text(json.dumps(rows, ensure_ascii=False), encoding="utf-8")
+
+    def load() -> list[Document]:
+        rows = json.loads(path.read_text(encoding="utf-8"))
+        return [doc(doc_id, text) for doc_id, text in rows.items()]
+
+    write({"a": "退貨政策", "b": "運費說明", "c": "保固期限"})
+    return path, write, load
+
+
+def test_upsert_embeds_only_the_given_documents(manager):
+    manager.init_from_documents([doc("a", "退貨政策"), doc("b", "運費說明")])
+
+    stats = manager.upsert([doc("b", "運費新規定"), doc("c", "保固期限")])
+    assert stats.rows == 2
+    assert indexed_texts(manager) == {"a": "退貨政策", "b": "運費新規定", "c": "保固期限"}
+    assert len(manager.vec_db.index_to_docstore_id) == 3
+
+
+def test_delete_reports_how_many_were_indexed(manager):
+    manager.init_from_documents([doc("a", "退貨政策"), doc("b", "運費說明")])
+
+    assert manager.delete(["a", "missing"]) == 1
+    assert indexed_texts(manager) == {"b": "運費說明"}
+    assert [d.id for d in manager.search("退貨政策", k=3)] == ["b"]
+
+
+def test_documents_need_ids(manager):
+    with pytest.raises(ValueError):
+        manager.init_from_documents([Document(page_content="沒有 id")])
+
+
+def test_updates_swap_in_a_new_index(manager):
+    manager.init_from_documents([doc("a", "退貨政策")])
+    before = manager.vec_db
+
+    manager.upsert([doc("b", "運費說明")])
+    assert manager.vec_db is not before
+    assert set(indexed_texts(manager)) == {"a", "b"}
+    assert len(before.index_to_docstore_id) == 1
+
+
+def test_refresh_reembeds_only_changed_rows(manager, source):
+    path, write, load = source
+    manager.init_from_documents(load(), source_path=str(path), load_source=load)
+
+    write({"a": "退貨政策", "b": "運費新規定", "d": "安裝教學"})
+    stats = manager.refresh()
+    assert stats.to_dict() == {"added": 1, "updated": 1, "deleted": 1, "unchanged": 1}
+    assert indexed_texts(manager) == {"a": "退貨政策", "b": "運費新規定", "d": "安裝教學"}
+
+    assert not manager.refresh().changed
+
+
+def test_refreshed_source_is_served_from_the_saved_index(fake_models, tmp_path, source):
+    path, write, load = source
+    cache_dir = str(tmp_path / "cache")
+    manager = VecDBManager("sk-test", cache_dir=cache_dir)
+    manager.init_from_documents(load(), source_path=str(path), load_source=load)
+
+    write({"a": "退貨政策"})
+    manager.refresh()
+
+    restarted = VecDBManager("sk-test", cache_dir=cache_dir)
+    assert restarted._load_cached_index(restarted._index_path(str(path), "keyed-documents"))
+    assert indexed_texts(restarted) == {"a": "退貨政策"}
+
+
+def test_refresh_with_documents_does_not_save_under_the_source_key(manager, source):
+    path, _, load = source
+    manager.init_from_documents(load(), source_path=str(path), load_source=load)
+    index_file = manager._index_path(str(path), "keyed-documents") / "index.faiss"
+    saved = index_file.stat().st_mtime_ns
+
+    stats = manager.refresh(documents=[doc("z", "只在記憶體裡")])
+    assert (stats.added, stats.deleted) == (1, 3)
+    assert indexed_texts(manager) == {"z": "只在記憶體裡"}
+    assert index_file.stat().st_mtime_ns == saved
+
+
+def test_refresh_needs_a_source(manager):
+    manager.init_from_texts(["退貨政策"])
+    with pytest.raises(ValueError):
+        manager.refresh()
+
+
+def test_relative_cache_dir_is_anchored_to_the_project_root(fake_models):
+    from chatbot.utils.load_env import root_dir
+
+    assert VecDBManager("sk-test").cache_dir == root_dir / "data" / "cache" / "vec_db"
+
+
+@pytest.fixture
+def products(manager) -> VecDBManager:
+    manager.init_from_csv(str(PRODUCTS_PATH))
+    return manager
+
+
+def test_csv_rows_keep_typed_nested_metadata(products):
+    metadata = products.vec_db.docstore.search("JTCG-ARM-DUAL-PRO-32").metadata
+    assert metadata["specs"]["size_max_inch"] == 32
+    assert metadata["specs"]["vesa"] == ["75x75", "100x100"]
+    assert metadata["specs"]["usb_hub"] is False
+    assert metadata["title"].startswith("JTCG 雙螢幕氣壓臂")
+
+
+@pytest.mark.parametrize(
+    "metadata_filter, skus",
+    [
+        ({"specs.size_max_inch": {"$gte": 34}}, {"JTCG-ARM-ULTRAWIDE-49", "JTCG-WALL-ARM-34"}),
+        ({"specs.arm_type": "accessory"}, {"JTCG-LAPTOP-VESA-KIT", "JTCG-CABLE-MGMT-KIT"}),
+        (
+            {"specs.arm_type": {"$in": ["dual_gas_spring", "single_mechanical"]}},
+            {"JTCG-ARM-DUAL-PRO-32", "JTCG-ARM-SINGLE-LITE-27"},
+        ),
+        (
+            {"specs.vesa": "100x100", "specs.size_max_inch": {"$lt": 30}},
+            {"JTCG-ARM-SINGLE-LITE-27"},
+        ),
+        ({"specs.size_max_inch": {"$gt": 100}}, set()),
+    ],
+)
+def test_search_only_returns_documents_matching_the_filter(products, metadata_filter, skus):
+    results = products.search("螢幕支架", k=6, metadata_filter=metadata_filter)
+    assert {d.id for d in results} == skus
+
+
+def test_filtered_search_fills_k_from_the_matching_documents(products):
+    results = products.search("螢幕支架", k=1, metadata_filter={"specs.arm_type": "accessory"})
+    assert len(results) == 1
+    assert results[0].metadata["specs"]["arm_type"] == "accessory"
+
+
+def test_async_search_applies_the_filter(products):
+    metadata_filter = {"specs.size_max_inch": {"$gte": 34}}
+    results = asyncio.run(products.asearch("螢幕支架", k=6, metadata_filter=metadata_filter))
+    assert {d.id for d in results} == {"JTCG-ARM-ULTRAWIDE-49", "JTCG-WALL-ARM-34"}
+
+
+def test_unknown_filter_operator_is_rejected(products):
+    with pytest.raises(ValueError):
+        products.search("螢幕支架", metadata_filter={"specs.size_max_inch": {"$regex": "3"}})